@@ -0,0 +1,18 @@
+from django.contrib.auth.backends import ModelBackend
+
+from .services import get_cached_user, user_cache_is_shared
+
+
+class CachedModelBackend(ModelBackend):
+    """ModelBackend that loads the session user, with its profile, from the cache.
+
+    Only a cache shared by all workers is used: with a per-process cache a
+    password change or deactivation would be invalidated in one worker and
+    ignored by the others, so the user is read from the database instead.
+    """
+
+    def get_user(self, user_id):
+        if not user_cache_is_shared():
+            return super().get_user(user_id)
+        user = get_cached_user(user_id)
+        return user if user is not None and self.user_can_authenticate(user) else None
@@ -0,0 +1,33 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache, caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+
+from core.metrics import record_cache_lookup
+
+User = get_user_model()
+
+
+def _user_cache_key(user_id) -> str:
+    return f'auth:user:{user_id}'
+
+
+def user_cache_is_shared() -> bool:
+    """Whether invalidations reach every worker; a per-process cache would keep stale users elsewhere."""
+    return not isinstance(caches['default'], (LocMemCache, DummyCache))
+
+
+def get_cached_user(user_id):
+    key = _user_cache_key(user_id)
+    user = cache.get(key)
+    record_cache_lookup('auth_user', user is not None)
+    if user is None:
+        user = User.objects.select_related('profile').filter(pk=user_id).first()
+        if user is not None:
+            cache.set(key, user, getattr(settings, 'AUTH_USER_CACHE_TIMEOUT', 300))
+    return user
+
+
+def invalidate_cached_user(user_id):
+    cache.delete(_user_cache_key(user_id))
@@ -0,0 +1,44 @@
+import base64
+import binascii
+import json
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+
+class CursorError(ValueError):
+    pass
+
+
+def encode_cursor(moment, pk) -> str:
+    raw = json.dumps([moment.isoformat(), pk], separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        moment, pk = json.loads(raw)
+        moment = parse_datetime(moment)
+    except (binascii.Error, ValueError, TypeError):
+        raise CursorError('Invalid cursor.') from None
+    if moment is None or not isinstance(pk, int):
+        raise CursorError('Invalid cursor.')
+    return moment, pk
+
+
+def paginate(queryset, serializer, key: str, cursor: str | None = None, limit: int = 20, descending: bool = True):
+    """Return one keyset page of ``queryset`` ordered by ``(key, pk)``.
+
+    The cursor is the ``(key, pk)`` of the last row served, so a page costs
+    one indexed range scan however deep the client has scrolled, and rows
+    inserted meanwhile never shift later pages.
+    """
+    lookup = 'lt' if descending else 'gt'
+    if cursor:
+        moment, pk = decode_cursor(cursor)
+        queryset = queryset.filter(Q(**{f'{key}__{lookup}': moment}) | Q(**{key: moment, f'pk__{lookup}': pk}))
+    ordering = (f'-{key}', '-pk') if descending else (key, 'pk')
+    rows = list(serializer.values(queryset.order_by(*ordering), key, 'pk')[: limit + 1])
+    next_cursor = encode_cursor(rows[limit - 1][key], rows[limit - 1]['pk']) if len(rows) > limit else None
+    return {'results': [serializer.serialize(row) for row in rows[:limit]], 'next': next_cursor}
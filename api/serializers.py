@@ -0,0 +1,127 @@
+from django.core.files.storage import default_storage
+from django.db.models import Count, Exists, OuterRef, Q, Subquery, Value
+
+from messaging.models import DirectConversationParticipant
+from posts.models import Like
+
+
+class FieldError(ValueError):
+    pass
+
+
+class ValuesSerializer:
+    """Turns ``.values()`` rows into API dicts, selecting only the requested fields.
+
+    ``fields`` maps each public name to a lookup passed to ``.values()`` or to
+    a callable ``(user) -> expression`` that is annotated only when the field
+    is requested, so sparse requests also skip the joins and subqueries of
+    the fields they leave out. No model instances are built.
+    """
+
+    fields = {}
+    media_fields = frozenset()
+
+    def __init__(self, requested=None, user=None):
+        names = list(requested) if requested else list(self.fields)
+        unknown = sorted(set(names) - set(self.fields))
+        if unknown:
+            raise FieldError(f'Unknown fields: {", ".join(unknown)}.')
+        self.names = names
+        self.user = user
+
+    @classmethod
+    def from_param(cls, value: str, user=None):
+        return cls([name for name in value.split(',') if name] if value else None, user=user)
+
+    def _source(self, name):
+        source = self.fields[name]
+        return name if callable(source) else source
+
+    def values(self, queryset, *extra):
+        annotations = {name: self.fields[name](self.user) for name in self.names if callable(self.fields[name])}
+        lookups = dict.fromkeys([*(self._source(name) for name in self.names), *extra])
+        return queryset.annotate(**annotations).values(*lookups)
+
+    def serialize(self, row) -> dict:
+        data = {}
+        for name in self.names:
+            value = row[self._source(name)]
+            if name in self.media_fields:
+                value = default_storage.url(value) if value else None
+            data[name] = value
+        return data
+
+
+def _post_liked(user):
+    if user is None or not user.is_authenticated:
+        return Value(False)
+    return Exists(Like.objects.filter(post=OuterRef('pk'), user=user))
+
+
+class PostSerializer(ValuesSerializer):
+    fields = {
+        'id': 'id',
+        'author': 'author__username',
+        'author_display_name': 'author__profile__display_name',
+        'content': 'content',
+        'topic': 'topic',
+        'image': 'image',
+        'created_at': 'created_at',
+        'updated_at': 'updated_at',
+        'like_count': lambda user: Count('likes', distinct=True),
+        'comment_count': lambda user: Count('comments', filter=Q(comments__is_deleted=False), distinct=True),
+        'liked': _post_liked,
+    }
+    media_fields = frozenset({'image'})
+
+
+class ProfileSerializer(ValuesSerializer):
+    fields = {
+        'username': 'username',
+        'display_name': 'profile__display_name',
+        'bio': 'profile__bio',
+        'avatar': 'profile__avatar',
+        'joined_at': 'date_joined',
+        'friends': 'stats__friends',
+        'followers': 'stats__followers',
+        'posts': 'stats__posts',
+        'likes_received': 'stats__likes_received',
+    }
+    media_fields = frozenset({'avatar'})
+
+
+def _other_participant(user):
+    participants = DirectConversationParticipant.objects.filter(conversation=OuterRef('pk')).exclude(user=user)
+    return Subquery(participants.values('user__username')[:1])
+
+
+class ConversationSerializer(ValuesSerializer):
+    fields = {
+        'id': 'id',
+        'with': _other_participant,
+        'created_at': 'created_at',
+        'last_message_at': 'last_message_at',
+    }
+
+
+class MessageSerializer(ValuesSerializer):
+    fields = {
+        'id': 'id',
+        'sender': 'sender__username',
+        'content': 'content',
+        'image': 'image',
+        'created_at': 'created_at',
+        'edited_at': 'edited_at',
+    }
+    media_fields = frozenset({'image'})
+
+    def archived_row(self, message, usernames) -> dict:
+        """Build the ``.values()``-shaped row for a message unpacked from an archive segment."""
+        return {
+            'id': message.id,
+            'sender__username': usernames.get(message.sender_id),
+            'content': message.content,
+            'image': message.image.name or None,
+            'created_at': message.created_at,
+            'edited_at': message.edited_at,
+        }
@@ -0,0 +1,13 @@
+from django.urls import path
+
+from . import views
+
+app_name = 'api'
+
+urlpatterns = [
+    path('feed/', views.feed, name='feed'),
+    path('users/<str:username>/', views.profile_detail, name='profile'),
+    path('users/<str:username>/posts/', views.profile_posts, name='profile_posts'),
+    path('conversations/', views.conversations, name='conversations'),
+    path('conversations/<int:pk>/messages/', views.conversation_messages, name='messages'),
+]
@@ -0,0 +1,126 @@
+from functools import wraps
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db.models import F, Max
+from django.db.models.functions import Coalesce
+from django.http import JsonResponse
+from django.shortcuts import get_object_or_404
+from django.views.decorators.http import require_GET
+
+from messaging.models import DirectConversation
+from messaging.services import get_archived_messages, get_user_conversations, get_visible_messages, get_visible_segments
+from posts.services import get_feed_posts, get_user_posts
+from profiles.services import STAT_FIELDS, get_profile_stats
+from .pagination import CursorError, paginate
+from .serializers import ConversationSerializer, FieldError, MessageSerializer, PostSerializer, ProfileSerializer
+
+User = get_user_model()
+
+
+def _error(message: str, status: int = 400):
+    return JsonResponse({'error': message}, status=status)
+
+
+def api_view(login=True):
+    """GET-only JSON view; bad ``fields`` or ``cursor`` values become 400s, anonymous callers 401s."""
+
+    def decorator(view_func):
+        @require_GET
+        @wraps(view_func)
+        def _wrapped(request, *args, **kwargs):
+            if login and not request.user.is_authenticated:
+                return _error('Authentication required.', status=401)
+            try:
+                return view_func(request, *args, **kwargs)
+            except (FieldError, CursorError) as exc:
+                return _error(str(exc))
+
+        return _wrapped
+
+    return decorator
+
+
+def _limit(request) -> int:
+    default = getattr(settings, 'API_PAGE_SIZE', 20)
+    try:
+        limit = int(request.GET.get('limit', default))
+    except ValueError:
+        limit = default
+    return min(max(limit, 1), getattr(settings, 'API_MAX_PAGE_SIZE', 100))
+
+
+def _page(request, queryset, serializer_class, key='created_at', descending=True):
+    serializer = serializer_class.from_param(request.GET.get('fields', ''), user=request.user)
+    return paginate(queryset, serializer, key, request.GET.get('cursor'), _limit(request), descending)
+
+
+def _posts_page(request, posts_qs):
+    topic = request.GET.get('topic')
+    if topic:
+        posts_qs = posts_qs.filter(topic=topic)
+    # Rows come from .values(); the prefetches the HTML cards need are dead weight here.
+    posts_qs = posts_qs.prefetch_related(None)
+    return _page(request, posts_qs, PostSerializer, descending=request.GET.get('order') != 'old')
+
+
+@api_view()
+def feed(request):
+    return JsonResponse(_posts_page(request, get_feed_posts(request.user)))
+
+
+@api_view(login=False)
+def profile_detail(request, username):
+    serializer = ProfileSerializer.from_param(request.GET.get('fields', ''))
+    row = serializer.values(User.objects.filter(username=username), 'pk').first()
+    if row is None:
+        return _error('User not found.', status=404)
+    requested_stats = [name for name in STAT_FIELDS if name in serializer.names]
+    if requested_stats and row[f'stats__{requested_stats[0]}'] is None:
+        # Users created before ProfileStats existed get their row on first read.
+        stats = get_profile_stats(User(pk=row['pk']))
+        row.update({f'stats__{name}': getattr(stats, name) for name in STAT_FIELDS})
+    return JsonResponse(serializer.serialize(row))
+
+
+@api_view(login=False)
+def profile_posts(request, username):
+    author = get_object_or_404(User, username=username)
+    return JsonResponse(_posts_page(request, get_user_posts(author)))
+
+
+@api_view()
+def conversations(request):
+    conversations_qs = get_user_conversations(request.user).annotate(
+        last_message_at=Max('messages__created_at'), activity=Coalesce(F('last_message_at'), F('created_at'))
+    )
+    return JsonResponse(_page(request, conversations_qs, ConversationSerializer, key='activity'))
+
+
+@api_view()
+def conversation_messages(request, pk):
+    conversation = get_object_or_404(
+        DirectConversation.objects.prefetch_related('participants__user'), pk=pk, participants__user=request.user
+    )
+    participants = list(conversation.participants.all())
+    cleared_before = next(p.cleared_before for p in participants if p.user_id == request.user.id)
+    segments = get_visible_segments(conversation, cleared_before).order_by('-pk').values_list('pk', flat=True)
+    segment_id = request.GET.get('segment')
+    if segment_id:
+        if not segment_id.isdigit():
+            return _error('Invalid segment.')
+        segment = get_object_or_404(get_visible_segments(conversation, cleared_before), pk=segment_id)
+        serializer = MessageSerializer.from_param(request.GET.get('fields', ''))
+        usernames = {p.user_id: p.user.username for p in participants}
+        messages = reversed(get_archived_messages(segment, {}, cleared_before))
+        return JsonResponse(
+            {
+                'results': [serializer.serialize(serializer.archived_row(message, usernames)) for message in messages],
+                'next': None,
+                'earlier_segment': segments.filter(pk__lt=segment.pk).first(),
+            }
+        )
+    page = _page(request, get_visible_messages(conversation, cleared_before), MessageSerializer)
+    # Once the live history is exhausted, older messages continue in the archive.
+    page['earlier_segment'] = segments.first() if page['next'] is None else None
+    return JsonResponse(page)
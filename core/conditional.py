@@ -0,0 +1,47 @@
+import hashlib
+
+from django.conf import settings
+from django.contrib.messages import get_messages
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.utils.cache import get_conditional_response, patch_cache_control
+
+
+def page_etag(request, fingerprint):
+    """Weak ETag for a personalised page, or None when the page must not be revalidated.
+
+    ``fingerprint`` is a callable returning cheap aggregates that describe the
+    page data; it is only evaluated for GET/HEAD. The viewer, URL, CSRF secret
+    and deployed static manifest are mixed in. Pages with pending flash
+    messages are never answered with 304.
+    """
+    if request.method not in ('GET', 'HEAD') or len(get_messages(request)):
+        return None
+    raw = repr(
+        (
+            getattr(settings, 'PAGE_ETAG_VERSION', ''),
+            getattr(staticfiles_storage, 'manifest_hash', ''),
+            request.get_full_path(),
+            request.user.pk if request.user.is_authenticated else None,
+            request.COOKIES.get(settings.CSRF_COOKIE_NAME, ''),
+            fingerprint(),
+        )
+    )
+    return f'W/"{hashlib.sha1(raw.encode()).hexdigest()}"'
+
+
+def not_modified(request, etag):
+    """Return a 304 response if the client's copy matches ``etag``, else None."""
+    if etag is None:
+        return None
+    response = get_conditional_response(request, etag=etag)
+    if response is not None:
+        response['ETag'] = etag
+        patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+def with_etag(response, etag):
+    if etag is not None and response.status_code == 200:
+        response['ETag'] = etag
+        patch_cache_control(response, private=True, no_cache=True)
+    return response
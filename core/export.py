@@ -0,0 +1,183 @@
+import heapq
+import json
+import zipfile
+from itertools import groupby
+
+from django.core.files.storage import default_storage
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import F, Q
+from django.utils import timezone
+
+from friendships.models import Friendship
+from messaging.models import ArchivedMessageImage, DirectConversationParticipant, DirectMessage
+from messaging.services import get_archived_messages, get_visible_messages, get_visible_segments
+from posts.models import Comment, Like, Post
+from profiles.models import Profile
+
+# Buffered zip output is handed to the client once it grows past this size.
+FLUSH_SIZE = 64 * 1024
+
+
+class _ZipSink:
+    """Write-only file object collecting zip output until the generator drains it.
+
+    It has no ``seek``/``tell``, so ``zipfile`` writes data descriptors after
+    each entry instead of seeking back to patch headers.
+    """
+
+    def __init__(self):
+        self._chunks = []
+        self.size = 0
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self.size += len(data)
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self) -> bytes:
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        self.size = 0
+        return data
+
+
+def _keyset_rows(queryset, fields, batch_size):
+    """Yield ``.values()`` rows of ``queryset`` in primary-key order, one bounded query per batch."""
+    last_pk = 0
+    while True:
+        batch = queryset.filter(pk__gt=last_pk).order_by('pk').values('pk', *fields)[:batch_size]
+        count = 0
+        for row in batch.iterator(chunk_size=batch_size):
+            last_pk = row.pop('pk')
+            count += 1
+            yield row
+        if count < batch_size:
+            return
+
+
+def _sorted_names(queryset, field, batch_size):
+    """Yield the distinct non-empty values of ``field`` in sorted order, keyset-paginated by value."""
+    names = queryset.exclude(**{field: ''}).exclude(**{f'{field}__isnull': True})
+    last = ''
+    while True:
+        batch = list(
+            names.filter(**{f'{field}__gt': last}).order_by(field).values_list(field, flat=True).distinct()[:batch_size]
+        )
+        yield from batch
+        if len(batch) < batch_size:
+            return
+        last = batch[-1]
+
+
+def _friends(user, batch_size):
+    friendships = Friendship.objects.filter(Q(user1=user) | Q(user2=user))
+    for row in _keyset_rows(friendships, ('user1_id', 'user1__username', 'user2__username', 'created_at'), batch_size):
+        friend = row['user2__username'] if row['user1_id'] == user.pk else row['user1__username']
+        yield {'username': friend, 'since': row['created_at']}
+
+
+def _messages(user, batch_size):
+    """Every message ``user`` can still see: archived segments first, then the live rows."""
+    fields = ('id', 'conversation_id', 'sender__username', 'content', 'image', 'created_at', 'edited_at')
+    participations = DirectConversationParticipant.objects.filter(user=user).select_related('conversation')
+    for participation in participations.order_by('pk').iterator(chunk_size=batch_size):
+        conversation = participation.conversation
+        usernames = dict(conversation.participants.values_list('user_id', 'user__username'))
+        segments = get_visible_segments(conversation, participation.cleared_before).order_by('last_created_at', 'pk')
+        for segment in segments.iterator(chunk_size=1):
+            for message in get_archived_messages(segment, {}, participation.cleared_before):
+                yield {
+                    'id': message.id,
+                    'conversation_id': conversation.pk,
+                    'sender__username': usernames.get(message.sender_id),
+                    'content': message.content,
+                    'image': message.image.name or None,
+                    'created_at': message.created_at,
+                    'edited_at': message.edited_at,
+                }
+        yield from _keyset_rows(get_visible_messages(conversation, participation.cleared_before), fields, batch_size)
+
+
+def _tables(user, batch_size):
+    profile = Profile.objects.filter(user=user)
+    yield 'profile.jsonl', _keyset_rows(
+        profile, ('user__username', 'user__email', 'user__date_joined', 'display_name', 'bio', 'avatar'), batch_size
+    )
+    yield 'posts.jsonl', _keyset_rows(
+        Post.objects.filter(author=user, is_deleted=False),
+        ('id', 'content', 'topic', 'image', 'created_at', 'updated_at'),
+        batch_size,
+    )
+    yield 'comments.jsonl', _keyset_rows(
+        Comment.objects.filter(author=user, is_deleted=False),
+        ('id', 'post_id', 'content', 'attachment', 'created_at'),
+        batch_size,
+    )
+    yield 'likes.jsonl', _keyset_rows(Like.objects.filter(user=user), ('post_id', 'created_at'), batch_size)
+    yield 'friends.jsonl', _friends(user, batch_size)
+    yield 'messages.jsonl', _messages(user, batch_size)
+
+
+def iter_user_media(user, batch_size: int = 500):
+    """Yield each media name referenced by the exported rows once, in sorted order.
+
+    Every source is already sorted and deduplicated by the database, so
+    merging them and dropping adjacent repeats needs no set of seen names.
+    """
+    visible_messages = DirectMessage.objects.filter(
+        Q(conversation__participants__cleared_before__isnull=True)
+        | Q(created_at__gt=F('conversation__participants__cleared_before')),
+        conversation__participants__user=user,
+    )
+    visible_archived = ArchivedMessageImage.objects.filter(
+        Q(segment__conversation__participants__cleared_before__isnull=True)
+        | Q(segment__last_created_at__gt=F('segment__conversation__participants__cleared_before')),
+        segment__conversation__participants__user=user,
+    )
+    sources = (
+        _sorted_names(Profile.objects.filter(user=user), 'avatar', batch_size),
+        _sorted_names(Post.objects.filter(author=user, is_deleted=False), 'image', batch_size),
+        _sorted_names(Comment.objects.filter(author=user, is_deleted=False), 'attachment', batch_size),
+        _sorted_names(visible_messages, 'image', batch_size),
+        _sorted_names(visible_archived, 'name', batch_size),
+    )
+    for name, _ in groupby(heapq.merge(*sources)):
+        yield name
+
+
+def iter_user_export(user, batch_size: int = 500):
+    """Yield a zip archive of ``user``'s data as it is built.
+
+    The archive holds one JSON Lines file per table plus every referenced
+    media file under ``media/``. Rows are read in keyset batches and the
+    zip is written to a sink that is drained as the client reads, so memory
+    stays bounded however large the account is.
+    """
+    sink = _ZipSink()
+    date_time = timezone.localtime().timetuple()[:6]
+    with zipfile.ZipFile(sink, 'w') as archive:
+        for filename, rows in _tables(user, batch_size):
+            info = zipfile.ZipInfo(filename, date_time)
+            info.compress_type = zipfile.ZIP_DEFLATED
+            with archive.open(info, 'w', force_zip64=True) as entry:
+                for row in rows:
+                    entry.write(json.dumps(row, cls=DjangoJSONEncoder).encode('utf-8') + b'\n')
+                    if sink.size >= FLUSH_SIZE:
+                        yield sink.drain()
+        for name in iter_user_media(user, batch_size):
+            try:
+                source = default_storage.open(name)
+            except FileNotFoundError:
+                continue
+            info = zipfile.ZipInfo(f'media/{name}', date_time)
+            # Images and attachments are compressed already.
+            info.compress_type = zipfile.ZIP_STORED
+            with source, archive.open(info, 'w', force_zip64=True) as entry:
+                for chunk in source.chunks():
+                    entry.write(chunk)
+                    if sink.size >= FLUSH_SIZE:
+                        yield sink.drain()
+    yield sink.drain()
@@ -0,0 +1,366 @@
+"""Asyncio load generator used by ``manage.py load_test``.
+
+Each worker logs in as a seeded user over its own keep-alive connection and
+either runs scripted scenarios or replays GET requests from a request log.
+Only the standard library is used, so the harness runs wherever the
+project does.
+"""
+
+import asyncio
+import json
+import random
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from http.cookies import SimpleCookie
+from urllib.parse import urlencode, urlsplit
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.urls import Resolver404, resolve, reverse
+
+from friendships.models import FriendRequest
+from friendships.services import accept_friend_request, are_friends, send_friend_request
+from messaging.models import DirectConversationParticipant
+from messaging.services import get_or_create_conversation
+from posts.models import Post
+from posts.services import publish_post
+from .perf import percentile
+
+User = get_user_model()
+
+USERNAME_PREFIX = 'loadtest_'
+FAN_PREFIX = 'loadtest_fan_'
+PASSWORD = 'loadtest-pass-123'
+SAFE_METHODS = ('GET', 'HEAD')
+
+
+@dataclass
+class Response:
+    status: int
+    headers: dict
+    body: bytes
+
+
+class HttpClient:
+    """Minimal HTTP/1.1 client with one keep-alive connection and a cookie jar."""
+
+    def __init__(self, base_url: str, timeout: float = 30.0):
+        parts = urlsplit(base_url)
+        self.host = parts.hostname or '127.0.0.1'
+        self.port = parts.port or 80
+        self.netloc = parts.netloc
+        self.timeout = timeout
+        self.cookies = {}
+        self._reader = self._writer = None
+
+    async def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            try:
+                await self._writer.wait_closed()
+            except OSError:
+                pass
+        self._reader = self._writer = None
+
+    async def request(self, method: str, path: str, data=None) -> Response:
+        reused = self._writer is not None
+        try:
+            return await asyncio.wait_for(self._exchange(method, path, data), self.timeout)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            await self.close()
+            if not reused:
+                raise
+            # The server dropped an idle keep-alive connection; retry once on a fresh one.
+            return await asyncio.wait_for(self._exchange(method, path, data), self.timeout)
+
+    async def _exchange(self, method, path, data):
+        if self._writer is None:
+            self._reader, self._writer = await asyncio.open_connection(self.host, self.port)
+        body = urlencode(data).encode() if data is not None else b''
+        headers = {
+            'Host': self.netloc,
+            'User-Agent': 'social-players-loadtest',
+            'Connection': 'keep-alive',
+        }
+        if self.cookies:
+            headers['Cookie'] = '; '.join(f'{name}={value}' for name, value in self.cookies.items())
+        if method not in SAFE_METHODS:
+            headers['X-CSRFToken'] = self.cookies.get('csrftoken', '')
+            headers['Content-Type'] = 'application/x-www-form-urlencoded'
+            headers['Content-Length'] = str(len(body))
+        head = f'{method} {path} HTTP/1.1\r\n' + ''.join(f'{k}: {v}\r\n' for k, v in headers.items()) + '\r\n'
+        self._writer.write(head.encode('latin-1') + body)
+        await self._writer.drain()
+        return await self._read_response(method)
+
+    async def _read_response(self, method) -> Response:
+        status_line = await self._reader.readuntil(b'\r\n')
+        status = int(status_line.split()[1])
+        headers = {}
+        while (line := await self._reader.readuntil(b'\r\n')) != b'\r\n':
+            name, _, value = line.decode('latin-1').partition(':')
+            name, value = name.strip().lower(), value.strip()
+            if name == 'set-cookie':
+                cookie = SimpleCookie()
+                cookie.load(value)
+                for morsel in cookie.values():
+                    self.cookies[morsel.key] = morsel.value
+            headers[name] = value
+        if method == 'HEAD' or status in (204, 304):
+            body = b''
+        elif headers.get('transfer-encoding', '').lower() == 'chunked':
+            chunks = []
+            while size := int((await self._reader.readuntil(b'\r\n')).split(b';')[0], 16):
+                chunks.append(await self._reader.readexactly(size))
+                await self._reader.readexactly(2)
+            await self._reader.readuntil(b'\r\n')
+            body = b''.join(chunks)
+        elif 'content-length' in headers:
+            body = await self._reader.readexactly(int(headers['content-length']))
+        else:
+            body = await self._reader.read()
+            headers['connection'] = 'close'
+        if headers.get('connection', '').lower() == 'close':
+            await self.close()
+        return Response(status, headers, body)
+
+
+@dataclass
+class Recorder:
+    """Collects per-URL-name latencies and outcomes for one run."""
+
+    latencies: dict = field(default_factory=lambda: defaultdict(list))
+    errors: dict = field(default_factory=lambda: defaultdict(int))
+    throttled: dict = field(default_factory=lambda: defaultdict(int))
+    started: float = field(default_factory=time.perf_counter)
+    finished: float | None = None
+
+    def add(self, name: str, elapsed: float, status: int | None):
+        self.latencies[name].append(elapsed)
+        if status is None or status >= 500:
+            self.errors[name] += 1
+        elif status == 429:
+            self.throttled[name] += 1
+
+    def summary(self) -> dict:
+        """Throughput, error rate and latency percentiles (ms) per URL name, plus a ``*`` total."""
+        elapsed = max((self.finished or time.perf_counter()) - self.started, 1e-9)
+        groups = dict(self.latencies)
+        groups['*'] = [value for values in self.latencies.values() for value in values]
+        report = {}
+        for name, values in sorted(groups.items()):
+            ordered = sorted(values)
+            errors = sum(self.errors.values()) if name == '*' else self.errors[name]
+            throttled = sum(self.throttled.values()) if name == '*' else self.throttled[name]
+            report[name] = {
+                'count': len(ordered),
+                'rps': round(len(ordered) / elapsed, 2),
+                'error_rate': round(errors / len(ordered), 4) if ordered else 0.0,
+                'throttled': throttled,
+                'p50_ms': round(percentile(ordered, 50) * 1000, 2),
+                'p95_ms': round(percentile(ordered, 95) * 1000, 2),
+                'p99_ms': round(percentile(ordered, 99) * 1000, 2),
+            }
+        return report
+
+
+def format_report(report: dict, baseline: dict | None = None):
+    """Render a ``Recorder.summary()`` as table lines, with p95 changes against ``baseline`` if given."""
+    header = f'{"url name":<28} {"count":>7} {"rps":>8} {"err%":>6} {"429":>5} {"p50":>8} {"p95":>8} {"p99":>8}'
+    if baseline:
+        header += f' {"p95 vs base":>12}'
+    lines = [header]
+    for name, row in report.items():
+        line = (
+            f'{name:<28} {row["count"]:>7} {row["rps"]:>8.1f} {row["error_rate"] * 100:>6.1f} '
+            f'{row["throttled"]:>5} {row["p50_ms"]:>8.1f} {row["p95_ms"]:>8.1f} {row["p99_ms"]:>8.1f}'
+        )
+        base = (baseline or {}).get(name)
+        if base and base['p95_ms']:
+            line += f' {(row["p95_ms"] - base["p95_ms"]) / base["p95_ms"] * 100:>+11.1f}%'
+        lines.append(line)
+    return lines
+
+
+class Worker:
+    def __init__(self, base_url: str, user: dict, recorder: Recorder, rng: random.Random):
+        self.client = HttpClient(base_url)
+        self.user = user
+        self.recorder = recorder
+        self.rng = rng
+
+    async def call(self, name: str, method: str, path: str, data=None):
+        start = time.perf_counter()
+        try:
+            response = await self.client.request(method, path, data)
+        except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, ValueError):
+            await self.client.close()
+            self.recorder.add(name, time.perf_counter() - start, None)
+            return None
+        self.recorder.add(name, time.perf_counter() - start, response.status)
+        return response
+
+    async def login(self) -> bool:
+        login_url = reverse('accounts:login')
+        await self.call('accounts:login', 'GET', login_url)
+        response = await self.call(
+            'accounts:login',
+            'POST',
+            login_url,
+            {
+                'username': self.user['username'],
+                'password': PASSWORD,
+                'csrfmiddlewaretoken': self.client.cookies.get('csrftoken', ''),
+            },
+        )
+        return response is not None and response.status == 302
+
+    def _form(self, **data):
+        return {'csrfmiddlewaretoken': self.client.cookies.get('csrftoken', ''), **data}
+
+    async def browse(self):
+        await self.call('posts:feed', 'GET', reverse('posts:feed'))
+        friend = self.rng.choice(self.user['friends'])
+        await self.call('profiles:detail', 'GET', reverse('profiles:detail', args=[friend]))
+        await self.call('messaging:list', 'GET', reverse('messaging:list'))
+
+    async def like(self):
+        post_id = self.rng.choice(self.user['post_ids'])
+        await self.call('posts:toggle_like', 'POST', reverse('posts:toggle_like', args=[post_id]), self._form())
+
+    async def comment(self):
+        post_id = self.rng.choice(self.user['post_ids'])
+        await self.call(
+            'posts:add_comment',
+            'POST',
+            reverse('posts:add_comment', args=[post_id]),
+            self._form(content=f'load test comment {self.rng.random():.6f}'),
+        )
+
+    async def dm(self):
+        conversation_id = self.rng.choice(self.user['conversation_ids'])
+        url = reverse('messaging:detail', args=[conversation_id])
+        await self.call('messaging:detail', 'GET', url)
+        await self.call('messaging:detail', 'POST', url, self._form(content='load test message'))
+
+    async def accept(self):
+        await self.call('friendships:incoming', 'GET', reverse('friendships:incoming'))
+        if self.user['pending_request_ids']:
+            pk = self.user['pending_request_ids'].pop()
+            await self.call('friendships:accept', 'POST', reverse('friendships:accept', args=[pk]), self._form())
+
+
+SCENARIOS = ('browse', 'like', 'comment', 'dm', 'accept')
+
+
+def replay_records(lines):
+    """Yield ``(url name, path)`` for replayable GETs in a request log; other records are skipped."""
+    for line in lines:
+        try:
+            record = json.loads(line)
+        except ValueError:
+            continue
+        path = record.get('path')
+        if not path or record.get('method', 'GET') not in SAFE_METHODS:
+            continue
+        name = record.get('view')
+        if not name:
+            try:
+                name = resolve(path.split('?')[0]).view_name
+            except Resolver404:
+                name = '<unresolved>'
+        yield name, path
+
+
+async def run_load(base_url, users, *, scenarios=SCENARIOS, replay=None, concurrency=10, ramp=0.0, duration=30.0, seed=0):
+    """Run ``concurrency`` workers for ``duration`` seconds and return the ``Recorder``.
+
+    Worker ``i`` starts ``i * ramp / concurrency`` seconds in and logs in as
+    ``users[i % len(users)]``. With ``replay`` (an iterator of ``(name,
+    path)``) workers share the stream and stop when it is exhausted;
+    otherwise each runs randomly chosen ``scenarios`` until time is up.
+    """
+    recorder = Recorder()
+    deadline = time.perf_counter() + ramp + duration
+
+    async def work(index):
+        await asyncio.sleep(index * ramp / concurrency)
+        worker = Worker(base_url, users[index % len(users)], recorder, random.Random(seed + index))
+        try:
+            if not await worker.login():
+                return
+            while time.perf_counter() < deadline:
+                if replay is not None:
+                    step = next(replay, None)
+                    if step is None:
+                        return
+                    await worker.call(step[0], 'GET', step[1])
+                else:
+                    await getattr(worker, worker.rng.choice(scenarios))()
+        finally:
+            await worker.client.close()
+
+    await asyncio.gather(*(work(index) for index in range(concurrency)))
+    recorder.finished = time.perf_counter()
+    return recorder
+
+
+@transaction.atomic
+def seed_users(count: int, posts_per_user: int = 5, pending_requests: int = 20):
+    """Create (or top up) ``count`` load-test users in a friendship ring.
+
+    Each gets posts, a conversation with each ring neighbour and pending
+    friend requests from fan accounts to accept. Returns the per-user
+    context the scenarios pick targets from.
+    """
+    users = []
+    for index in range(count):
+        user = User.objects.filter(username=f'{USERNAME_PREFIX}{index}').first()
+        if user is None:
+            user = User.objects.create_user(f'{USERNAME_PREFIX}{index}', password=PASSWORD)
+        users.append(user)
+    fans = []
+    for index in range(pending_requests):
+        fan = User.objects.filter(username=f'{FAN_PREFIX}{index}').first()
+        fans.append(fan or User.objects.create_user(f'{FAN_PREFIX}{index}', password=PASSWORD))
+    # Everything goes through the services, so profile stats, page-cache
+    # versions and the typeahead index match what real traffic would leave.
+    for index, user in enumerate(users):
+        missing = posts_per_user - Post.objects.filter(author=user, is_deleted=False).count()
+        for n in range(max(missing, 0)):
+            publish_post(Post(content=f'Load test post {n} by {user.username}'), user)
+        if count > 1:
+            neighbour = users[(index + 1) % count]
+            if neighbour != user:
+                if not are_friends(user, neighbour):
+                    friend_request = send_friend_request(user, neighbour)
+                    if friend_request.status == FriendRequest.STATUS_PENDING:
+                        accept_friend_request(friend_request)
+                get_or_create_conversation(user, neighbour)
+        for fan in fans:
+            if not FriendRequest.objects.filter(from_user=fan, to_user=user).exists():
+                send_friend_request(fan, user)
+
+    context = []
+    for index, user in enumerate(users):
+        friends = [users[(index - 1) % count].username, users[(index + 1) % count].username]
+        visible_authors = [user.pk] + [u.pk for u in users if u.username in friends]
+        context.append(
+            {
+                'username': user.username,
+                'friends': friends,
+                'post_ids': list(
+                    Post.objects.filter(author__in=visible_authors, is_deleted=False).values_list('pk', flat=True)
+                ),
+                'conversation_ids': list(
+                    DirectConversationParticipant.objects.filter(user=user).values_list('conversation_id', flat=True)
+                ),
+                'pending_request_ids': list(
+                    FriendRequest.objects.filter(to_user=user, status=FriendRequest.STATUS_PENDING).values_list(
+                        'pk', flat=True
+                    )
+                ),
+            }
+        )
+    return context
@@ -0,0 +1,131 @@
+import asyncio
+import json
+import threading
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test import AsyncClient, Client
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from core.loadtest import Recorder, format_report, seed_users
+from posts.models import Post
+
+User = get_user_model()
+
+MODES = ('wsgi', 'asgi')
+
+
+def _plan(users, requests: int):
+    """``requests`` (url name, path, username) triples cycling over users and the feed/inbox reads."""
+    targets = []
+    for user in users:
+        targets.append(('posts:feed', reverse('posts:feed'), user['username']))
+        targets.append(
+            ('posts:topic_posts', reverse('posts:topic_posts', args=[Post.TOPIC_CS2]), user['username'])
+        )
+        targets.append(('messaging:list', reverse('messaging:list'), user['username']))
+        for pk in user['conversation_ids'][:1]:
+            targets.append(('messaging:detail', reverse('messaging:detail', args=[pk]), user['username']))
+    return [targets[index % len(targets)] for index in range(requests)]
+
+
+def _run_wsgi(plan, concurrency: int, recorder: Recorder):
+    """Each thread drives the sync handler stack, as a threaded WSGI server would."""
+    accounts = {user.username: user for user in User.objects.filter(username__in={step[2] for step in plan})}
+
+    def worker(steps):
+        clients = {}
+        try:
+            for name, path, username in steps:
+                client = clients.get(username)
+                if client is None:
+                    client = clients[username] = Client(raise_request_exception=False)
+                    client.force_login(accounts[username])
+                start = time.perf_counter()
+                response = client.get(path)
+                recorder.add(name, time.perf_counter() - start, response.status_code)
+        finally:
+            connections.close_all()
+
+    threads = [threading.Thread(target=worker, args=(plan[index::concurrency],)) for index in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+async def _run_asgi(plan, concurrency: int, recorder: Recorder):
+    """Concurrent tasks on one event loop drive the async handler stack, as an ASGI server would."""
+    accounts = {
+        user.username: user async for user in User.objects.filter(username__in={step[2] for step in plan})
+    }
+
+    async def worker(steps):
+        clients = {}
+        for name, path, username in steps:
+            client = clients.get(username)
+            if client is None:
+                client = clients[username] = AsyncClient(raise_request_exception=False)
+                await client.aforce_login(accounts[username])
+            start = time.perf_counter()
+            response = await client.get(path)
+            recorder.add(name, time.perf_counter() - start, response.status_code)
+
+    await asyncio.gather(*(worker(plan[index::concurrency]) for index in range(concurrency)))
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare latency of the feed and inbox reads through the sync (WSGI) and async (ASGI) handler stacks, '
+        'in-process through the test clients; use load_test against real servers.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=10, help='Seeded users to read as (at least 2).')
+        parser.add_argument('--requests', type=int, default=400, help='Requests per mode.')
+        parser.add_argument('--concurrency', type=int, default=10, help='Threads (WSGI) or tasks (ASGI) per mode.')
+        parser.add_argument('--mode', default=','.join(MODES), help='Comma-separated modes to run: wsgi, asgi.')
+        parser.add_argument('--json', dest='json_path', help='Also write the reports, keyed by mode, to this file.')
+
+    def handle(self, *args, **options):
+        if options['users'] < 2:
+            raise CommandError('--users must be at least 2.')
+        if options['requests'] < 1 or options['concurrency'] < 1:
+            raise CommandError('--requests and --concurrency must be positive.')
+        modes = [mode for mode in options['mode'].split(',') if mode]
+        unknown = set(modes) - set(MODES)
+        if unknown or not modes:
+            raise CommandError(f'Unknown modes: {", ".join(sorted(unknown)) or "(none given)"}.')
+
+        self.stdout.write(f'Seeding {options["users"]} users...')
+        users = seed_users(options['users'])
+        plan = _plan(users, options['requests'])
+        warmup = _plan(users, len(users) * 4)
+        reports = {}
+        # Both test clients send ``Host: testserver``; allow it for this run only.
+        with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver']):
+            for mode in modes:
+                # An unrecorded pass first, so neither mode pays for cold caches and template loading.
+                if mode == 'wsgi':
+                    _run_wsgi(warmup, options['concurrency'], Recorder())
+                    recorder = Recorder()
+                    _run_wsgi(plan, options['concurrency'], recorder)
+                else:
+                    asyncio.run(_run_asgi(warmup, options['concurrency'], Recorder()))
+                    recorder = Recorder()
+                    asyncio.run(_run_asgi(plan, options['concurrency'], recorder))
+                recorder.finished = time.perf_counter()
+                reports[mode] = recorder.summary()
+
+        baseline = reports.get('wsgi') if len(reports) > 1 else None
+        for mode, report in reports.items():
+            self.stdout.write(f'\n{mode}:')
+            for line in format_report(report, baseline if mode != 'wsgi' else None):
+                self.stdout.write(line)
+        if options['json_path']:
+            Path(options['json_path']).write_text(json.dumps(reports, indent=2), encoding='utf-8')
@@ -0,0 +1,27 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from core.export import iter_user_export
+
+
+class Command(BaseCommand):
+    help = "Write a user's posts, comments, likes, friends, messages and media to a zip archive."
+
+    def add_arguments(self, parser):
+        parser.add_argument('username')
+        parser.add_argument('--output', help='Archive path (default: <username>-export.zip).')
+        parser.add_argument('--batch-size', type=int, default=500, help='Rows read per query.')
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be positive.')
+        user = get_user_model().objects.filter(username=options['username']).first()
+        if user is None:
+            raise CommandError(f'User {options["username"]!r} does not exist.')
+        output = options['output'] or f'{user.username}-export.zip'
+        size = 0
+        with open(output, 'wb') as fh:
+            for chunk in iter_user_export(user, options['batch_size']):
+                fh.write(chunk)
+                size += len(chunk)
+        self.stdout.write(f'Wrote {output} ({size} bytes).')
@@ -0,0 +1,113 @@
+import os
+import time
+from itertools import islice
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.media import referenced_media
+from core.models import MediaBlob
+
+QUARANTINE_DIR = '.quarantine'
+
+
+def iter_media_files(root: Path):
+    """Yield ``(relative name, stat)`` for every file under ``root``, skipping dot-directories."""
+    stack = [root]
+    while stack:
+        directory = stack.pop()
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    if not entry.name.startswith('.'):
+                        stack.append(entry.path)
+                elif entry.is_file(follow_symlinks=False):
+                    yield Path(entry.path).relative_to(root).as_posix(), entry.stat(follow_symlinks=False)
+
+
+def batched(iterable, size):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+class Command(BaseCommand):
+    help = 'Delete or quarantine media files that no post, comment, message or profile references.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Only report what would be removed.')
+        parser.add_argument(
+            '--quarantine',
+            action='store_true',
+            help=f'Move orphans to MEDIA_ROOT/{QUARANTINE_DIR}/<timestamp>/ instead of deleting them.',
+        )
+        parser.add_argument(
+            '--grace-hours',
+            type=float,
+            default=24.0,
+            help='Leave files modified more recently than this alone (uploads whose row is not saved yet).',
+        )
+        parser.add_argument('--batch-size', type=int, default=500, help='Files checked against the database per query.')
+        parser.add_argument(
+            '--ignore-soft-deleted',
+            action='store_true',
+            help='Do not count references from soft-deleted posts and comments.',
+        )
+
+    def handle(self, *args, **options):
+        root = Path(settings.MEDIA_ROOT)
+        if not root.is_dir():
+            raise CommandError(f'MEDIA_ROOT {root} does not exist.')
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be positive.')
+        dry_run = options['dry_run']
+        cutoff = time.time() - options['grace_hours'] * 3600
+        quarantine_root = root / QUARANTINE_DIR / time.strftime('%Y%m%d-%H%M%S')
+
+        scanned = recent = orphaned = orphaned_bytes = removed_count = 0
+        for batch in batched(iter_media_files(root), options['batch_size']):
+            scanned += len(batch)
+            candidates = [(name, stat) for name, stat in batch if stat.st_mtime < cutoff]
+            recent += len(batch) - len(candidates)
+            if not candidates:
+                continue
+            referenced = referenced_media([name for name, _ in candidates], live_only=options['ignore_soft_deleted'])
+            removed = []
+            for name, stat in candidates:
+                if name in referenced:
+                    continue
+                orphaned += 1
+                orphaned_bytes += stat.st_size
+                if options['verbosity'] >= 2:
+                    self.stdout.write(f'  {name} ({stat.st_size} bytes)')
+                if dry_run or not self._remove(root / name, quarantine_root / name if options['quarantine'] else None, cutoff):
+                    continue
+                removed.append(name)
+            removed_count += len(removed)
+            MediaBlob.objects.filter(name__in=removed, ref_count=0).delete()
+
+        self.stdout.write(
+            f'Scanned {scanned} files; skipped {recent} newer than the grace period. '
+            f'Found {orphaned} unreferenced files ({orphaned_bytes / 1024 / 1024:.1f} MiB).'
+        )
+        if dry_run:
+            self.stdout.write('Dry run: nothing was changed.')
+        else:
+            action = 'Quarantined' if options['quarantine'] else 'Deleted'
+            self.stdout.write(f'{action} {removed_count} files.')
+
+    @staticmethod
+    def _remove(path: Path, quarantine_path, cutoff) -> bool:
+        try:
+            # A blob reused by an upload since the scan has a fresh mtime; keep it.
+            if path.stat().st_mtime >= cutoff:
+                return False
+            if quarantine_path is None:
+                path.unlink()
+            else:
+                quarantine_path.parent.mkdir(parents=True, exist_ok=True)
+                os.replace(path, quarantine_path)
+        except FileNotFoundError:
+            return False
+        return True
@@ -0,0 +1,102 @@
+import asyncio
+import json
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.loadtest import SCENARIOS, format_report, replay_records, run_load, seed_users
+
+
+def _wait_for_port(host: str, port: int, timeout: float):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection((host, port), timeout=0.5):
+                return True
+        except OSError:
+            time.sleep(0.2)
+    return False
+
+
+class Command(BaseCommand):
+    help = 'Drive a local server with scripted scenarios or a replayed request log and report latency per URL name.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--base-url', default='http://127.0.0.1:8000', help='Server to load.')
+        parser.add_argument(
+            '--serve', action='store_true', help='Start `manage.py runserver --noreload` on --base-url for the run.'
+        )
+        parser.add_argument(
+            '--scenario',
+            default=','.join(SCENARIOS),
+            help=f'Comma-separated scenarios picked at random per step: {", ".join(SCENARIOS)}.',
+        )
+        parser.add_argument('--replay', help='Replay the GET requests of a request log (PERF_LOG_PATH format) instead.')
+        parser.add_argument('--users', type=int, default=10, help='Seeded users to log in as (at least 2).')
+        parser.add_argument('--concurrency', type=int, default=10, help='Concurrent workers.')
+        parser.add_argument('--ramp', type=float, default=0.0, help='Seconds over which workers are started.')
+        parser.add_argument('--duration', type=float, default=30.0, help='Seconds to run after the ramp.')
+        parser.add_argument('--seed', type=int, default=0, help='Random seed for scenario choices.')
+        parser.add_argument('--json', dest='json_path', help='Also write the report to this file.')
+        parser.add_argument('--compare', help='Report written by an earlier run to show p95 changes against.')
+
+    def handle(self, *args, **options):
+        if options['users'] < 2:
+            raise CommandError('--users must be at least 2.')
+        if options['concurrency'] < 1 or options['duration'] <= 0:
+            raise CommandError('--concurrency and --duration must be positive.')
+        scenarios = [name for name in options['scenario'].split(',') if name]
+        unknown = set(scenarios) - set(SCENARIOS)
+        if unknown or not scenarios:
+            raise CommandError(f'Unknown scenarios: {", ".join(sorted(unknown)) or "(none given)"}.')
+        baseline = None
+        if options['compare']:
+            baseline = json.loads(Path(options['compare']).read_text(encoding='utf-8'))
+
+        self.stdout.write(f'Seeding {options["users"]} users...')
+        users = seed_users(options['users'])
+        server = self._start_server(options['base_url']) if options['serve'] else None
+        replay_file = open(options['replay'], encoding='utf-8') if options['replay'] else None
+        try:
+            recorder = asyncio.run(
+                run_load(
+                    options['base_url'],
+                    users,
+                    scenarios=scenarios,
+                    replay=replay_records(replay_file) if replay_file else None,
+                    concurrency=options['concurrency'],
+                    ramp=options['ramp'],
+                    duration=options['duration'],
+                    seed=options['seed'],
+                )
+            )
+        finally:
+            if replay_file:
+                replay_file.close()
+            if server is not None:
+                server.terminate()
+                server.wait(timeout=10)
+
+        report = recorder.summary()
+        for line in format_report(report, baseline):
+            self.stdout.write(line)
+        if options['json_path']:
+            Path(options['json_path']).write_text(json.dumps(report, indent=2), encoding='utf-8')
+
+    def _start_server(self, base_url):
+        host, _, port = base_url.split('://', 1)[-1].rstrip('/').partition(':')
+        port = int(port or 80)
+        server = subprocess.Popen(
+            [sys.executable, str(Path(settings.BASE_DIR) / 'manage.py'), 'runserver', '--noreload', f'{host}:{port}'],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        if not _wait_for_port(host, port, timeout=30):
+            server.terminate()
+            raise CommandError(f'Server did not start on {host}:{port}.')
+        return server
@@ -0,0 +1,69 @@
+import json
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.perf import flush_request_logs, percentile, rotated_log_paths
+
+
+class Command(BaseCommand):
+    help = 'Aggregate p50/p95/p99 request latency per view from the JSONL request log.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', help='Log file to read (defaults to PERF_LOG_PATH and its rotated backups).')
+        parser.add_argument('--min-count', type=int, default=1, help='Hide views with fewer requests than this.')
+
+    def handle(self, *args, **options):
+        flush_request_logs()
+        path = options['path'] or getattr(settings, 'PERF_LOG_PATH', None)
+        if not path:
+            raise CommandError('No log path given and PERF_LOG_PATH is not set.')
+        paths = rotated_log_paths(path, getattr(settings, 'PERF_LOG_BACKUP_COUNT', 5))
+        if not paths:
+            raise CommandError(f'Request log {path} does not exist.')
+
+        durations = defaultdict(list)
+        db_counts = defaultdict(int)
+        db_times = defaultdict(float)
+        for log_path in paths:
+            with open(log_path, encoding='utf-8') as fh:
+                for line in fh:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue
+                    view = record.get('view') or '<unresolved>'
+                    durations[view].append(record.get('total_ms', 0.0))
+                    db_counts[view] += record.get('db_count', 0)
+                    db_times[view] += record.get('db_ms', 0.0)
+
+        rows = []
+        for view, values in durations.items():
+            if len(values) < options['min_count']:
+                continue
+            values.sort()
+            count = len(values)
+            rows.append(
+                (
+                    view,
+                    count,
+                    percentile(values, 50),
+                    percentile(values, 95),
+                    percentile(values, 99),
+                    db_counts[view] / count,
+                    db_times[view] / count,
+                )
+            )
+        rows.sort(key=lambda row: row[3], reverse=True)
+
+        header = f'{"view":<36} {"count":>7} {"p50 ms":>9} {"p95 ms":>9} {"p99 ms":>9} {"avg q":>7} {"avg db ms":>10}'
+        self.stdout.write(header)
+        self.stdout.write('-' * len(header))
+        for view, count, p50, p95, p99, avg_queries, avg_db in rows:
+            self.stdout.write(
+                f'{view:<36} {count:>7} {p50:>9.1f} {p95:>9.1f} {p99:>9.1f} {avg_queries:>7.1f} {avg_db:>10.1f}'
+            )
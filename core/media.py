@@ -0,0 +1,100 @@
+import mimetypes
+import posixpath
+from pathlib import Path
+from urllib.parse import quote
+
+from django.conf import settings
+from django.db.models import F
+from django.http import FileResponse, Http404, HttpResponse
+from django.utils.cache import patch_cache_control
+
+from messaging.models import ArchivedMessageImage, DirectMessage
+from posts.models import ArchivedComment, ArchivedPost, Comment, Post
+from profiles.models import Profile
+from .models import MediaBlob
+
+INLINE_CONTENT_TYPES = ('image/',)
+MEDIA_REFERENCES = (
+    (Post, 'image'),
+    (Comment, 'attachment'),
+    (DirectMessage, 'image'),
+    (Profile, 'avatar'),
+    (ArchivedMessageImage, 'name'),
+    (ArchivedPost, 'image'),
+    (ArchivedComment, 'attachment'),
+)
+# Rows matching these filters are the ones still shown somewhere.
+LIVE_REFERENCE_FILTERS = {
+    Post: {'is_deleted': False},
+    Comment: {'is_deleted': False, 'post__is_deleted': False},
+}
+# Archived posts and comments were all soft-deleted, so none of them is live.
+SOFT_DELETED_REFERENCES = frozenset({ArchivedPost, ArchivedComment})
+
+
+def clean_media_name(path: str):
+    name = posixpath.normpath(path).lstrip('/')
+    if name in ('', '.') or name.startswith('..'):
+        return None
+    return name
+
+
+def can_view_media(user, name: str) -> bool:
+    """A file is visible if any row referencing it is visible to ``user``."""
+    if Profile.objects.filter(avatar=name).exists():
+        return True
+    if Post.objects.filter(image=name, is_deleted=False).exists():
+        return True
+    if Comment.objects.filter(attachment=name, is_deleted=False, post__is_deleted=False).exists():
+        return True
+    if user.is_authenticated:
+        if DirectMessage.objects.filter(image=name, conversation__participants__user=user).exists():
+            return True
+        return ArchivedMessageImage.objects.filter(
+            name=name, segment__conversation__participants__user=user
+        ).exists()
+    return False
+
+
+def media_response(request, name: str):
+    """Hand the transfer to nginx when it announced X-Accel-Redirect, else stream the file."""
+    content_type = mimetypes.guess_type(name)[0] or 'application/octet-stream'
+    if request.headers.get('X-Sendfile-Type') == 'X-Accel-Redirect':
+        response = HttpResponse(content_type=content_type)
+        response['X-Accel-Redirect'] = settings.MEDIA_X_ACCEL_PREFIX + quote(name)
+    else:
+        path = Path(settings.MEDIA_ROOT) / name
+        if not path.is_file():
+            raise Http404("File not found")
+        response = FileResponse(open(path, 'rb'), content_type=content_type)
+    if not content_type.startswith(INLINE_CONTENT_TYPES):
+        response['Content-Disposition'] = f'attachment; filename="{posixpath.basename(name)}"'
+    patch_cache_control(response, private=True, max_age=settings.MEDIA_CACHE_MAX_AGE)
+    return response
+
+
+def retain_media(name: str):
+    if not name:
+        return
+    blob, created = MediaBlob.objects.get_or_create(name=name, defaults={'ref_count': 1})
+    if not created:
+        MediaBlob.objects.filter(pk=blob.pk).update(ref_count=F('ref_count') + 1)
+
+
+def release_media(name: str):
+    """Drop one reference; files left at zero are reclaimed by garbage collection, not here."""
+    if name:
+        MediaBlob.objects.filter(name=name, ref_count__gt=0).update(ref_count=F('ref_count') - 1)
+
+
+def referenced_media(names, live_only: bool = False) -> set:
+    """Subset of ``names`` that some media column points at (one indexed IN query per column)."""
+    found = set()
+    for model, field in MEDIA_REFERENCES:
+        if live_only and model in SOFT_DELETED_REFERENCES:
+            continue
+        queryset = model.objects.filter(**{f'{field}__in': names})
+        if live_only:
+            queryset = queryset.filter(**LIVE_REFERENCE_FILTERS.get(model, {}))
+        found.update(queryset.values_list(field, flat=True).distinct())
+    return found
@@ -0,0 +1,311 @@
+import atexit
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.db import DatabaseError, connection
+
+try:
+    import fcntl
+except ImportError:  # Windows: dead snapshots are folded without a cross-process lock.
+    fcntl = None
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+METRIC_DEFINITIONS = {
+    'http_request_duration_seconds': ('histogram', 'Request latency by URL name.'),
+    'http_requests_in_progress': ('gauge', 'Requests currently being handled.'),
+    'http_responses_total': ('counter', 'Responses by URL name and status code.'),
+    'db_queries_total': ('counter', 'SQL queries executed, by URL name.'),
+    'db_query_duration_seconds_total': ('counter', 'Time spent in SQL queries, by URL name.'),
+    'db_up': ('gauge', 'Whether the default database answered a trivial query at scrape time.'),
+    'cache_requests_total': ('counter', 'Cache lookups by cache name and result.'),
+    'cache_hit_ratio': ('gauge', 'Share of cache lookups that were hits.'),
+    'messages_sent_total': ('counter', 'Direct messages sent.'),
+    'likes_toggled_total': ('counter', 'Post likes toggled, by action.'),
+    'friend_requests_total': ('counter', 'Friend requests processed, by action.'),
+    'rate_limited_total': ('counter', 'Writes rejected with 429 by the rate limiter, by URL name.'),
+    'perf_log_queue_depth': ('gauge', 'Request log records buffered and not yet written.'),
+}
+
+
+def _key(name, labels):
+    return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _pid_alive(pid):
+    if pid == os.getpid():
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        return True
+    return True
+
+
+class MetricsStore:
+    """Per-process metric values, periodically snapshotted to ``METRICS_DIR``.
+
+    Every process writes its own ``metrics-<pid>-<start>.json``; the
+    ``/metrics`` view sums counters and histograms across all files, so
+    totals survive worker restarts, and sums gauges over live processes
+    only. The start time keeps a reused pid from overwriting a dead
+    worker's totals.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self._pid = os.getpid()
+        self._started = int(time.time() * 1000)
+        self._counters = {}
+        self._gauges = {}
+        self._histograms = {}
+        self._last_flush = time.monotonic()
+
+    def _check_fork(self):
+        if os.getpid() != self._pid:
+            self._reset()
+
+    def inc(self, name, value=1, **labels):
+        with self._lock:
+            self._check_fork()
+            key = _key(name, labels)
+            self._counters[key] = self._counters.get(key, 0) + value
+        self.maybe_flush()
+
+    def inc_gauge(self, name, value=1, **labels):
+        with self._lock:
+            self._check_fork()
+            key = _key(name, labels)
+            self._gauges[key] = self._gauges.get(key, 0) + value
+
+    def set_gauge(self, name, value, **labels):
+        with self._lock:
+            self._check_fork()
+            self._gauges[_key(name, labels)] = value
+
+    def observe(self, name, value, **labels):
+        with self._lock:
+            self._check_fork()
+            key = _key(name, labels)
+            series = self._histograms.get(key)
+            if series is None:
+                series = self._histograms[key] = {'buckets': [0] * len(DEFAULT_BUCKETS), 'sum': 0.0, 'count': 0}
+            for i, bound in enumerate(DEFAULT_BUCKETS):
+                if value <= bound:
+                    series['buckets'][i] += 1
+                    break
+            series['sum'] += value
+            series['count'] += 1
+        self.maybe_flush()
+
+    def maybe_flush(self):
+        if time.monotonic() - self._last_flush >= getattr(settings, 'METRICS_FLUSH_INTERVAL', 5.0):
+            self.flush()
+
+    def flush(self):
+        from .perf import pending_request_log_records
+
+        self.set_gauge('perf_log_queue_depth', pending_request_log_records())
+        with self._lock:
+            self._check_fork()
+            self._last_flush = time.monotonic()
+            payload = {
+                'pid': self._pid,
+                'started': self._started,
+                'counters': [[name, dict(labels), value] for (name, labels), value in self._counters.items()],
+                'gauges': [[name, dict(labels), value] for (name, labels), value in self._gauges.items()],
+                'histograms': [[name, dict(labels), series] for (name, labels), series in self._histograms.items()],
+            }
+        metrics_dir = get_metrics_dir()
+        metrics_dir.mkdir(parents=True, exist_ok=True)
+        path = metrics_dir / f'metrics-{payload["pid"]}-{payload["started"]}.json'
+        tmp_path = path.with_suffix('.tmp')
+        with self._flush_lock:
+            tmp_path.write_text(json.dumps(payload), encoding='utf-8')
+            os.replace(tmp_path, path)
+
+
+metrics = MetricsStore()
+atexit.register(metrics.flush)
+
+
+def record_cache_lookup(cache_name: str, hit: bool):
+    metrics.inc('cache_requests_total', cache=cache_name, result='hit' if hit else 'miss')
+
+
+def record_request(request, response, request_metrics):
+    view = url_name_label(request)
+    metrics.inc('http_responses_total', view=view, status=response.status_code)
+    metrics.inc('db_queries_total', request_metrics.db_count, view=view)
+    metrics.inc('db_query_duration_seconds_total', request_metrics.db_time, view=view)
+    metrics.observe('http_request_duration_seconds', request_metrics.total_time, view=view)
+
+
+def get_metrics_dir() -> Path:
+    return Path(getattr(settings, 'METRICS_DIR', settings.BASE_DIR / 'logs' / 'metrics'))
+
+
+def url_name_label(request):
+    match = getattr(request, 'resolver_match', None)
+    if match is None or match.namespace not in getattr(settings, 'METRICS_URL_NAMESPACES', ()):
+        return 'other'
+    return match.view_name
+
+
+def _database_up():
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+    except DatabaseError:
+        return 0
+    return 1
+
+
+ARCHIVE_NAME = 'metrics-archived.json'
+
+
+def _read_snapshot(path):
+    try:
+        return json.loads(path.read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        return None
+
+
+def _add_totals(counters, histograms, payload):
+    for name, labels, value in payload['counters']:
+        key = _key(name, labels)
+        counters[key] = counters.get(key, 0) + value
+    for name, labels, series in payload['histograms']:
+        key = _key(name, labels)
+        total = histograms.setdefault(key, {'buckets': [0] * len(DEFAULT_BUCKETS), 'sum': 0.0, 'count': 0})
+        total['buckets'] = [a + b for a, b in zip(total['buckets'], series['buckets'])]
+        total['sum'] += series['sum']
+        total['count'] += series['count']
+
+
+def _fold_dead_snapshots(metrics_dir, dead_paths):
+    """Add the totals of dead processes' snapshots to ``metrics-archived.json`` and delete them."""
+    with open(metrics_dir / 'metrics-archived.lock', 'w') as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        archive_path = metrics_dir / ARCHIVE_NAME
+        counters, histograms = {}, {}
+        archived = _read_snapshot(archive_path)
+        if archived is not None:
+            _add_totals(counters, histograms, archived)
+        # Another scrape may have folded some of them while we waited for the lock.
+        folded = [path for path in dead_paths if path.exists()]
+        for path in folded:
+            payload = _read_snapshot(path)
+            if payload is not None:
+                _add_totals(counters, histograms, payload)
+        if not folded:
+            return
+        tmp_path = archive_path.with_suffix('.tmp')
+        tmp_path.write_text(
+            json.dumps(
+                {
+                    'pid': None,
+                    'counters': [[name, dict(labels), value] for (name, labels), value in counters.items()],
+                    'gauges': [],
+                    'histograms': [[name, dict(labels), series] for (name, labels), series in histograms.items()],
+                }
+            ),
+            encoding='utf-8',
+        )
+        os.replace(tmp_path, archive_path)
+        for path in folded:
+            path.unlink(missing_ok=True)
+
+
+def collect():
+    """Aggregate every process snapshot into {(name, labels): value} maps.
+
+    Snapshots of dead processes are folded into ``metrics-archived.json``
+    first, so the directory and each scrape stay bounded by the number of
+    live workers.
+    """
+    metrics_dir = get_metrics_dir()
+    snapshots = {}
+    if metrics_dir.exists():
+        for path in metrics_dir.glob('metrics-*.json'):
+            if path.name != ARCHIVE_NAME and (payload := _read_snapshot(path)) is not None:
+                snapshots[path] = payload
+    newest_start = {}
+    for payload in snapshots.values():
+        newest_start[payload['pid']] = max(newest_start.get(payload['pid'], 0), payload.get('started', 0))
+    # Only the newest snapshot of a pid can belong to a running process.
+    dead = [
+        path
+        for path, payload in snapshots.items()
+        if not _pid_alive(payload['pid']) or payload.get('started', 0) < newest_start[payload['pid']]
+    ]
+    if dead:
+        _fold_dead_snapshots(metrics_dir, dead)
+
+    counters, gauges, histograms = {}, {}, {}
+    archived = _read_snapshot(metrics_dir / ARCHIVE_NAME)
+    if archived is not None:
+        _add_totals(counters, histograms, archived)
+    for path, payload in snapshots.items():
+        if path in dead:
+            continue
+        _add_totals(counters, histograms, payload)
+        for name, labels, value in payload['gauges']:
+            key = _key(name, labels)
+            gauges[key] = gauges.get(key, 0) + value
+
+    lookups = {}
+    for (name, labels), value in counters.items():
+        if name == 'cache_requests_total':
+            label_map = dict(labels)
+            hits, total = lookups.get(label_map['cache'], (0, 0))
+            lookups[label_map['cache']] = (hits + (value if label_map['result'] == 'hit' else 0), total + value)
+    for cache_name, (hits, total) in lookups.items():
+        gauges[_key('cache_hit_ratio', {'cache': cache_name})] = hits / total if total else 0.0
+    gauges[_key('db_up', {})] = _database_up()
+    return counters, gauges, histograms
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{k}="{_escape(v)}"' for k, v in pairs) + '}'
+
+
+def render_exposition(counters, gauges, histograms) -> str:
+    lines = []
+    for name, (kind, help_text) in METRIC_DEFINITIONS.items():
+        source = {'counter': counters, 'gauge': gauges, 'histogram': histograms}[kind]
+        series = sorted(
+            ((labels, value) for (metric, labels), value in source.items() if metric == name), key=lambda item: item[0]
+        )
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} {kind}')
+        for labels, value in series:
+            if kind != 'histogram':
+                lines.append(f'{name}{_format_labels(labels)} {value}')
+                continue
+            cumulative = 0
+            for bound, count in zip(DEFAULT_BUCKETS, value['buckets']):
+                cumulative += count
+                lines.append(f'{name}_bucket{_format_labels(labels, [("le", bound)])} {cumulative}')
+            lines.append(f'{name}_bucket{_format_labels(labels, [("le", "+Inf")])} {value["count"]}')
+            lines.append(f'{name}_sum{_format_labels(labels)} {value["sum"]}')
+            lines.append(f'{name}_count{_format_labels(labels)} {value["count"]}')
+    return '\n'.join(lines) + '\n'
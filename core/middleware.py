@@ -0,0 +1,214 @@
+import threading
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.http import HttpResponse
+
+from .metrics import metrics as app_metrics, record_request
+from .nplusone import detect_nplusone
+from .perf import RequestMetrics, get_request_log, observe_queries
+from .presence import presence
+from .profiling import RequestProfile
+from .ratelimit import consume, parse_rate
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS', 'TRACE')
+
+
+class _HybridMiddleware:
+    """Runs ``__call__`` under WSGI and ``__acall__`` under ASGI, so the stack never falls back to threads.
+
+    Query observers and the other ContextVars set around the inner call
+    hold in both paths: ``sync_to_async`` runs the async views' ORM calls
+    in a copy of the request's context (see ``core.perf.observe_queries``).
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+
+class RequestPerfMiddleware(_HybridMiddleware):
+    """Measures wall, SQL and template time per request.
+
+    Emits a ``Server-Timing`` header, appends one JSON record per request
+    to the batched request log (``PERF_LOG_PATH``) and feeds the
+    Prometheus metrics served at ``/metrics``.
+    """
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        metrics = RequestMetrics()
+        token = metrics.activate()
+        app_metrics.inc_gauge('http_requests_in_progress')
+        try:
+            with observe_queries(metrics.query_wrapper):
+                response = self.get_response(request)
+        finally:
+            metrics.deactivate(token)
+            app_metrics.inc_gauge('http_requests_in_progress', -1)
+        return self._finish(request, response, metrics)
+
+    async def __acall__(self, request):
+        metrics = RequestMetrics()
+        token = metrics.activate()
+        app_metrics.inc_gauge('http_requests_in_progress')
+        try:
+            with observe_queries(metrics.query_wrapper):
+                response = await self.get_response(request)
+        finally:
+            metrics.deactivate(token)
+            app_metrics.inc_gauge('http_requests_in_progress', -1)
+        # Metrics snapshots and the request log are batched, so this stays on the event loop.
+        return self._finish(request, response, metrics)
+
+    @staticmethod
+    def _finish(request, response, metrics):
+        metrics.finish()
+        record_request(request, response, metrics)
+        if getattr(settings, 'PERF_SERVER_TIMING', True):
+            response['Server-Timing'] = metrics.server_timing()
+        request_log = get_request_log()
+        if request_log is not None:
+            request_log.write(metrics.as_record(request, response))
+        return response
+
+
+class RequestProfilerMiddleware(_HybridMiddleware):
+    """Profiles a single request on demand for staff users.
+
+    Triggered by ``?_profile=1`` or an ``X-Profile: 1`` header; the stored
+    profile id is returned in the ``X-Profile-Id`` response header. Only one
+    request is profiled at a time per process; concurrent requests run
+    unprofiled. Under ASGI cProfile and the sampler watch the event loop
+    thread, so ORM work handed to ``sync_to_async`` shows up in the recorded
+    queries but not in the call stacks.
+    """
+
+    _lock = threading.Lock()
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        wanted = self._wants_profile(request) and request.user.is_staff
+        if not wanted or not self._lock.acquire(blocking=False):
+            return self.get_response(request)
+        try:
+            profile = RequestProfile(request)
+            profile.start()
+            try:
+                with observe_queries(profile.query_wrapper):
+                    response = self.get_response(request)
+            finally:
+                profile.stop()
+            profile.save(response)
+        finally:
+            self._lock.release()
+        response['X-Profile-Id'] = profile.id
+        return response
+
+    async def __acall__(self, request):
+        wanted = self._wants_profile(request) and (await request.auser()).is_staff
+        if not wanted or not self._lock.acquire(blocking=False):
+            return await self.get_response(request)
+        try:
+            profile = RequestProfile(request)
+            profile.start()
+            try:
+                with observe_queries(profile.query_wrapper):
+                    response = await self.get_response(request)
+            finally:
+                profile.stop()
+            await sync_to_async(profile.save)(response)
+        finally:
+            self._lock.release()
+        response['X-Profile-Id'] = profile.id
+        return response
+
+    @staticmethod
+    def _wants_profile(request):
+        if not getattr(settings, 'PROFILER_ENABLED', True):
+            return False
+        return request.GET.get('_profile') == '1' or request.headers.get('X-Profile') == '1'
+
+
+class NPlusOneMiddleware(_HybridMiddleware):
+    """Logs (or raises, with ``NPLUSONE_RAISE``) repeated identical-shape queries per request.
+
+    Intended for development and tests; enabled by ``NPLUSONE_ENABLED``.
+    """
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        if not getattr(settings, 'NPLUSONE_ENABLED', False):
+            return self.get_response(request)
+        with detect_nplusone(f'{request.method} {request.path}'):
+            return self.get_response(request)
+
+    async def __acall__(self, request):
+        if not getattr(settings, 'NPLUSONE_ENABLED', False):
+            return await self.get_response(request)
+        with detect_nplusone(f'{request.method} {request.path}'):
+            return await self.get_response(request)
+
+
+class RateLimitMiddleware(_HybridMiddleware):
+    """Throttles writes with per-user token buckets configured by URL name in ``RATE_LIMITS``.
+
+    Only unsafe methods are counted; anonymous clients are keyed by IP.
+    Requests over the limit get ``429 Too Many Requests`` with
+    ``Retry-After`` before the view runs. Under ASGI Django runs the sync
+    ``process_view`` through ``sync_to_async``.
+    """
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        return self.get_response(request)
+
+    async def __acall__(self, request):
+        return await self.get_response(request)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if request.method in SAFE_METHODS:
+            return None
+        view_name = request.resolver_match.view_name
+        rate = getattr(settings, 'RATE_LIMITS', {}).get(view_name)
+        if rate is None:
+            return None
+        if request.user.is_authenticated:
+            client = f'user:{request.user.pk}'
+        else:
+            client = f'ip:{request.META.get("REMOTE_ADDR", "")}'
+        allowed, retry_after = consume(f'{view_name}:{client}', parse_rate(rate))
+        if allowed:
+            return None
+        app_metrics.inc('rate_limited_total', view=view_name)
+        response = HttpResponse('Too many requests, slow down.', status=429, content_type='text/plain')
+        response['Retry-After'] = str(retry_after)
+        return response
+
+
+class PresenceMiddleware(_HybridMiddleware):
+    """Marks the signed-in user as online; see ``core.presence.PresenceTracker`` for write coalescing."""
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        response = self.get_response(request)
+        if request.user.is_authenticated:
+            presence.touch(request.user.pk)
+        return response
+
+    async def __acall__(self, request):
+        response = await self.get_response(request)
+        user = await request.auser()
+        if user.is_authenticated:
+            await sync_to_async(presence.touch)(user.pk)
+        return response
@@ -0,0 +1,36 @@
+from django.db import migrations
+from django.db.models import Count
+
+MEDIA_COLUMNS = (
+    ('posts', 'Post', 'image'),
+    ('posts', 'Comment', 'attachment'),
+    ('messaging', 'DirectMessage', 'image'),
+    ('profiles', 'Profile', 'avatar'),
+)
+
+
+def backfill_media_blobs(apps, schema_editor):
+    MediaBlob = apps.get_model('core', 'MediaBlob')
+    counts = {}
+    for app_label, model_name, field in MEDIA_COLUMNS:
+        model = apps.get_model(app_label, model_name)
+        rows = model.objects.exclude(**{field: ''}).exclude(**{f'{field}__isnull': True})
+        for row in rows.values(field).annotate(refs=Count('pk')).iterator():
+            counts[row[field]] = counts.get(row[field], 0) + row['refs']
+    MediaBlob.objects.bulk_create(
+        [MediaBlob(name=name, ref_count=refs) for name, refs in counts.items()], batch_size=500
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_initial'),
+        ('messaging', '0003_index_media_paths'),
+        ('posts', '0005_index_media_paths'),
+        ('profiles', '0003_index_profile_updated_at'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_media_blobs, migrations.RunPython.noop),
+    ]
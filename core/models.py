@@ -1,3 +1,18 @@
 from django.db import models
+from django.utils import timezone
 
-# Create your models here.
+
+class MediaBlob(models.Model):
+    """Reference count of rows pointing at one stored media file.
+
+    Maintained by ``core.signals`` for every column in
+    ``core.media.MEDIA_REFERENCES``; soft-deleted rows still hold their
+    reference until they are removed.
+    """
+
+    name = models.CharField(max_length=255, unique=True)
+    ref_count = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self) -> str:
+        return f'{self.name} ({self.ref_count})'
@@ -0,0 +1,111 @@
+import logging
+import re
+import sys
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from pathlib import Path
+
+from django.conf import settings
+
+from .perf import observe_queries
+
+logger = logging.getLogger(__name__)
+
+_active_detector = ContextVar('nplusone_detector', default=None)
+_IN_LIST_RE = re.compile(r'IN \((?:%s, )*%s\)')
+_INSTRUMENTATION_FILES = {
+    str(Path(__file__).resolve().with_name(name)) for name in ('nplusone.py', 'perf.py', 'profiling.py')
+}
+
+
+class NPlusOneError(Exception):
+    pass
+
+
+@dataclass
+class Offender:
+    shape: str
+    call_site: str
+    count: int
+
+    def __str__(self):
+        return f'{self.count}x at {self.call_site}: {self.shape}'
+
+
+def normalize_sql(sql: str) -> str:
+    return _IN_LIST_RE.sub('IN (...)', sql)
+
+
+def _call_site():
+    """Innermost project frame plus the template node being rendered, if any."""
+    base_dir = str(settings.BASE_DIR)
+    code_site = None
+    template_site = None
+    frame = sys._getframe(2)
+    while frame is not None and (code_site is None or template_site is None):
+        filename = frame.f_code.co_filename
+        if template_site is None and frame.f_code.co_name == 'render_annotated':
+            node = frame.f_locals.get('self')
+            origin = getattr(node, 'origin', None)
+            token = getattr(node, 'token', None)
+            if origin is not None and token is not None:
+                template_site = f'{origin.template_name}:{token.lineno}'
+        if (
+            code_site is None
+            and filename.startswith(base_dir)
+            and filename not in _INSTRUMENTATION_FILES
+            and 'site-packages' not in filename
+        ):
+            code_site = f'{Path(filename).relative_to(base_dir)}:{frame.f_lineno} in {frame.f_code.co_name}'
+        frame = frame.f_back
+    return ' > '.join(site for site in (code_site, template_site) if site) or '<unknown>'
+
+
+class NPlusOneDetector:
+    """Groups SELECT queries by normalized SQL and call site within one scope.
+
+    Only the innermost active detector records a query, so a per-request
+    detector nested in a per-test detector does not double count.
+    """
+
+    def __init__(self, threshold: int):
+        self.threshold = threshold
+        self.counts = defaultdict(int)
+
+    def __call__(self, execute, sql, params, many, context):
+        if _active_detector.get() is self and not many and sql.lstrip()[:6].upper() == 'SELECT':
+            self.counts[(normalize_sql(sql), _call_site())] += 1
+        return execute(sql, params, many, context)
+
+    def offenders(self):
+        found = [
+            Offender(shape, call_site, count)
+            for (shape, call_site), count in self.counts.items()
+            if count >= self.threshold
+        ]
+        return sorted(found, key=lambda offender: offender.count, reverse=True)
+
+
+@contextmanager
+def detect_nplusone(label: str, threshold: int | None = None, raise_errors: bool | None = None):
+    """Track queries inside the block; log or raise on repeated identical-shape queries."""
+    if threshold is None:
+        threshold = getattr(settings, 'NPLUSONE_THRESHOLD', 5)
+    detector = NPlusOneDetector(threshold)
+    token = _active_detector.set(detector)
+    try:
+        with observe_queries(detector):
+            yield detector
+    finally:
+        _active_detector.reset(token)
+    offenders = detector.offenders()
+    if not offenders:
+        return
+    message = f'Possible N+1 queries in {label}:\n' + '\n'.join(f'  {offender}' for offender in offenders)
+    if raise_errors is None:
+        raise_errors = getattr(settings, 'NPLUSONE_RAISE', False)
+    if raise_errors:
+        raise NPlusOneError(message)
+    logger.warning(message)
@@ -0,0 +1,114 @@
+import hashlib
+import time
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.contrib.messages import get_messages
+from django.core.cache import cache
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+
+from .metrics import record_cache_lookup
+
+
+def _version_key(group: str) -> str:
+    return f'pagecache:version:{group}'
+
+
+def group_versions(groups):
+    keys = [_version_key(group) for group in groups]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            # A fresh stamp never collides with pages cached under an evicted one.
+            cache.add(key, time.time_ns())
+            versions[key] = cache.get(key)
+    return [versions[key] for key in keys]
+
+
+def invalidate_page_groups(*groups):
+    for group in groups:
+        try:
+            cache.incr(_version_key(group))
+        except ValueError:
+            pass
+
+
+def _is_cacheable_request(request) -> bool:
+    return (
+        request.method in ('GET', 'HEAD')
+        and not request.user.is_authenticated
+        and not len(get_messages(request))
+    )
+
+
+def _is_cacheable_response(response) -> bool:
+    return response.status_code == 200 and not response.streaming and not response.cookies
+
+
+def _lookup(request, groups, args, kwargs):
+    group_names = groups(request, *args, **kwargs) if groups else []
+    raw = repr((request.get_full_path(), group_versions(group_names)))
+    key = f'pagecache:page:{hashlib.sha1(raw.encode()).hexdigest()}'
+    response = cache.get(key)
+    record_cache_lookup('page', response is not None)
+    return key, response
+
+
+def _store(key, response, timeout):
+    if _is_cacheable_response(response):
+        cache.set(key, response, timeout or getattr(settings, 'PAGE_CACHE_TIMEOUT', 60))
+
+
+def _serve(request, response):
+    if response.has_header('ETag'):
+        response = get_conditional_response(request, etag=response['ETag'], response=response)
+    return response
+
+
+def _finish(response):
+    patch_vary_headers(response, ['Cookie'])
+    patch_cache_control(response, public=True, max_age=0)
+    return response
+
+
+def cache_anonymous_page(groups=None, timeout=None):
+    """Cache a view's full response for anonymous visitors.
+
+    ``groups(request, *args, **kwargs)`` names the invalidation groups the
+    page depends on; bumping any of them with ``invalidate_page_groups``
+    retires every cached page built from it. Authenticated requests and
+    requests with pending flash messages always reach the view. Works for
+    sync and async views alike.
+    """
+
+    def decorator(view_func):
+        if iscoroutinefunction(view_func):
+
+            async def _wrapped(request, *args, **kwargs):
+                if not await sync_to_async(_is_cacheable_request)(request):
+                    return await view_func(request, *args, **kwargs)
+                key, response = await sync_to_async(_lookup)(request, groups, args, kwargs)
+                if response is None:
+                    response = await view_func(request, *args, **kwargs)
+                    await sync_to_async(_store)(key, response, timeout)
+                else:
+                    response = _serve(request, response)
+                return _finish(response)
+
+        else:
+
+            def _wrapped(request, *args, **kwargs):
+                if not _is_cacheable_request(request):
+                    return view_func(request, *args, **kwargs)
+                key, response = _lookup(request, groups, args, kwargs)
+                if response is None:
+                    response = view_func(request, *args, **kwargs)
+                    _store(key, response, timeout)
+                else:
+                    response = _serve(request, response)
+                return _finish(response)
+
+        return wraps(view_func)(_wrapped)
+
+    return decorator
@@ -0,0 +1,210 @@
+import atexit
+import functools
+import json
+import logging
+import logging.handlers
+import math
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+
+from django.conf import settings
+from django.template import TemplateDoesNotExist
+from django.template.backends.django import DjangoTemplates, Template, reraise
+
+_current_metrics = ContextVar('request_metrics', default=None)
+_query_observers = ContextVar('query_observers', default=())
+
+
+def get_current_metrics():
+    return _current_metrics.get()
+
+
+@contextmanager
+def observe_queries(wrapper):
+    """Run ``wrapper``, an ``execute_wrapper`` callable, around every query made in the current context.
+
+    Unlike ``connection.execute_wrapper`` this follows the context rather than
+    the thread: connections are thread-bound, so under ASGI the ORM calls an
+    async view hands to ``sync_to_async`` run on another thread's connection.
+    """
+    token = _query_observers.set((*_query_observers.get(), wrapper))
+    try:
+        yield
+    finally:
+        _query_observers.reset(token)
+
+
+def dispatch_query(execute, sql, params, many, context):
+    """The ``execute_wrapper`` installed on every connection; chains the observers of the current context."""
+    for observer in reversed(_query_observers.get()):
+        execute = functools.partial(observer, execute)
+    return execute(sql, params, many, context)
+
+
+class RequestMetrics:
+    """Counters collected for a single request by RequestPerfMiddleware."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.total_time = 0.0
+        self.db_count = 0
+        self.db_time = 0.0
+        self.template_time = 0.0
+
+    def activate(self):
+        return _current_metrics.set(self)
+
+    def deactivate(self, token):
+        _current_metrics.reset(token)
+
+    def query_wrapper(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += time.perf_counter() - start
+            self.db_count += 1
+
+    def finish(self):
+        self.total_time = time.perf_counter() - self.started
+
+    def server_timing(self) -> str:
+        return ', '.join(
+            [
+                f'total;dur={self.total_time * 1000:.1f}',
+                f'db;dur={self.db_time * 1000:.1f};desc="{self.db_count} queries"',
+                f'tpl;dur={self.template_time * 1000:.1f}',
+            ]
+        )
+
+    def as_record(self, request, response) -> dict:
+        match = getattr(request, 'resolver_match', None)
+        return {
+            'ts': round(time.time(), 3),
+            'view': match.view_name if match else '',
+            'method': request.method,
+            'path': request.get_full_path(),
+            'status': response.status_code,
+            'total_ms': round(self.total_time * 1000, 2),
+            'db_count': self.db_count,
+            'db_ms': round(self.db_time * 1000, 2),
+            'tpl_ms': round(self.template_time * 1000, 2),
+            'bytes': None if response.streaming else len(response.content),
+        }
+
+
+class TimedTemplate(Template):
+    def render(self, context=None, request=None):
+        metrics = _current_metrics.get()
+        if metrics is None:
+            return super().render(context, request)
+        start = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            metrics.template_time += time.perf_counter() - start
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    """DjangoTemplates backend that reports top-level render time to the active request metrics."""
+
+    def from_string(self, template_code):
+        return TimedTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        try:
+            return TimedTemplate(self.engine.get_template(template_name), self)
+        except TemplateDoesNotExist as exc:
+            reraise(exc, self)
+
+
+class JsonlBatchWriter:
+    """Buffers JSON records and appends them to a size-rotated file in batches."""
+
+    def __init__(self, path, batch_size=50, flush_interval=5.0, max_bytes=10 * 1024 * 1024, backup_count=5):
+        self.path = Path(path)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self._buffer = []
+        self._lock = threading.Lock()
+        self._handler = None
+        self._last_flush = time.monotonic()
+
+    def write(self, record: dict):
+        with self._lock:
+            self._buffer.append(json.dumps(record, separators=(',', ':')))
+            due = (
+                len(self._buffer) >= self.batch_size
+                or time.monotonic() - self._last_flush >= self.flush_interval
+            )
+        if due:
+            self.flush()
+
+    @property
+    def pending(self):
+        return len(self._buffer)
+
+    def flush(self):
+        with self._lock:
+            lines, self._buffer = self._buffer, []
+            self._last_flush = time.monotonic()
+            if not lines:
+                return
+            if self._handler is None:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                self._handler = logging.handlers.RotatingFileHandler(
+                    self.path, maxBytes=self.max_bytes, backupCount=self.backup_count, encoding='utf-8', delay=True
+                )
+            self._handler.emit(logging.makeLogRecord({'msg': '\n'.join(lines)}))
+            self._handler.flush()
+
+
+_writers = {}
+_writers_lock = threading.Lock()
+
+
+def get_request_log():
+    path = getattr(settings, 'PERF_LOG_PATH', None)
+    if not path:
+        return None
+    key = str(path)
+    with _writers_lock:
+        writer = _writers.get(key)
+        if writer is None:
+            writer = JsonlBatchWriter(
+                path,
+                batch_size=getattr(settings, 'PERF_LOG_BATCH_SIZE', 50),
+                flush_interval=getattr(settings, 'PERF_LOG_FLUSH_INTERVAL', 5.0),
+                max_bytes=getattr(settings, 'PERF_LOG_MAX_BYTES', 10 * 1024 * 1024),
+                backup_count=getattr(settings, 'PERF_LOG_BACKUP_COUNT', 5),
+            )
+            _writers[key] = writer
+    return writer
+
+
+def pending_request_log_records():
+    return sum(writer.pending for writer in list(_writers.values()))
+
+
+@atexit.register
+def flush_request_logs():
+    for writer in list(_writers.values()):
+        writer.flush()
+
+
+def rotated_log_paths(path, backup_count):
+    path = Path(path)
+    backups = [path.with_name(f'{path.name}.{i}') for i in range(backup_count, 0, -1)]
+    return [p for p in backups + [path] if p.exists()]
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
@@ -0,0 +1,106 @@
+import atexit
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DatabaseError, connection
+
+from profiles.models import Profile
+
+logger = logging.getLogger(__name__)
+
+
+def _presence_key(user_id) -> str:
+    return f'presence:{user_id}'
+
+
+def _gate_key(user_id) -> str:
+    return f'presence:gate:{user_id}'
+
+
+class PresenceTracker:
+    """Records user activity in the cache and flushes a coarse ``last_seen_at`` to the database.
+
+    ``touch`` writes at most once per user per ``PRESENCE_WRITE_INTERVAL``
+    seconds across all processes (an atomic ``cache.add`` is the gate), and
+    the presence key expires ``PRESENCE_TTL`` seconds after the last write,
+    which is what "online" means. Writes that got through are buffered per
+    process and saved with one ``UPDATE`` per distinct minute by a daemon
+    thread every ``PRESENCE_FLUSH_INTERVAL`` seconds, whether or not more
+    requests arrive, and once more at interpreter exit. A process killed
+    without running exit handlers loses at most one interval of
+    ``last_seen_at`` updates; online status lives in the cache and is
+    unaffected.
+    """
+
+    def __init__(self):
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._flusher_pid = None
+        self._stop_event = threading.Event()
+
+    def touch(self, user_id: int, now: float | None = None) -> bool:
+        now = time.time() if now is None else now
+        if not cache.add(_gate_key(user_id), 1, getattr(settings, 'PRESENCE_WRITE_INTERVAL', 60)):
+            return False
+        cache.set(_presence_key(user_id), now, getattr(settings, 'PRESENCE_TTL', 300))
+        with self._lock:
+            self._pending[user_id] = now
+            self._ensure_flusher()
+        return True
+
+    def _ensure_flusher(self):
+        # Threads do not survive fork, so each worker process starts its own.
+        if self._flusher_pid == os.getpid():
+            return
+        self._flusher_pid = os.getpid()
+        interval = getattr(settings, 'PRESENCE_FLUSH_INTERVAL', 300)
+        threading.Thread(target=self._flush_periodically, args=(interval,), name='presence-flush', daemon=True).start()
+
+    def _flush_periodically(self, interval: float):
+        while not self._stop_event.wait(interval):
+            try:
+                self.flush()
+            except DatabaseError:
+                logger.exception('Could not flush presence to the database')
+            finally:
+                connection.close()
+
+    @property
+    def pending(self):
+        return len(self._pending)
+
+    def stop(self):
+        """Stop the periodic flush thread; pending writes stay buffered."""
+        self._stop_event.set()
+
+    def discard(self):
+        with self._lock:
+            self._pending.clear()
+
+    def flush(self) -> int:
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        by_minute = {}
+        for user_id, seen in pending.items():
+            by_minute.setdefault(int(seen // 60) * 60, []).append(user_id)
+        for minute, user_ids in by_minute.items():
+            # update() leaves Profile.updated_at alone, so page fingerprints do not churn.
+            Profile.objects.filter(user_id__in=user_ids).update(
+                last_seen_at=datetime.fromtimestamp(minute, tz=dt_timezone.utc)
+            )
+        return len(pending)
+
+
+presence = PresenceTracker()
+atexit.register(presence.flush)
+
+
+def online_user_ids(user_ids) -> set:
+    """Return the subset of ``user_ids`` active within ``PRESENCE_TTL``, with one cache round trip."""
+    keys = {_presence_key(user_id): user_id for user_id in user_ids}
+    return {keys[key] for key in cache.get_many(list(keys))}
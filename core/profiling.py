@@ -0,0 +1,158 @@
+import cProfile
+import json
+import sys
+import threading
+import time
+import traceback
+import uuid
+from collections import Counter
+from pathlib import Path
+
+from django.conf import settings
+
+PROFILE_KINDS = {
+    'prof': ('application/octet-stream', '.prof'),
+    'sql': ('application/json', '.json'),
+    'folded': ('text/plain', '.folded'),
+}
+_INSTRUMENTATION_FILES = {
+    str(Path(__file__).resolve().with_name(name)) for name in ('nplusone.py', 'perf.py', 'profiling.py')
+}
+
+
+def get_profile_dir() -> Path:
+    return Path(getattr(settings, 'PROFILER_DIR', settings.BASE_DIR / 'logs' / 'profiles'))
+
+
+def _project_frames(limit=6):
+    base_dir = str(settings.BASE_DIR)
+    frames = [
+        f'{Path(frame.filename).relative_to(base_dir)}:{frame.lineno} in {frame.name}'
+        for frame in traceback.extract_stack()
+        if frame.filename.startswith(base_dir)
+        and 'site-packages' not in frame.filename
+        and frame.filename not in _INSTRUMENTATION_FILES
+    ]
+    return frames[-limit:]
+
+
+class StackSampler(threading.Thread):
+    """Samples the stack of one thread at a fixed interval and counts folded stacks."""
+
+    def __init__(self, thread_id, interval):
+        super().__init__(daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            names = []
+            while frame is not None:
+                code = frame.f_code
+                names.append(f'{frame.f_globals.get("__name__", "?")}:{code.co_name}')
+                frame = frame.f_back
+            if names:
+                self.stacks[';'.join(reversed(names))] += 1
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+    def folded(self) -> str:
+        return ''.join(f'{stack} {count}\n' for stack, count in self.stacks.most_common())
+
+
+class RequestProfile:
+    """Runs one request under cProfile and a stack sampler and records every SQL query."""
+
+    def __init__(self, request):
+        self.id = uuid.uuid4().hex
+        self.request = request
+        self.queries = []
+        self.profiler = cProfile.Profile()
+        self.sampler = StackSampler(threading.get_ident(), getattr(settings, 'PROFILER_SAMPLE_INTERVAL', 0.005))
+        self.started = None
+        self.total_time = 0.0
+
+    def query_wrapper(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append(
+                {
+                    'sql': sql,
+                    'params': [str(p) for p in params] if params and not many else None,
+                    'ms': round((time.perf_counter() - start) * 1000, 3),
+                    'stack': _project_frames(),
+                }
+            )
+
+    def start(self):
+        self.started = time.perf_counter()
+        self.sampler.start()
+        self.profiler.enable()
+
+    def stop(self):
+        self.profiler.disable()
+        self.sampler.stop()
+        self.total_time = time.perf_counter() - self.started
+
+    def save(self, response):
+        profile_dir = get_profile_dir()
+        profile_dir.mkdir(parents=True, exist_ok=True)
+        match = getattr(self.request, 'resolver_match', None)
+        self.profiler.dump_stats(profile_dir / f'{self.id}.prof')
+        (profile_dir / f'{self.id}.folded').write_text(self.sampler.folded(), encoding='utf-8')
+        meta = {
+            'id': self.id,
+            'ts': round(time.time(), 3),
+            'view': match.view_name if match else '',
+            'path': self.request.get_full_path(),
+            'user_id': self.request.user.pk,
+            'status': response.status_code,
+            'total_ms': round(self.total_time * 1000, 2),
+            'query_count': len(self.queries),
+            'query_ms': round(sum(q['ms'] for q in self.queries), 3),
+            'queries': self.queries,
+        }
+        (profile_dir / f'{self.id}.json').write_text(json.dumps(meta, indent=2), encoding='utf-8')
+        prune_profiles(getattr(settings, 'PROFILER_MAX_PROFILES', 50))
+
+
+def list_profiles():
+    profiles = []
+    profile_dir = get_profile_dir()
+    if not profile_dir.exists():
+        return profiles
+    for meta_path in profile_dir.glob('*.json'):
+        try:
+            meta = json.loads(meta_path.read_text(encoding='utf-8'))
+        except ValueError:
+            continue
+        meta.pop('queries', None)
+        profiles.append(meta)
+    profiles.sort(key=lambda meta: meta.get('ts', 0), reverse=True)
+    return profiles
+
+
+def get_profile_path(profile_id: str, kind: str):
+    if kind not in PROFILE_KINDS:
+        return None
+    try:
+        uuid.UUID(hex=profile_id)
+    except ValueError:
+        return None
+    path = get_profile_dir() / f'{profile_id}{PROFILE_KINDS[kind][1]}'
+    return path if path.exists() else None
+
+
+def prune_profiles(keep: int):
+    profile_dir = get_profile_dir()
+    metas = sorted(profile_dir.glob('*.json'), key=lambda p: p.stat().st_mtime, reverse=True)
+    for meta_path in metas[keep:]:
+        for _, suffix in PROFILE_KINDS.values():
+            meta_path.with_suffix(suffix).unlink(missing_ok=True)
@@ -0,0 +1,45 @@
+import pytest
+
+
+@pytest.fixture
+def nplusone(settings):
+    """Fail the test when any request, or the test body itself, issues N+1 queries."""
+    from core.nplusone import NPlusOneError, detect_nplusone
+
+    settings.NPLUSONE_ENABLED = True
+    settings.NPLUSONE_RAISE = True
+    failure = None
+    try:
+        with detect_nplusone('test body') as detector:
+            yield detector
+    except NPlusOneError as exc:
+        failure = str(exc)
+    if failure:
+        pytest.fail(failure, pytrace=False)
+
+
+@pytest.fixture(autouse=True)
+def _discard_presence_writes():
+    """Drop presence writes buffered by a test so the exit flush never sends them to another database."""
+    yield
+    from core.presence import presence
+
+    presence.discard()
+
+
+PNG_1X1 = (
+    b"\x89PNG\r\n\x1a\n\x00\x00\x00\rIHDR\x00\x00\x00\x01\x00\x00\x00\x01"
+    b"\x08\x02\x00\x00\x00\x90wS\xde\x00\x00\x00\x0bIDAT\x08\xd7c``\x00\x00"
+    b"\x00\x02\x00\x01\xe2!\xbc3\x00\x00\x00\x00IEND\xaeB`\x82"
+)
+
+
+@pytest.fixture
+def make_test_image():
+    """Factory for a 1x1 PNG upload: ``make_test_image(name="dm.png")``."""
+    from django.core.files.uploadedfile import SimpleUploadedFile
+
+    def make(name="dm.png"):
+        return SimpleUploadedFile(name, PNG_1X1, content_type="image/png")
+
+    return make
@@ -0,0 +1,57 @@
+import math
+import time
+from dataclasses import dataclass
+from functools import lru_cache
+
+from django.core.cache import cache
+
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+# Bucket keys expire this many periods after they were last reset.
+KEY_TTL_PERIODS = 10
+
+
+@dataclass(frozen=True)
+class Rate:
+    capacity: int
+    period: int
+
+
+@lru_cache(maxsize=None)
+def parse_rate(value: str) -> Rate:
+    """Parse ``'<count>/<s|m|h|d>'``: a bucket of ``count`` tokens refilled over one period."""
+    count, _, unit = value.partition('/')
+    if unit not in PERIODS or not count.isdigit() or int(count) < 1:
+        raise ValueError(f'Invalid rate {value!r}; expected e.g. "30/m".')
+    return Rate(int(count), PERIODS[unit])
+
+
+def consume(key: str, rate: Rate, now: float | None = None):
+    """Take one token from the bucket ``key``; return ``(allowed, retry_after_seconds)``.
+
+    The bucket is stored as its theoretical arrival time (GCRA): each request
+    pushes it ``period / capacity`` further into the future with one atomic
+    ``incr``, and is allowed while it stays within one period of now, which
+    is the same as holding ``capacity`` tokens refilled over the period.
+    Only a client returning from idle, whose stamp has fallen behind the
+    clock, pays a second round trip to reset it; rejected requests hand
+    their interval back.
+    """
+    now_ms = int((time.time() if now is None else now) * 1000)
+    interval_ms = rate.period * 1000 // rate.capacity
+    bucket_key = f'ratelimit:{key}'
+    timeout = rate.period * KEY_TTL_PERIODS
+    try:
+        arrival = cache.incr(bucket_key, interval_ms)
+    except ValueError:
+        arrival = None
+    if arrival is None or arrival - interval_ms < now_ms:
+        arrival = now_ms + interval_ms
+        cache.set(bucket_key, arrival, timeout)
+    overshoot_ms = arrival - now_ms - rate.period * 1000
+    if overshoot_ms <= 0:
+        return True, 0
+    try:
+        cache.decr(bucket_key, interval_ms)
+    except ValueError:  # expired in between; nothing to hand back
+        pass
+    return False, max(1, math.ceil(overshoot_ms / 1000))
@@ -0,0 +1,62 @@
+import hashlib
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db.models import Q
+
+from posts.models import Post
+from .metrics import record_cache_lookup
+from .pagecache import group_versions
+
+User = get_user_model()
+
+
+def normalize_query(query: str) -> str:
+    return ' '.join(query.lower().split())
+
+
+def match_topics(query: str):
+    cleaned = query.replace('_', ' ').replace('-', ' ')
+    return [
+        slug
+        for slug, label in Post.TOPIC_CHOICES
+        if cleaned in slug.replace('_', ' ') or cleaned in label.lower()
+    ]
+
+
+def search_result_ids(query: str):
+    """Return ``(user_ids, post_ids)`` for a normalized query, in display order.
+
+    Only ids are cached, capped at ``SEARCH_MAX_RESULTS`` each, for
+    ``SEARCH_CACHE_TIMEOUT`` seconds. The key includes the page-cache
+    versions of every matched topic, so a new post in a matched topic
+    retires the entry right away.
+    """
+    topics = match_topics(query)
+    raw = repr((query, topics, group_versions([f'topic:{topic}' for topic in topics])))
+    key = f'search:{hashlib.sha1(raw.encode()).hexdigest()}'
+    cached = cache.get(key)
+    record_cache_lookup('search', cached is not None)
+    if cached is not None:
+        return cached
+    limit = getattr(settings, 'SEARCH_MAX_RESULTS', 500)
+    user_ids = list(
+        User.objects.filter(Q(username__icontains=query) | Q(profile__display_name__icontains=query))
+        .order_by('username')
+        .values_list('id', flat=True)[:limit]
+    )
+    post_ids = list(
+        Post.objects.filter(Q(content__icontains=query) | Q(topic__in=topics), is_deleted=False)
+        .order_by('-created_at', '-id')
+        .values_list('id', flat=True)[:limit]
+    )
+    result = (user_ids, post_ids)
+    cache.set(key, result, getattr(settings, 'SEARCH_CACHE_TIMEOUT', 30))
+    return result
+
+
+def in_id_order(queryset, ids):
+    """Fetch the rows for ``ids`` and return them in that order, skipping rows deleted since."""
+    rows = queryset.in_bulk(ids)
+    return [rows[pk] for pk in ids if pk in rows]
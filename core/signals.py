@@ -0,0 +1,150 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.contrib.auth import get_user_model
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from friendships.models import FriendRequest, Friendship
+from messaging.models import ArchivedMessageImage, DirectMessage
+from posts.models import ArchivedComment, ArchivedPost, Comment, Like, Post
+from profiles.models import Profile
+from .media import MEDIA_REFERENCES, release_media, retain_media
+from .pagecache import invalidate_page_groups
+from .perf import dispatch_query
+from .typeahead import bump_user_index_version
+
+User = get_user_model()
+
+MEDIA_FIELDS = dict(MEDIA_REFERENCES)
+
+_archiving = ContextVar('archiving_rows', default=False)
+
+
+@contextmanager
+def archiving_rows():
+    """Skip per-row page invalidation and media release while rows move into the archive tables.
+
+    The caller invalidates the affected page groups once per batch, and the
+    archive rows take over the media references of the rows they replace.
+    """
+    token = _archiving.set(True)
+    try:
+        yield
+    finally:
+        _archiving.reset(token)
+
+
+@receiver(connection_created)
+def install_query_dispatch(sender, connection, **kwargs):
+    if dispatch_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(dispatch_query)
+
+
+@receiver(pre_save, sender=Post)
+def remember_previous_topic(sender, instance, **kwargs):
+    instance._previous_topic = (
+        Post.objects.filter(pk=instance.pk).values_list('topic', flat=True).first() if instance.pk else None
+    )
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def invalidate_post_pages(sender, instance, **kwargs):
+    if _archiving.get():
+        return
+    topics = {instance.topic, getattr(instance, '_previous_topic', None)} - {None}
+    invalidate_page_groups(
+        *(f'topic:{topic}' for topic in topics), f'profile:{instance.author.username}'
+    )
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+@receiver(post_save, sender=Like)
+@receiver(post_delete, sender=Like)
+def invalidate_post_activity_pages(sender, instance, **kwargs):
+    if _archiving.get():
+        return
+    post = instance.post if sender.post.is_cached(instance) else None
+    if post is not None and Post.author.is_cached(post):
+        row = (post.topic, post.author.username)
+    else:
+        row = Post.objects.filter(pk=instance.post_id).values_list('topic', 'author__username').first()
+    if row:
+        topic, username = row
+        invalidate_page_groups(f'topic:{topic}', f'profile:{username}')
+
+
+@receiver(post_save, sender=Profile)
+@receiver(post_delete, sender=Profile)
+def invalidate_profile_pages(sender, instance, **kwargs):
+    invalidate_page_groups('profiles')
+
+
+@receiver(post_save, sender=Friendship)
+@receiver(post_delete, sender=Friendship)
+def invalidate_friendship_pages(sender, instance, **kwargs):
+    invalidate_page_groups('friendships')
+
+
+@receiver(post_save, sender=FriendRequest)
+def invalidate_friend_request_pages(sender, instance, **kwargs):
+    invalidate_page_groups(f'profile:{instance.from_user.username}', f'profile:{instance.to_user.username}')
+
+
+@receiver(pre_save, sender=Post)
+@receiver(pre_save, sender=Comment)
+@receiver(pre_save, sender=DirectMessage)
+@receiver(pre_save, sender=Profile)
+def remember_previous_media(sender, instance, update_fields=None, **kwargs):
+    field = MEDIA_FIELDS[sender]
+    if instance.pk is None or (update_fields is not None and field not in update_fields):
+        instance._previous_media = None
+        return
+    instance._previous_media = sender.objects.filter(pk=instance.pk).values_list(field, flat=True).first() or ''
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_save, sender=Comment)
+@receiver(post_save, sender=DirectMessage)
+@receiver(post_save, sender=Profile)
+def count_media_references(sender, instance, created, **kwargs):
+    previous = getattr(instance, '_previous_media', None)
+    if previous is None and not created:
+        return
+    current = getattr(instance, MEDIA_FIELDS[sender]).name or ''
+    if current != previous:
+        retain_media(current)
+        release_media(previous)
+
+
+@receiver(post_delete, sender=Post)
+@receiver(post_delete, sender=Comment)
+@receiver(post_delete, sender=DirectMessage)
+@receiver(post_delete, sender=Profile)
+def release_deleted_media(sender, instance, **kwargs):
+    if _archiving.get():
+        return
+    release_media(getattr(instance, MEDIA_FIELDS[sender]).name)
+
+
+@receiver(post_delete, sender=ArchivedMessageImage)
+@receiver(post_delete, sender=ArchivedPost)
+@receiver(post_delete, sender=ArchivedComment)
+def release_archived_media(sender, instance, **kwargs):
+    release_media(getattr(instance, MEDIA_FIELDS[sender]))
+
+
+@receiver(post_save, sender=User)
+@receiver(post_save, sender=Profile)
+def invalidate_user_index(sender, instance, created, update_fields=None, **kwargs):
+    indexed = {'username', 'is_active'} if sender is User else {'display_name'}
+    if created or update_fields is None or indexed & set(update_fields):
+        bump_user_index_version()
+
+
+@receiver(post_delete, sender=User)
+def invalidate_user_index_on_delete(sender, instance, **kwargs):
+    bump_user_index_version()
@@ -0,0 +1,81 @@
+import gzip
+import re
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.base import ContentFile
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; only .gz siblings are written without it
+    brotli = None
+
+COMPRESSIBLE_EXTENSIONS = ('.css', '.js', '.svg', '.txt', '.json', '.map', '.html')
+MIN_COMPRESS_SIZE = 256
+
+
+def minify_css(css: str) -> str:
+    css = re.sub(r'/\*.*?\*/', '', css, flags=re.S)
+    css = re.sub(r'\s+', ' ', css)
+    css = re.sub(r'\s*([{};,>])\s*', r'\1', css)
+    css = re.sub(r':\s+', ':', css)
+    css = css.replace(';}', '}')
+    return css.strip()
+
+
+class BundledManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """Manifest storage that also builds STATIC_BUNDLES and precompressed siblings.
+
+    During ``collectstatic`` every bundle is concatenated and minified into
+    STATIC_ROOT before hashing, and each hashed text asset gets ``.gz`` (and,
+    when the ``brotli`` package is installed, ``.br``) files next to it for
+    nginx ``gzip_static``. Names missing from the manifest fall back to the
+    unhashed path so templates keep working before collectstatic has run.
+    """
+
+    manifest_strict = False
+
+    def stored_name(self, name):
+        try:
+            return super().stored_name(name)
+        except ValueError:
+            return name
+
+    def post_process(self, paths, dry_run=False, **options):
+        if dry_run:
+            yield from super().post_process(paths, dry_run, **options)
+            return
+        paths = {**paths, **self._build_bundles()}
+        yield from super().post_process(paths, dry_run, **options)
+        for hashed_name in set(self.hashed_files.values()):
+            self._write_compressed(hashed_name)
+
+    def _build_bundles(self):
+        built = {}
+        for bundle_name, sources in getattr(settings, 'STATIC_BUNDLES', {}).items():
+            parts = []
+            for source in sources:
+                with self.open(source) as fh:
+                    parts.append(fh.read().decode('utf-8'))
+            if self.exists(bundle_name):
+                self.delete(bundle_name)
+            self._save(bundle_name, ContentFile(minify_css('\n'.join(parts)).encode('utf-8')))
+            built[bundle_name] = (self, bundle_name)
+        return built
+
+    def _write_compressed(self, name):
+        if not name.endswith(COMPRESSIBLE_EXTENSIONS) or not self.exists(name):
+            return
+        with self.open(name) as fh:
+            content = fh.read()
+        if len(content) < MIN_COMPRESS_SIZE:
+            return
+        variants = [('.gz', gzip.compress(content, compresslevel=9, mtime=0))]
+        if brotli is not None:
+            variants.append(('.br', brotli.compress(content)))
+        for suffix, compressed in variants:
+            if len(compressed) >= len(content):
+                continue
+            if self.exists(name + suffix):
+                self.delete(name + suffix)
+            self._save(name + suffix, ContentFile(compressed))
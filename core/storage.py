@@ -0,0 +1,78 @@
+import hashlib
+import os
+import re
+import tempfile
+
+from django.core.files.move import file_move_safe
+from django.core.files.storage import FileSystemStorage
+
+BLOB_DIR = 'blobs'
+INCOMING_PREFIX = '.incoming-'
+_EXTENSION_RE = re.compile(r'^\.[a-z0-9]{1,10}$')
+
+
+def blob_name(digest: str, original_name: str) -> str:
+    extension = os.path.splitext(original_name)[1].lower()
+    if not _EXTENSION_RE.match(extension):
+        extension = ''
+    return f'{BLOB_DIR}/{digest[:2]}/{digest[2:4]}/{digest}{extension}'
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """File storage that keeps every distinct upload once, named by its SHA-256.
+
+    The ``upload_to`` name only contributes its extension: content lands in
+    ``blobs/<aa>/<bb>/<sha256><ext>``, so the same file uploaded as a post
+    image, a DM photo and an avatar is one file on disk. Content is hashed
+    while it is streamed to a temporary file next to its final location and
+    then renamed into place, which makes concurrent identical uploads safe.
+    Uploads that went through ``core.uploads.HashingTemporaryFileUploadHandler``
+    carry their digest already and are never re-read when the blob exists.
+    """
+
+    def get_available_name(self, name, max_length=None):
+        # Names are derived from content in _save; collisions are the point.
+        return name
+
+    def _save(self, name, content):
+        digest = getattr(content, 'content_hash', None)
+        if digest is not None and self._reuse(blob_name(digest, name)):
+            return blob_name(digest, name)
+
+        incoming_dir = self.path(BLOB_DIR)
+        os.makedirs(incoming_dir, exist_ok=True)
+        fd, incoming_path = tempfile.mkstemp(dir=incoming_dir, prefix=INCOMING_PREFIX)
+        try:
+            if digest is not None and hasattr(content, 'temporary_file_path'):
+                os.close(fd)
+                file_move_safe(content.temporary_file_path(), incoming_path, allow_overwrite=True)
+            else:
+                hasher = hashlib.sha256()
+                with os.fdopen(fd, 'wb') as fh:
+                    for chunk in content.chunks():
+                        hasher.update(chunk)
+                        fh.write(chunk)
+                digest = hasher.hexdigest()
+            name = blob_name(digest, name)
+            if self._reuse(name):
+                os.remove(incoming_path)
+                return name
+            full_path = self.path(name)
+            os.makedirs(os.path.dirname(full_path), exist_ok=True)
+            if self.file_permissions_mode is not None:
+                os.chmod(incoming_path, self.file_permissions_mode)
+            os.replace(incoming_path, full_path)
+        except BaseException:
+            if os.path.exists(incoming_path):
+                os.remove(incoming_path)
+            raise
+        return name
+
+    def _reuse(self, name) -> bool:
+        full_path = self.path(name)
+        if not os.path.exists(full_path):
+            return False
+        # Refresh the mtime so a blob that just gained a reference is not
+        # reclaimed by a garbage-collection sweep still holding an old listing.
+        os.utime(full_path)
+        return True
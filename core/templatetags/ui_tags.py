@@ -1,4 +1,8 @@
 from django import template
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.templatetags.static import static
+from django.utils.html import format_html_join
 
 register = template.Library()
 
@@ -17,3 +21,12 @@ def next_with_anchor(next_url, post_id):
     if '#' in base:
         base = base.split('#', 1)[0]
     return f'{base}#post-{post_id}'
+
+
+@register.simple_tag
+def stylesheet_bundle(name):
+    """Link the collected bundle in production, or its source files otherwise."""
+    files = settings.STATIC_BUNDLES[name]
+    if not settings.DEBUG and name in getattr(staticfiles_storage, 'hashed_files', {}):
+        files = [name]
+    return format_html_join('\n', '<link rel="stylesheet" href="{}">', ((static(path),) for path in files))
@@ -0,0 +1,91 @@
+import threading
+import time
+from bisect import bisect_left
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+
+VERSION_KEY = 'typeahead:users:version'
+
+
+def bump_user_index_version():
+    """Mark every worker's user index stale; called on signup and profile edits."""
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.add(VERSION_KEY, 1, timeout=None)
+
+
+def _current_version():
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, 1, timeout=None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+class UserPrefixIndex:
+    """Sorted in-process index of lowercased usernames and display-name words.
+
+    A lookup is a binary search plus a short scan, with no database access.
+    The index is rebuilt lazily, by the first lookup that sees a newer
+    version stamp in the cache, so each worker rebuilds at most once per
+    change. The stamp only reaches other workers through a shared cache, so
+    a snapshot older than ``TYPEAHEAD_MAX_AGE`` seconds is rebuilt as well.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = None
+        self._built_at = None
+        # (sorted terms, user id per term, {user id: (username, display name)}),
+        # replaced as a whole so readers never see a half-built index.
+        self._snapshot = ([], [], {})
+
+    def _rebuild(self, version):
+        entries = []
+        users = {}
+        rows = get_user_model().objects.filter(is_active=True).values_list('id', 'username', 'profile__display_name')
+        for user_id, username, display_name in rows.iterator():
+            display_name = display_name or ''
+            users[user_id] = (username, display_name)
+            terms = {username.lower(), display_name.lower(), *display_name.lower().split()}
+            entries.extend((term, user_id) for term in terms if term)
+        entries.sort()
+        self._snapshot = ([term for term, _ in entries], [user_id for _, user_id in entries], users)
+        self._version = version
+        self._built_at = time.monotonic()
+
+    def _is_stale(self, version) -> bool:
+        if version != self._version or self._built_at is None:
+            return True
+        return time.monotonic() - self._built_at >= getattr(settings, 'TYPEAHEAD_MAX_AGE', 60)
+
+    def ensure_current(self):
+        version = _current_version()
+        if self._is_stale(version):
+            with self._lock:
+                if self._is_stale(version):
+                    self._rebuild(version)
+
+    def search(self, prefix: str, limit: int = 10):
+        """Return up to ``limit`` ``(username, display_name)`` pairs whose name or words start with ``prefix``."""
+        prefix = prefix.strip().lower()
+        if not prefix:
+            return []
+        self.ensure_current()
+        keys, user_ids, users = self._snapshot
+        results = []
+        seen = set()
+        position = bisect_left(keys, prefix)
+        while position < len(keys) and keys[position].startswith(prefix) and len(results) < limit:
+            user_id = user_ids[position]
+            if user_id not in seen:
+                seen.add(user_id)
+                results.append(users[user_id])
+            position += 1
+        return results
+
+
+user_index = UserPrefixIndex()
@@ -0,0 +1,25 @@
+import hashlib
+
+from django.core.files.uploadhandler import TemporaryFileUploadHandler
+
+
+class HashingTemporaryFileUploadHandler(TemporaryFileUploadHandler):
+    """Streams every upload to a temporary file and hashes it chunk by chunk.
+
+    The resulting file exposes ``content_hash`` (hex SHA-256), which
+    ``core.storage.ContentAddressedStorage`` uses to skip writing content
+    that is already stored.
+    """
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.hasher = hashlib.sha256()
+
+    def receive_data_chunk(self, raw_data, start):
+        self.hasher.update(raw_data)
+        return super().receive_data_chunk(raw_data, start)
+
+    def file_complete(self, file_size):
+        file = super().file_complete(file_size)
+        file.content_hash = self.hasher.hexdigest()
+        return file
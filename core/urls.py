@@ -5,5 +5,11 @@ from . import views
 app_name = 'core'
 
 urlpatterns = [
-    path('', views.search, name='search'),
+    path('search/', views.search, name='search'),
+    path('search/users/', views.user_autocomplete, name='user_autocomplete'),
+    path('export/', views.data_export, name='data_export'),
+    path('media/<path:path>', views.protected_media, name='media'),
+    path('metrics', views.metrics_view, name='metrics'),
+    path('perf/profiles/', views.profiles_list, name='profiles'),
+    path('perf/profiles/<str:profile_id>/<str:kind>/', views.profile_download, name='profile_download'),
 ]
@@ -1,34 +1,90 @@
+from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib.auth import get_user_model
 from django.contrib.auth.decorators import login_required
-from django.db.models import Q
+from django.core.exceptions import PermissionDenied
+from django.core.paginator import Paginator
+from django.http import FileResponse, Http404, HttpResponse, JsonResponse, StreamingHttpResponse
 from django.shortcuts import render
+from django.urls import reverse
+from django.utils.http import content_disposition_header
 
 from posts.models import Post
+from .export import iter_user_export
+from .media import can_view_media, clean_media_name, media_response
+from .metrics import collect, metrics, render_exposition
+from .profiling import PROFILE_KINDS, get_profile_path, list_profiles
+from .search import in_id_order, normalize_query, search_result_ids
+from .typeahead import user_index
 
 User = get_user_model()
 
 
 @login_required
 def search(request):
-    query = request.GET.get('q', '').strip()
-    user_results = []
-    post_results = []
+    query = normalize_query(request.GET.get('q', ''))
+    user_page = post_page = None
     if query:
-        normalized = query.lower()
-        normalized_clean = normalized.replace('_', ' ').replace('-', ' ')
-        topic_matches = []
-        for slug, label in Post.TOPIC_CHOICES:
-            label_clean = label.lower()
-            if normalized_clean in slug.replace('_', ' ') or normalized_clean in label_clean:
-                topic_matches.append(slug)
-        user_results = (
-            User.objects.filter(Q(username__icontains=query) | Q(profile__display_name__icontains=query))
-            .select_related('profile')
-            .distinct()
+        user_ids, post_ids = search_result_ids(query)
+        page_size = getattr(settings, 'SEARCH_PAGE_SIZE', 20)
+        user_page = Paginator(user_ids, page_size).get_page(request.GET.get('users_page'))
+        post_page = Paginator(post_ids, page_size).get_page(request.GET.get('posts_page'))
+        user_page.object_list = in_id_order(User.objects.select_related('profile'), list(user_page.object_list))
+        post_page.object_list = in_id_order(
+            Post.objects.filter(is_deleted=False).select_related('author', 'author__profile'),
+            list(post_page.object_list),
         )
-        post_results = (
-            Post.objects.filter((Q(content__icontains=query) | Q(topic__in=topic_matches)), is_deleted=False)
-            .select_related('author', 'author__profile')
-            .distinct()
-        )
-    return render(request, 'core/search.html', {'query': query, 'user_results': user_results, 'post_results': post_results})
+    return render(request, 'core/search.html', {'query': query, 'user_page': user_page, 'post_page': post_page})
+
+
+@login_required
+def data_export(request):
+    response = StreamingHttpResponse(iter_user_export(request.user), content_type='application/zip')
+    response['Content-Disposition'] = content_disposition_header(True, f'{request.user.username}-export.zip')
+    return response
+
+
+@login_required
+def user_autocomplete(request):
+    try:
+        limit = min(max(int(request.GET.get('limit', 8)), 1), 20)
+    except ValueError:
+        limit = 8
+    results = [
+        {
+            'username': username,
+            'display_name': display_name,
+            'url': reverse('profiles:detail', kwargs={'username': username}),
+        }
+        for username, display_name in user_index.search(request.GET.get('q', ''), limit)
+    ]
+    return JsonResponse({'results': results})
+
+
+@staff_member_required
+def profiles_list(request):
+    return render(request, 'core/profiles.html', {'profiles': list_profiles()})
+
+
+@staff_member_required
+def profile_download(request, profile_id, kind):
+    path = get_profile_path(profile_id, kind)
+    if path is None:
+        raise Http404("Profile not found")
+    content_type, _ = PROFILE_KINDS[kind]
+    return FileResponse(open(path, 'rb'), as_attachment=True, filename=path.name, content_type=content_type)
+
+
+def metrics_view(request):
+    allowed_ips = getattr(settings, 'METRICS_ALLOWED_IPS', None)
+    if allowed_ips is not None and request.META.get('REMOTE_ADDR') not in allowed_ips and not request.user.is_staff:
+        raise PermissionDenied
+    metrics.flush()
+    return HttpResponse(render_exposition(*collect()), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+def protected_media(request, path):
+    name = clean_media_name(path)
+    if name is None or not can_view_media(request.user, name):
+        raise Http404("File not found")
+    return media_response(request, name)
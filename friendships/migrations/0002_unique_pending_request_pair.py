@@ -0,0 +1,36 @@
+# Generated by Django 5.2.9 on 2026-10-19 06:56
+
+import django.db.models.functions.comparison
+from django.conf import settings
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def cancel_duplicate_pending_requests(apps, schema_editor):
+    """Keep the oldest pending request of each unordered pair so the constraint can be created."""
+    FriendRequest = apps.get_model('friendships', 'FriendRequest')
+    seen = set()
+    duplicates = []
+    pending = FriendRequest.objects.filter(status='pending').order_by('created_at', 'id')
+    for pk, from_user_id, to_user_id in pending.values_list('pk', 'from_user_id', 'to_user_id').iterator():
+        pair = (min(from_user_id, to_user_id), max(from_user_id, to_user_id))
+        if pair in seen:
+            duplicates.append(pk)
+        seen.add(pair)
+    FriendRequest.objects.filter(pk__in=duplicates).update(status='cancelled', responded_at=timezone.now())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('friendships', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(cancel_duplicate_pending_requests, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='friendrequest',
+            constraint=models.UniqueConstraint(django.db.models.functions.comparison.Least('from_user', 'to_user'), django.db.models.functions.comparison.Greatest('from_user', 'to_user'), condition=models.Q(('status', 'pending')), name='unique_pending_friend_request_pair'),
+        ),
+    ]
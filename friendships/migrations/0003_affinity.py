@@ -0,0 +1,72 @@
+# Generated by Django 5.2.9 on 2026-10-19 07:12
+
+from collections import defaultdict
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+
+# Weights as of this migration; later changes only affect new interactions.
+WEIGHTS = {'like': 1.0, 'comment': 2.0, 'message': 0.5}
+
+
+def backfill_affinity(apps, schema_editor):
+    """Seed affinities from existing likes, comments and live DMs with one grouped query each."""
+    Affinity = apps.get_model('friendships', 'Affinity')
+    Like = apps.get_model('posts', 'Like')
+    Comment = apps.get_model('posts', 'Comment')
+    DirectConversationParticipant = apps.get_model('messaging', 'DirectConversationParticipant')
+    scores = defaultdict(float)
+    likes = Like.objects.values_list('user', 'post__author').annotate(n=Count('id')).order_by()
+    for user_id, target_id, n in likes:
+        scores[user_id, target_id] += n * WEIGHTS['like']
+    comments = (
+        Comment.objects.filter(is_deleted=False).values_list('author', 'post__author').annotate(n=Count('id')).order_by()
+    )
+    for user_id, target_id, n in comments:
+        scores[user_id, target_id] += n * WEIGHTS['comment']
+    received = (
+        DirectConversationParticipant.objects.values_list('user', 'conversation__messages__sender')
+        .annotate(n=Count('conversation__messages'))
+        .order_by()
+    )
+    for user_id, sender_id, n in received:
+        if sender_id is not None:
+            scores[user_id, sender_id] += n * WEIGHTS['message']
+            scores[sender_id, user_id] += n * WEIGHTS['message']
+    Affinity.objects.bulk_create(
+        [
+            Affinity(user_id=user_id, target_id=target_id, score=score)
+            for (user_id, target_id), score in scores.items()
+            if user_id != target_id
+        ],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('friendships', '0002_unique_pending_request_pair'),
+        ('messaging', '0005_history_watermarks'),
+        ('posts', '0006_archive_soft_deleted'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Affinity',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('target', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='affinities', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'unique_together': {('user', 'target')},
+            },
+        ),
+        migrations.RunPython(backfill_affinity, migrations.RunPython.noop),
+    ]
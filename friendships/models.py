@@ -1,6 +1,7 @@
 from django.contrib.auth import get_user_model
 from django.db import models
 from django.db.models import CheckConstraint, F, Q
+from django.db.models.functions import Greatest, Least
 from django.utils import timezone
 
 User = get_user_model()
@@ -29,6 +30,13 @@ class FriendRequest(models.Model):
         ordering = ['-created_at']
         constraints = [
             CheckConstraint(condition=~Q(from_user=F('to_user')), name='friend_request_not_self'),
+            # At most one pending request per unordered pair, whichever direction it goes.
+            models.UniqueConstraint(
+                Least('from_user', 'to_user'),
+                Greatest('from_user', 'to_user'),
+                condition=Q(status='pending'),
+                name='unique_pending_friend_request_pair',
+            ),
         ]
 
     def __str__(self) -> str:
@@ -53,3 +61,23 @@ class Friendship(models.Model):
 
     def __str__(self) -> str:
         return f'{self.user1} <-> {self.user2}'
+
+
+class Affinity(models.Model):
+    """How much ``user`` interacts with ``target``: weighted likes, comments and DMs.
+
+    Directed, one row per pair that ever interacted. Maintained
+    incrementally by the post and messaging services and read by the
+    ``relevant`` feed order.
+    """
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='affinities')
+    target = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+    score = models.FloatField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = [('user', 'target')]
+
+    def __str__(self) -> str:
+        return f'{self.user_id} -> {self.target_id}: {self.score}'
@@ -1,13 +1,29 @@
+from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.db import transaction
-from django.db.models import Q
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Max, Q
 from django.utils import timezone
 
-from .models import FriendRequest, Friendship
+from core.metrics import metrics
+from profiles.services import FOLLOWER_STATUSES, adjust_profile_stats
+from .models import Affinity, FriendRequest, Friendship
 
 User = get_user_model()
 
 
+def _is_only_follow(friend_request: FriendRequest) -> bool:
+    """Whether ``friend_request`` is the only thing making its sender count as a follower."""
+    return not (
+        FriendRequest.objects.filter(
+            from_user_id=friend_request.from_user_id,
+            to_user_id=friend_request.to_user_id,
+            status__in=FOLLOWER_STATUSES,
+        )
+        .exclude(pk=friend_request.pk)
+        .exists()
+    )
+
+
 def _ordered_pair(user_a: User, user_b: User):
     if user_a.id == user_b.id:
         raise ValueError("Cannot use the same user in a friendship pair.")
@@ -24,6 +40,38 @@ def get_friendship(user_a: User, user_b: User):
     return Friendship.objects.filter(user1=u1, user2=u2).first()
 
 
+AFFINITY_WEIGHTS = {'like': 1.0, 'comment': 2.0, 'message': 0.5}
+
+
+def bump_affinity(user_id: int, target_ids, kind: str, sign: int = 1):
+    """Add the ``kind`` interaction weight (see ``FEED_AFFINITY_WEIGHTS``) to ``user``'s affinity for each target."""
+    weights = getattr(settings, 'FEED_AFFINITY_WEIGHTS', AFFINITY_WEIGHTS)
+    delta = sign * weights[kind]
+    for target_id in set(target_ids) - {user_id}:
+        # update() skips auto_now, and the affinity fingerprint relies on updated_at moving.
+        updated = Affinity.objects.filter(user_id=user_id, target_id=target_id).update(
+            score=F('score') + delta, updated_at=timezone.now()
+        )
+        if updated:
+            continue
+        try:
+            with transaction.atomic():
+                Affinity.objects.create(user_id=user_id, target_id=target_id, score=delta)
+        except IntegrityError:
+            # Created concurrently; add to the row that won.
+            Affinity.objects.filter(user_id=user_id, target_id=target_id).update(
+                score=F('score') + delta, updated_at=timezone.now()
+            )
+
+
+def get_affinities(user: User, target_ids) -> dict:
+    return dict(Affinity.objects.filter(user=user, target_id__in=target_ids).values_list('target_id', 'score'))
+
+
+def get_affinity_fingerprint(user: User):
+    return tuple(Affinity.objects.filter(user=user).aggregate(count=Count('id'), updated=Max('updated_at')).values())
+
+
 def get_friends_queryset(user: User):
     return (
         User.objects.filter(Q(friendship_user1__user2=user) | Q(friendship_user2__user1=user))
@@ -46,28 +94,51 @@ def get_friend_map_for_users(users):
     return friend_map
 
 
+def get_friendships_fingerprint():
+    return tuple(Friendship.objects.aggregate(count=Count('id'), last=Max('id')).values())
+
+
+def get_friend_requests_fingerprint(user: User):
+    return tuple(
+        FriendRequest.objects.filter(Q(from_user=user) | Q(to_user=user))
+        .aggregate(count=Count('id'), last=Max('id'), responded=Max('responded_at'))
+        .values()
+    )
+
+
 @transaction.atomic
 def send_friend_request(from_user: User, to_user: User) -> FriendRequest:
+    """Create a pending request, or accept the one ``to_user`` already sent.
+
+    Duplicate pending requests are prevented by the
+    ``unique_pending_friend_request_pair`` constraint rather than by
+    lookups, so concurrent sends cannot both succeed. When the insert
+    collides with a request in the opposite direction, that request is
+    accepted and returned.
+    """
     if from_user == to_user:
         raise ValueError("Cannot send a friend request to yourself.")
 
     if are_friends(from_user, to_user):
         raise ValueError("Users are already friends.")
 
-    existing_pending = FriendRequest.objects.filter(
-        status=FriendRequest.STATUS_PENDING,
-        from_user=from_user,
-        to_user=to_user,
-    ).first()
-    reverse_pending = FriendRequest.objects.filter(
-        status=FriendRequest.STATUS_PENDING,
-        from_user=to_user,
-        to_user=from_user,
-    ).first()
-    if existing_pending or reverse_pending:
-        raise ValueError("A pending friend request already exists between these users.")
-
-    return FriendRequest.objects.create(from_user=from_user, to_user=to_user)
+    try:
+        with transaction.atomic():
+            friend_request = FriendRequest.objects.create(from_user=from_user, to_user=to_user)
+    except IntegrityError:
+        reverse_pending = (
+            FriendRequest.objects.select_for_update()
+            .filter(status=FriendRequest.STATUS_PENDING, from_user=to_user, to_user=from_user)
+            .first()
+        )
+        if reverse_pending is None:
+            raise ValueError("A pending friend request already exists between these users.")
+        accept_friend_request(reverse_pending)
+        return reverse_pending
+    if _is_only_follow(friend_request):
+        adjust_profile_stats([to_user.id], followers=1)
+    metrics.inc('friend_requests_total', action='sent')
+    return friend_request
 
 
 @transaction.atomic
@@ -76,9 +147,11 @@ def accept_friend_request(friend_request: FriendRequest) -> Friendship:
         raise ValueError("Friend request is not pending.")
     friendship = Friendship(user1=friend_request.from_user, user2=friend_request.to_user)
     friendship.save()
+    adjust_profile_stats([friend_request.from_user_id, friend_request.to_user_id], friends=1)
     friend_request.status = FriendRequest.STATUS_ACCEPTED
     friend_request.responded_at = timezone.now()
     friend_request.save(update_fields=['status', 'responded_at'])
+    metrics.inc('friend_requests_total', action='accepted')
     return friendship
 
 
@@ -89,6 +162,9 @@ def reject_friend_request(friend_request: FriendRequest):
     friend_request.status = FriendRequest.STATUS_REJECTED
     friend_request.responded_at = timezone.now()
     friend_request.save(update_fields=['status', 'responded_at'])
+    if _is_only_follow(friend_request):
+        adjust_profile_stats([friend_request.to_user_id], followers=-1)
+    metrics.inc('friend_requests_total', action='rejected')
     return friend_request
 
 
@@ -99,6 +175,9 @@ def cancel_friend_request(friend_request: FriendRequest):
     friend_request.status = FriendRequest.STATUS_CANCELLED
     friend_request.responded_at = timezone.now()
     friend_request.save(update_fields=['status', 'responded_at'])
+    if _is_only_follow(friend_request):
+        adjust_profile_stats([friend_request.to_user_id], followers=-1)
+    metrics.inc('friend_requests_total', action='cancelled')
     return friend_request
 
 
@@ -107,4 +186,5 @@ def remove_friendship(user_a: User, user_b: User):
     friendship = get_friendship(user_a, user_b)
     if friendship:
         friendship.delete()
+        adjust_profile_stats([user_a.id, user_b.id], friends=-1)
     return friendship
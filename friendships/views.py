@@ -3,6 +3,7 @@ from django.contrib.auth import get_user_model
 from django.contrib.auth.decorators import login_required
 from django.shortcuts import get_object_or_404, redirect, render
 
+from core.presence import online_user_ids
 from .models import FriendRequest
 from .services import (
     accept_friend_request,
@@ -18,8 +19,9 @@ User = get_user_model()
 
 @login_required
 def friends_list(request):
-    friends = get_friends_queryset(request.user).select_related('profile')
-    return render(request, 'friendships/friends_list.html', {'friends': friends})
+    friends = list(get_friends_queryset(request.user).select_related('profile'))
+    online_ids = online_user_ids([friend.id for friend in friends])
+    return render(request, 'friendships/friends_list.html', {'friends': friends, 'online_ids': online_ids})
 
 
 @login_required
@@ -44,8 +46,11 @@ def send_request(request, user_id):
     if request.method != 'POST':
         return redirect('profiles:detail', username=target.username)
     try:
-        send_friend_request(request.user, target)
-        messages.success(request, 'Friend request sent.')
+        friend_request = send_friend_request(request.user, target)
+        if friend_request.status == FriendRequest.STATUS_ACCEPTED:
+            messages.success(request, f'You are now friends with {target.username}.')
+        else:
+            messages.success(request, 'Friend request sent.')
     except ValueError as exc:
         messages.error(request, str(exc))
     return redirect('profiles:detail', username=target.username)
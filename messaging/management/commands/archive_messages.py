@@ -0,0 +1,30 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from messaging.services import archive_old_messages
+
+
+class Command(BaseCommand):
+    help = 'Pack old direct messages into compressed per-conversation archive segments.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=float,
+            default=getattr(settings, 'DM_ARCHIVE_AFTER_DAYS', 90),
+            help='Archive messages sent more than this many days ago.',
+        )
+        parser.add_argument(
+            '--segment-size',
+            type=int,
+            default=getattr(settings, 'DM_ARCHIVE_SEGMENT_SIZE', 200),
+            help='Messages per segment; shorter runs stay in the live table.',
+        )
+
+    def handle(self, *args, **options):
+        if options['segment_size'] < 1:
+            raise CommandError('--segment-size must be positive.')
+        archived = archive_old_messages(timedelta(days=options['days']), options['segment_size'])
+        self.stdout.write(f'Archived {archived} messages.')
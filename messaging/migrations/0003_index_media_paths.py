@@ -0,0 +1,18 @@
+# Generated by Django 5.2.9 on 2026-10-19 06:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('messaging', '0002_directmessage_image_alter_directmessage_content'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='directmessage',
+            name='image',
+            field=models.ImageField(blank=True, db_index=True, null=True, upload_to='dm_photos/'),
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.2.9 on 2026-10-19 06:50
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('messaging', '0003_index_media_paths'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedMessageSegment',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('first_created_at', models.DateTimeField()),
+                ('last_created_at', models.DateTimeField()),
+                ('message_count', models.PositiveIntegerField()),
+                ('data', models.BinaryField()),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('conversation', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_segments', to='messaging.directconversation')),
+            ],
+            options={
+                'ordering': ['last_created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ArchivedMessageImage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(db_index=True, max_length=100)),
+                ('segment', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='images', to='messaging.archivedmessagesegment')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='archivedmessagesegment',
+            index=models.Index(fields=['conversation', 'last_created_at'], name='messaging_a_convers_e14066_idx'),
+        ),
+    ]
@@ -0,0 +1,59 @@
+# Generated by Django 5.2.9 on 2026-10-19 06:52
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Max
+
+
+def flags_to_watermarks(apps, schema_editor):
+    """Hide everything up to the newest message each participant had deleted for themselves."""
+    Participant = apps.get_model('messaging', 'DirectConversationParticipant')
+    Message = apps.get_model('messaging', 'DirectMessage')
+    watermarks = {}
+
+    def raise_watermark(key, moment):
+        if key not in watermarks or moment > watermarks[key]:
+            watermarks[key] = moment
+
+    own = Message.objects.filter(deleted_for_sender=True).values('conversation_id', 'sender_id')
+    for row in own.annotate(latest=Max('created_at')).order_by():
+        raise_watermark((row['conversation_id'], row['sender_id']), row['latest'])
+    received = Message.objects.filter(deleted_for_recipient=True).values('conversation_id', 'sender_id')
+    for row in received.annotate(latest=Max('created_at')).order_by():
+        recipients = Participant.objects.filter(conversation_id=row['conversation_id']).exclude(
+            user_id=row['sender_id']
+        )
+        for user_id in recipients.values_list('user_id', flat=True):
+            raise_watermark((row['conversation_id'], user_id), row['latest'])
+
+    for (conversation_id, user_id), moment in watermarks.items():
+        Participant.objects.filter(conversation_id=conversation_id, user_id=user_id).update(cleared_before=moment)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('messaging', '0004_archived_message_segments'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='directconversationparticipant',
+            name='cleared_before',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.RunPython(flags_to_watermarks, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='directmessage',
+            name='deleted_for_recipient',
+        ),
+        migrations.RemoveField(
+            model_name='directmessage',
+            name='deleted_for_sender',
+        ),
+        migrations.AddIndex(
+            model_name='directmessage',
+            index=models.Index(fields=['conversation', 'created_at'], name='messaging_d_convers_fc4998_idx'),
+        ),
+    ]
@@ -20,6 +20,8 @@ class DirectConversationParticipant(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='dm_participations')
     is_deleted = models.BooleanField(default=False)
     last_read_at = models.DateTimeField(null=True, blank=True)
+    # Messages created at or before this moment are hidden from this participant.
+    cleared_before = models.DateTimeField(null=True, blank=True)
 
     class Meta:
         unique_together = [('conversation', 'user')]
@@ -32,14 +34,45 @@ class DirectMessage(models.Model):
     conversation = models.ForeignKey(DirectConversation, on_delete=models.CASCADE, related_name='messages')
     sender = models.ForeignKey(User, on_delete=models.CASCADE, related_name='sent_messages')
     content = models.TextField(blank=True)
-    image = models.ImageField(upload_to='dm_photos/', null=True, blank=True)
+    image = models.ImageField(upload_to='dm_photos/', null=True, blank=True, db_index=True)
     created_at = models.DateTimeField(default=timezone.now)
     edited_at = models.DateTimeField(null=True, blank=True)
-    deleted_for_sender = models.BooleanField(default=False)
-    deleted_for_recipient = models.BooleanField(default=False)
 
     class Meta:
         ordering = ['created_at']
+        indexes = [models.Index(fields=['conversation', 'created_at'])]
 
     def __str__(self) -> str:
         return f'Message {self.id} in {self.conversation_id}'
+
+
+class ArchivedMessageSegment(models.Model):
+    """A run of old messages from one conversation, stored as zlib-compressed JSON lines.
+
+    Segments are written oldest first by ``archive_old_messages`` and always
+    precede every message still in ``DirectMessage``.
+    """
+
+    conversation = models.ForeignKey(DirectConversation, on_delete=models.CASCADE, related_name='archived_segments')
+    first_created_at = models.DateTimeField()
+    last_created_at = models.DateTimeField()
+    message_count = models.PositiveIntegerField()
+    data = models.BinaryField()
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ['last_created_at']
+        indexes = [models.Index(fields=['conversation', 'last_created_at'])]
+
+    def __str__(self) -> str:
+        return f'Archived segment {self.id} of {self.conversation_id}'
+
+
+class ArchivedMessageImage(models.Model):
+    """Photo of an archived message, indexed so media checks do not unpack segments."""
+
+    segment = models.ForeignKey(ArchivedMessageSegment, on_delete=models.CASCADE, related_name='images')
+    name = models.CharField(max_length=100, db_index=True)
+
+    def __str__(self) -> str:
+        return self.name
@@ -1,9 +1,21 @@
+import json
+import zlib
+
 from django.contrib.auth import get_user_model
 from django.db import transaction
 from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 
-from friendships.services import are_friends
-from .models import DirectConversation, DirectConversationParticipant, DirectMessage
+from core.media import retain_media
+from core.metrics import metrics
+from friendships.services import are_friends, bump_affinity
+from .models import (
+    ArchivedMessageImage,
+    ArchivedMessageSegment,
+    DirectConversation,
+    DirectConversationParticipant,
+    DirectMessage,
+)
 
 User = get_user_model()
 
@@ -57,9 +69,134 @@ def send_message(
 ) -> DirectMessage:
     ensure_participant(conversation, sender)
     message = DirectMessage.objects.create(conversation=conversation, sender=sender, content=content, image=image)
-    DirectConversationParticipant.objects.filter(conversation=conversation).update(is_deleted=False)
+    participants = DirectConversationParticipant.objects.filter(conversation=conversation)
+    participants.update(is_deleted=False)
+    recipient_ids = list(participants.exclude(user=sender).values_list('user_id', flat=True))
+    bump_affinity(sender.id, recipient_ids, 'message')
+    for recipient_id in recipient_ids:
+        bump_affinity(recipient_id, [sender.id], 'message')
+    metrics.inc('messages_sent_total')
     return message
 
 
 def get_user_conversations(user: User):
     return DirectConversation.objects.filter(participants__user=user, participants__is_deleted=False).distinct()
+
+
+@transaction.atomic
+def clear_conversation(conversation: DirectConversation, user: User):
+    """Hide the current history from ``user`` and drop the conversation from their list.
+
+    A single-row update however long the history is; a later message brings
+    the conversation back with only what was sent after the clear.
+    """
+    updated = DirectConversationParticipant.objects.filter(conversation=conversation, user=user).update(
+        cleared_before=timezone.now(), is_deleted=True
+    )
+    if not updated:
+        raise PermissionError("User is not part of the conversation.")
+
+
+def get_visible_messages(conversation: DirectConversation, cleared_before=None):
+    messages = conversation.messages.select_related('sender', 'sender__profile')
+    if cleared_before is not None:
+        messages = messages.filter(created_at__gt=cleared_before)
+    return messages
+
+
+def get_visible_segments(conversation: DirectConversation, cleared_before=None):
+    segments = conversation.archived_segments.all()
+    if cleared_before is not None:
+        segments = segments.filter(last_created_at__gt=cleared_before)
+    return segments
+
+
+def _encode_segment(messages) -> bytes:
+    lines = [
+        json.dumps(
+            {
+                'id': message.id,
+                'sender_id': message.sender_id,
+                'content': message.content,
+                'image': message.image.name or '',
+                'created_at': message.created_at.isoformat(),
+                'edited_at': message.edited_at.isoformat() if message.edited_at else None,
+            },
+            separators=(',', ':'),
+        )
+        for message in messages
+    ]
+    return zlib.compress('\n'.join(lines).encode('utf-8'), 9)
+
+
+@transaction.atomic
+def _archive_segment(conversation_id: int, message_ids) -> int:
+    messages = list(
+        DirectMessage.objects.filter(pk__in=message_ids).order_by('created_at', 'id').select_for_update()
+    )
+    if not messages:
+        # Deleted between picking the ids and locking them; nothing left to archive.
+        return 0
+    segment = ArchivedMessageSegment.objects.create(
+        conversation_id=conversation_id,
+        first_created_at=messages[0].created_at,
+        last_created_at=messages[-1].created_at,
+        message_count=len(messages),
+        data=_encode_segment(messages),
+    )
+    images = [message.image.name for message in messages if message.image]
+    ArchivedMessageImage.objects.bulk_create([ArchivedMessageImage(segment=segment, name=name) for name in images])
+    for name in images:
+        # The segment takes over the reference the deleted row releases.
+        retain_media(name)
+    DirectMessage.objects.filter(pk__in=[message.pk for message in messages]).delete()
+    return len(messages)
+
+
+def archive_old_messages(older_than, segment_size: int = 200) -> int:
+    """Move messages older than ``now - older_than`` into compressed per-conversation segments.
+
+    Only full segments of ``segment_size`` messages are written, oldest
+    first, so a conversation keeps fewer than ``segment_size`` expired
+    messages in the live table and never accumulates tiny segments. Each
+    segment is written in its own transaction. Returns the number of
+    messages archived.
+    """
+    cutoff = timezone.now() - older_than
+    expired = DirectMessage.objects.filter(created_at__lt=cutoff)
+    archived = 0
+    for conversation_id in expired.values_list('conversation_id', flat=True).distinct().order_by('conversation_id'):
+        expired_in_conversation = expired.filter(conversation_id=conversation_id).order_by('created_at', 'id')
+        while True:
+            message_ids = list(expired_in_conversation.values_list('pk', flat=True)[:segment_size])
+            if len(message_ids) < segment_size:
+                break
+            archived += _archive_segment(conversation_id, message_ids)
+    return archived
+
+
+def get_archived_messages(segment: ArchivedMessageSegment, users_by_id: dict, cleared_before=None):
+    """Unpack ``segment`` into unsaved ``DirectMessage`` objects sent after ``cleared_before``.
+
+    Senders are taken from ``users_by_id`` (normally the conversation
+    participants) so rendering does not query per message.
+    """
+    messages = []
+    for line in zlib.decompress(segment.data).decode('utf-8').splitlines():
+        record = json.loads(line)
+        created_at = parse_datetime(record['created_at'])
+        if cleared_before is not None and created_at <= cleared_before:
+            continue
+        message = DirectMessage(
+            id=record['id'],
+            conversation_id=segment.conversation_id,
+            sender_id=record['sender_id'],
+            content=record['content'],
+            image=record['image'] or None,
+            created_at=created_at,
+            edited_at=parse_datetime(record['edited_at']) if record['edited_at'] else None,
+        )
+        if record['sender_id'] in users_by_id:
+            message.sender = users_by_id[record['sender_id']]
+        messages.append(message)
+    return messages
@@ -7,5 +7,6 @@ app_name = 'messaging'
 urlpatterns = [
     path('', views.conversations_list, name='list'),
     path('<int:pk>/', views.conversation_detail, name='detail'),
+    path('<int:pk>/clear/', views.clear_conversation_view, name='clear'),
     path('start/<str:username>/', views.start_conversation, name='start'),
 ]
@@ -1,55 +1,98 @@
+import asyncio
+
+from asgiref.sync import sync_to_async
 from django.contrib import messages
 from django.contrib.auth import get_user_model
 from django.contrib.auth.decorators import login_required
-from django.db.models import Max, Q
+from django.db.models import Max
+from django.http import Http404
 from django.shortcuts import get_object_or_404, redirect, render
 
+from core.presence import online_user_ids
 from .forms import DirectMessageForm
-from .models import DirectConversation
-from .services import get_or_create_conversation, get_user_conversations, send_message
+from .models import ArchivedMessageSegment, DirectConversation
+from .services import (
+    clear_conversation,
+    get_archived_messages,
+    get_or_create_conversation,
+    get_user_conversations,
+    get_visible_messages,
+    get_visible_segments,
+    send_message,
+)
 
 User = get_user_model()
 
 
+async def _alist(iterable):
+    return [item async for item in iterable]
+
+
 @login_required
-def conversations_list(request):
-    conversations = (
-        get_user_conversations(request.user)
+async def conversations_list(request):
+    user = await request.auser()
+    conversations = await _alist(
+        get_user_conversations(user)
         .annotate(last_message_at=Max('messages__created_at'))
         .order_by('-last_message_at', '-created_at')
         .prefetch_related('participants__user__profile')
     )
-    return render(request, 'messaging/list.html', {'conversations': conversations})
+    online_ids = await sync_to_async(online_user_ids)(
+        {p.user_id for conversation in conversations for p in conversation.participants.all()} - {user.id}
+    )
+    return await sync_to_async(render)(
+        request, 'messaging/list.html', {'conversations': conversations, 'online_ids': online_ids}
+    )
+
+
+def _send_from_form(request, conversation):
+    """Send a message from the submitted form; return ``(redirect, None)`` or ``(None, bound form)``."""
+    form = DirectMessageForm(request.POST, request.FILES)
+    if form.is_valid():
+        send_message(conversation, request.user, form.cleaned_data['content'], image=form.cleaned_data['image'])
+        return redirect('messaging:detail', pk=conversation.pk), None
+    return None, form
 
 
 @login_required
-def conversation_detail(request, pk):
-    conversation = get_object_or_404(
-        DirectConversation.objects.prefetch_related(
-            'participants__user__profile', 'messages__sender__profile', 'messages__sender'
-        ),
-        pk=pk,
-        participants__user=request.user,
-    )
+async def conversation_detail(request, pk):
+    user = await request.auser()
+    try:
+        conversation = await DirectConversation.objects.prefetch_related('participants__user__profile').aget(
+            pk=pk, participants__user=user
+        )
+    except DirectConversation.DoesNotExist:
+        raise Http404("No conversation matches the given query.")
+    form = DirectMessageForm()
     if request.method == 'POST':
-        form = DirectMessageForm(request.POST, request.FILES)
-        if form.is_valid():
-            send_message(
-                conversation,
-                request.user,
-                form.cleaned_data['content'],
-                image=form.cleaned_data['image'],
-            )
-            return redirect('messaging:detail', pk=conversation.pk)
-    else:
-        form = DirectMessageForm()
+        response, form = await sync_to_async(_send_from_form)(request, conversation)
+        if response is not None:
+            return response
     participants = list(conversation.participants.all())
-    other_participants = [p.user for p in participants if p.user_id != request.user.id]
-    chat_messages = conversation.messages.exclude(
-        Q(sender=request.user, deleted_for_sender=True)
-        | Q(~Q(sender=request.user), deleted_for_recipient=True)
-    )
-    return render(
+    other_participants = [p.user for p in participants if p.user_id != user.id]
+    cleared_before = next(p.cleared_before for p in participants if p.user_id == user.id)
+    visible_segments = get_visible_segments(conversation, cleared_before)
+    segments = visible_segments.order_by('-pk').values_list('pk', flat=True)
+    segment_id = request.GET.get('segment')
+    later_segment = None
+    if segment_id:
+        if not segment_id.isdigit():
+            raise Http404("Unknown archive segment")
+        try:
+            segment = await visible_segments.aget(pk=segment_id)
+        except ArchivedMessageSegment.DoesNotExist:
+            raise Http404("Unknown archive segment")
+        earlier_segment, later_segment = await asyncio.gather(
+            segments.filter(pk__lt=segment.pk).afirst(), segments.filter(pk__gt=segment.pk).alast()
+        )
+        users_by_id = {p.user_id: p.user for p in participants}
+        chat_messages = get_archived_messages(segment, users_by_id, cleared_before)
+    else:
+        segment = None
+        chat_messages, earlier_segment = await asyncio.gather(
+            _alist(get_visible_messages(conversation, cleared_before).aiterator(chunk_size=500)), segments.afirst()
+        )
+    return await sync_to_async(render)(
         request,
         'messaging/detail.html',
         {
@@ -57,6 +100,9 @@ def conversation_detail(request, pk):
             'chat_messages': chat_messages,
             'form': form,
             'other_participants': other_participants,
+            'archive_segment': segment,
+            'earlier_segment': earlier_segment,
+            'later_segment': later_segment,
         },
     )
 
@@ -73,3 +119,13 @@ def start_conversation(request, username):
     except ValueError as exc:
         messages.error(request, str(exc))
         return redirect('profiles:detail', username=target.username)
+
+
+@login_required
+def clear_conversation_view(request, pk):
+    conversation = get_object_or_404(DirectConversation, pk=pk, participants__user=request.user)
+    if request.method == 'POST':
+        clear_conversation(conversation, request.user)
+        messages.info(request, 'Conversation deleted.')
+        return redirect('messaging:list')
+    return redirect('messaging:detail', pk=conversation.pk)
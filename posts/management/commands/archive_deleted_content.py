@@ -0,0 +1,40 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from posts.models import Comment, Post
+from posts.services import archive_soft_deleted_content
+
+
+class Command(BaseCommand):
+    help = 'Move soft-deleted posts and comments past the retention period into the archive tables.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=float,
+            default=getattr(settings, 'CONTENT_RETENTION_DAYS', 30),
+            help='Archive content soft-deleted more than this many days ago.',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=getattr(settings, 'CONTENT_ARCHIVE_BATCH_SIZE', 200),
+            help='Rows moved per transaction.',
+        )
+        parser.add_argument('--dry-run', action='store_true', help='Only count what would be archived.')
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be positive.')
+        older_than = timedelta(days=options['days'])
+        if options['dry_run']:
+            cutoff = timezone.now() - older_than
+            posts = Post.objects.filter(is_deleted=True, deleted_at__lt=cutoff).count()
+            comments = Comment.objects.filter(is_deleted=True, deleted_at__lt=cutoff).count()
+            self.stdout.write(f'Would archive {posts} posts and {comments} soft-deleted comments.')
+            return
+        posts, comments = archive_soft_deleted_content(older_than, options['batch_size'])
+        self.stdout.write(f'Archived {posts} posts and {comments} comments.')
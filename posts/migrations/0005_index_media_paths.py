@@ -0,0 +1,23 @@
+# Generated by Django 5.2.9 on 2026-10-19 06:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0004_comment_attachment'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='comment',
+            name='attachment',
+            field=models.FileField(blank=True, db_index=True, null=True, upload_to='comment_attachments/'),
+        ),
+        migrations.AlterField(
+            model_name='post',
+            name='image',
+            field=models.ImageField(blank=True, db_index=True, null=True, upload_to='posts/'),
+        ),
+    ]
@@ -0,0 +1,63 @@
+# Generated by Django 5.2.9 on 2026-10-19 06:48
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import F
+
+
+def backfill_deleted_at(apps, schema_editor):
+    # Rows soft-deleted before deleted_at existed age from their last update.
+    for model_name in ('Post', 'Comment'):
+        model = apps.get_model('posts', model_name)
+        model.objects.filter(is_deleted=True, deleted_at__isnull=True).update(deleted_at=F('updated_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0005_index_media_paths'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='deleted_at',
+            field=models.DateTimeField(blank=True, db_index=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='deleted_at',
+            field=models.DateTimeField(blank=True, db_index=True, null=True),
+        ),
+        migrations.CreateModel(
+            name='ArchivedComment',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('post_id', models.BigIntegerField(db_index=True)),
+                ('content', models.TextField()),
+                ('attachment', models.CharField(blank=True, max_length=100)),
+                ('created_at', models.DateTimeField()),
+                ('deleted_at', models.DateTimeField(null=True)),
+                ('archived_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('author', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ArchivedPost',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('content', models.TextField()),
+                ('image', models.CharField(blank=True, max_length=100)),
+                ('topic', models.CharField(max_length=32)),
+                ('likes', models.JSONField(default=list)),
+                ('created_at', models.DateTimeField()),
+                ('deleted_at', models.DateTimeField(null=True)),
+                ('archived_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('author', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.RunPython(backfill_deleted_at, migrations.RunPython.noop),
+    ]
@@ -37,11 +37,12 @@ class Post(models.Model):
 
     author = models.ForeignKey(User, on_delete=models.CASCADE, related_name='posts')
     content = models.TextField()
-    image = models.ImageField(upload_to='posts/', blank=True, null=True)
+    image = models.ImageField(upload_to='posts/', blank=True, null=True, db_index=True)
     topic = models.CharField(max_length=32, choices=TOPIC_CHOICES, default=TOPIC_NON_GAME)
     created_at = models.DateTimeField(default=timezone.now)
     updated_at = models.DateTimeField(auto_now=True)
     is_deleted = models.BooleanField(default=False)
+    deleted_at = models.DateTimeField(null=True, blank=True, db_index=True)
 
     class Meta:
         ordering = ['-created_at']
@@ -65,10 +66,11 @@ class Comment(models.Model):
     post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='comments')
     author = models.ForeignKey(User, on_delete=models.CASCADE, related_name='comments')
     content = models.TextField()
-    attachment = models.FileField(upload_to='comment_attachments/', null=True, blank=True)
+    attachment = models.FileField(upload_to='comment_attachments/', null=True, blank=True, db_index=True)
     created_at = models.DateTimeField(default=timezone.now)
     updated_at = models.DateTimeField(auto_now=True)
     is_deleted = models.BooleanField(default=False)
+    deleted_at = models.DateTimeField(null=True, blank=True, db_index=True)
 
     class Meta:
         ordering = ['created_at']
@@ -87,3 +89,40 @@ class Like(models.Model):
 
     def __str__(self) -> str:
         return f'{self.user} likes {self.post_id}'
+
+
+class ArchivedPost(models.Model):
+    """A soft-deleted post moved out of the live tables by ``archive_soft_deleted_content``.
+
+    ``id`` is the original post id; likes are kept inline as
+    ``[[user_id, created_at], ...]``.
+    """
+
+    id = models.BigIntegerField(primary_key=True)
+    author = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, related_name='+')
+    content = models.TextField()
+    image = models.CharField(max_length=100, blank=True)
+    topic = models.CharField(max_length=32)
+    likes = models.JSONField(default=list)
+    created_at = models.DateTimeField()
+    deleted_at = models.DateTimeField(null=True)
+    archived_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self) -> str:
+        return f'Archived post {self.id}'
+
+
+class ArchivedComment(models.Model):
+    """A soft-deleted comment, or any comment of an archived post, keyed by its original id."""
+
+    id = models.BigIntegerField(primary_key=True)
+    post_id = models.BigIntegerField(db_index=True)
+    author = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, related_name='+')
+    content = models.TextField()
+    attachment = models.CharField(max_length=100, blank=True)
+    created_at = models.DateTimeField()
+    deleted_at = models.DateTimeField(null=True)
+    archived_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self) -> str:
+        return f'Archived comment {self.id} on {self.post_id}'
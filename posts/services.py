@@ -1,9 +1,24 @@
+import math
+
+from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.db import IntegrityError, transaction
-from django.db.models import Prefetch, Q
+from django.db.models import Count, Max, Prefetch, Q
+from django.utils import timezone
 
-from friendships.services import get_friend_map_for_users, get_friends_queryset
-from .models import Comment, Like, Post
+from core.metrics import metrics
+from core.pagecache import invalidate_page_groups
+from core.signals import archiving_rows
+from friendships.services import (
+    bump_affinity,
+    get_affinities,
+    get_friend_map_for_users,
+    get_friends_queryset,
+    get_friendships_fingerprint,
+)
+from profiles.models import Profile
+from profiles.services import adjust_profile_stats
+from .models import ArchivedComment, ArchivedPost, Comment, Like, Post
 
 User = get_user_model()
 
@@ -32,6 +47,53 @@ def get_all_active_posts():
     return get_post_base_queryset().filter(is_deleted=False)
 
 
+def get_posts_fingerprint(posts_qs):
+    """Cheap aggregates that change whenever a rendered post card would change."""
+    posts_qs = posts_qs.order_by()
+    visible_ids = posts_qs.values('id')
+    posts_agg = posts_qs.aggregate(count=Count('id'), last=Max('id'), updated=Max('updated_at'))
+    comments_agg = Comment.objects.filter(post__in=visible_ids, is_deleted=False).aggregate(
+        count=Count('id'), last=Max('id'), updated=Max('updated_at')
+    )
+    likes_agg = Like.objects.filter(post__in=visible_ids).aggregate(count=Count('id'), last=Max('id'))
+    profiles_agg = Profile.objects.aggregate(updated=Max('updated_at'))
+    return (
+        tuple(posts_agg.values()),
+        tuple(comments_agg.values()),
+        tuple(likes_agg.values()),
+        tuple(profiles_agg.values()),
+        get_friendships_fingerprint(),
+    )
+
+
+def rank_posts_by_affinity(posts_qs, user: User):
+    """Return ``posts_qs`` as a list, newest ``FEED_RELEVANT_CANDIDATES`` posts ranked by affinity first.
+
+    A candidate scores ``created_at / FEED_AFFINITY_HALF_LIFE + log2(1 + affinity)``
+    with the viewer's affinity for its author, so each doubling of affinity
+    is worth one half-life of recency. The score does not depend on the
+    current time, so the order only changes when the data does. Older
+    posts follow newest first.
+    """
+    candidates = getattr(settings, 'FEED_RELEVANT_CANDIDATES', 200)
+    half_life = getattr(settings, 'FEED_AFFINITY_HALF_LIFE', 12 * 3600)
+    rows = list(
+        posts_qs.prefetch_related(None)
+        .order_by('-created_at', '-id')
+        .values_list('id', 'author_id', 'created_at')[:candidates]
+    )
+    affinities = get_affinities(user, {author_id for _, author_id, _ in rows})
+    rows.sort(
+        key=lambda row: row[2].timestamp() / half_life + math.log2(1 + max(affinities.get(row[1], 0.0), 0.0)),
+        reverse=True,
+    )
+    ranked = posts_qs.in_bulk([post_id for post_id, _, _ in rows])
+    posts = [ranked[post_id] for post_id, _, _ in rows if post_id in ranked]
+    if len(rows) == candidates:
+        posts.extend(posts_qs.exclude(id__in=[row[0] for row in rows]).order_by('-created_at', '-id'))
+    return posts
+
+
 def mark_likes_for_user(posts, user: User):
     posts_list = list(posts)
     liked_post_ids = set()
@@ -39,53 +101,189 @@ def mark_likes_for_user(posts, user: User):
         liked_post_ids = set(
             Like.objects.filter(post__in=posts_list, user=user).values_list('post_id', flat=True)
         )
-    for post in posts_list:
-        post.liked_by_current_user = post.id in liked_post_ids
+    apply_like_flags(posts_list, liked_post_ids)
     return posts_list, liked_post_ids
 
 
+def apply_like_flags(posts, liked_post_ids):
+    for post in posts:
+        post.liked_by_current_user = post.id in liked_post_ids
+
+
+async def aget_liked_post_ids(posts_qs, user: User) -> set:
+    """Ids of the posts in ``posts_qs`` liked by ``user``, as one subquery, so it can run before the posts load."""
+    if not getattr(user, 'is_authenticated', False):
+        return set()
+    likes = Like.objects.filter(post__in=posts_qs.order_by().values('id'), user=user).values_list('post_id', flat=True)
+    return {post_id async for post_id in likes.aiterator()}
+
+
 @transaction.atomic
 def toggle_like(post: Post, user: User) -> bool:
     if post.is_deleted:
         raise ValueError("Cannot like a deleted post.")
     existing = Like.objects.filter(post=post, user=user)
     if existing.exists():
-        existing.delete()
+        deleted, _ = existing.delete()
+        if deleted:
+            adjust_profile_stats([post.author_id], likes_received=-1)
+            bump_affinity(user.id, [post.author_id], 'like', sign=-1)
+        metrics.inc('likes_toggled_total', action='unlike')
         return False
     try:
-        Like.objects.create(post=post, user=user)
-        return True
+        with transaction.atomic():
+            Like.objects.create(post=post, user=user)
     except IntegrityError:
         return True
+    adjust_profile_stats([post.author_id], likes_received=1)
+    bump_affinity(user.id, [post.author_id], 'like')
+    metrics.inc('likes_toggled_total', action='like')
+    return True
 
 
 @transaction.atomic
 def add_comment(post: Post, user: User, content: str, attachment=None) -> Comment:
     if post.is_deleted:
         raise ValueError("Cannot comment on a deleted post.")
-    return Comment.objects.create(post=post, author=user, content=content, attachment=attachment)
+    comment = Comment.objects.create(post=post, author=user, content=content, attachment=attachment)
+    bump_affinity(user.id, [post.author_id], 'comment')
+    return comment
+
+
+@transaction.atomic
+def publish_post(post: Post, author: User) -> Post:
+    post.author = author
+    post.save()
+    adjust_profile_stats([author.id], posts=1)
+    return post
 
 
 @transaction.atomic
 def soft_delete_post(post: Post):
     post.is_deleted = True
-    post.save(update_fields=['is_deleted'])
+    post.deleted_at = timezone.now()
+    post.save(update_fields=['is_deleted', 'deleted_at'])
+    adjust_profile_stats([post.author_id], posts=-1, likes_received=-post.likes.count())
     return post
 
 
 @transaction.atomic
 def soft_delete_comment(comment: Comment):
+    deleted_at = timezone.now()
+    # Flipping the flag in the UPDATE lets only one of two concurrent deletes take the weight back.
+    flipped = Comment.objects.filter(pk=comment.pk, is_deleted=False).update(is_deleted=True, deleted_at=deleted_at)
+    if not flipped:
+        comment.refresh_from_db(fields=['is_deleted', 'deleted_at'])
+        return comment
     comment.is_deleted = True
-    comment.save(update_fields=['is_deleted'])
+    comment.deleted_at = deleted_at
+    bump_affinity(comment.author_id, [comment.post.author_id], 'comment', sign=-1)
+    # update() sends no post_save, so the comment's pages are invalidated here.
+    _invalidate_post_groups([comment.post_id])
     return comment
 
 
+def _archive_comments(comments):
+    ArchivedComment.objects.bulk_create(
+        [
+            ArchivedComment(
+                id=comment.id,
+                post_id=comment.post_id,
+                author_id=comment.author_id,
+                content=comment.content,
+                attachment=comment.attachment.name or '',
+                created_at=comment.created_at,
+                deleted_at=comment.deleted_at,
+            )
+            for comment in comments
+        ],
+        ignore_conflicts=True,
+    )
+
+
+def _invalidate_post_groups(post_ids):
+    """Bump the topic and author page groups of ``post_ids`` once, instead of once per deleted row."""
+    rows = Post.objects.filter(pk__in=post_ids).values_list('topic', 'author__username').distinct()
+    groups = set()
+    for topic, username in rows:
+        groups.update((f'topic:{topic}', f'profile:{username}'))
+    invalidate_page_groups(*sorted(groups))
+
+
+@transaction.atomic
+def _archive_post_batch(post_ids):
+    posts = list(Post.objects.filter(pk__in=post_ids).select_for_update())
+    likes = {}
+    for post_id, user_id, created_at in Like.objects.filter(post_id__in=post_ids).values_list(
+        'post_id', 'user_id', 'created_at'
+    ):
+        likes.setdefault(post_id, []).append([user_id, created_at.isoformat()])
+    ArchivedPost.objects.bulk_create(
+        [
+            ArchivedPost(
+                id=post.id,
+                author_id=post.author_id,
+                content=post.content,
+                image=post.image.name or '',
+                topic=post.topic,
+                likes=likes.get(post.id, []),
+                created_at=post.created_at,
+                deleted_at=post.deleted_at,
+            )
+            for post in posts
+        ],
+        ignore_conflicts=True,
+    )
+    comments = list(Comment.objects.filter(post_id__in=post_ids))
+    _archive_comments(comments)
+    _invalidate_post_groups(post_ids)
+    with archiving_rows():
+        Post.objects.filter(pk__in=post_ids).delete()
+    return len(posts), len(comments)
+
+
+@transaction.atomic
+def _archive_comment_batch(comment_ids):
+    comments = list(Comment.objects.filter(pk__in=comment_ids).select_for_update())
+    _archive_comments(comments)
+    _invalidate_post_groups({comment.post_id for comment in comments})
+    with archiving_rows():
+        Comment.objects.filter(pk__in=comment_ids).delete()
+    return len(comments)
+
+
+def archive_soft_deleted_content(older_than, batch_size: int = 200):
+    """Move posts and comments soft-deleted before ``now - older_than`` into the archive tables.
+
+    Each batch is archived and removed in its own short transaction, so the
+    job can run against a live database and be interrupted at any point.
+    Returns ``(posts_archived, comments_archived)``; comments archived along
+    with their post are counted too.
+    """
+    cutoff = timezone.now() - older_than
+    archived_posts = archived_comments = 0
+    expired_posts = Post.objects.filter(is_deleted=True, deleted_at__lt=cutoff).order_by('pk')
+    while post_ids := list(expired_posts.values_list('pk', flat=True)[:batch_size]):
+        posts_count, comments_count = _archive_post_batch(post_ids)
+        archived_posts += posts_count
+        archived_comments += comments_count
+    expired_comments = Comment.objects.filter(is_deleted=True, deleted_at__lt=cutoff).order_by('pk')
+    while comment_ids := list(expired_comments.values_list('pk', flat=True)[:batch_size]):
+        archived_comments += _archive_comment_batch(comment_ids)
+    return archived_posts, archived_comments
+
+
 def build_friend_comment_flags(posts):
     posts = list(posts)
     friend_map = get_friend_map_for_users([post.author for post in posts])
+    return get_comment_friend_flags(posts, friend_map), friend_map
+
+
+def get_comment_friend_flags(posts, friend_map) -> dict:
+    """Map each active comment id to whether its author is a friend of the post's author."""
     comment_flags = {}
     for post in posts:
         author_friend_ids = friend_map.get(post.author_id, set())
         for comment in getattr(post, 'active_comments', []):
             comment_flags[comment.id] = comment.author_id in author_friend_ids
-    return comment_flags, friend_map
+    return comment_flags
@@ -1,43 +1,61 @@
+import asyncio
+
+from asgiref.sync import sync_to_async
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
 from django.http import Http404
 from django.shortcuts import get_object_or_404, redirect, render, resolve_url
 
-from friendships.services import get_friends_queryset
+from core.conditional import not_modified, page_etag, with_etag
+from core.pagecache import cache_anonymous_page
+from friendships.services import get_affinity_fingerprint, get_friend_map_for_users, get_friends_queryset
 from .forms import CommentForm, PostForm
 from .models import Comment, Post
 from .services import (
     add_comment,
-    build_friend_comment_flags,
+    aget_liked_post_ids,
+    apply_like_flags,
     get_all_active_posts,
+    get_comment_friend_flags,
     get_feed_posts,
-    mark_likes_for_user,
+    get_posts_fingerprint,
+    publish_post,
+    rank_posts_by_affinity,
     soft_delete_comment,
     soft_delete_post,
     toggle_like,
 )
 
 
+def _publish_from_form(request):
+    """Publish a post from the submitted form; return ``(redirect, None)`` or ``(None, bound form)``."""
+    form = PostForm(request.POST, request.FILES)
+    if form.is_valid():
+        publish_post(form.save(commit=False), request.user)
+        messages.success(request, 'Post created.')
+        return redirect(resolve_url(request.POST.get('next') or 'posts:feed')), None
+    return None, form
+
+
+async def _alist(queryset):
+    return [obj async for obj in queryset]
+
+
 @login_required
-def feed(request):
+async def feed(request):
+    user = await request.auser()
+    form = PostForm()
+    if request.method == 'POST':
+        response, form = await sync_to_async(_publish_from_form)(request)
+        if response is not None:
+            return response
     order = request.GET.get('order', 'new')
     selected_topic = request.GET.get('topic', '')
     selected_friend = request.GET.get('friend', '')
-    friends = get_friends_queryset(request.user).select_related('profile')
-    if request.method == 'POST':
-        form = PostForm(request.POST, request.FILES)
-        if form.is_valid():
-            post = form.save(commit=False)
-            post.author = request.user
-            post.save()
-            messages.success(request, 'Post created.')
-            next_url = request.POST.get('next') or 'posts:feed'
-            return redirect(resolve_url(next_url))
-    else:
-        form = PostForm()
-    posts_qs = get_feed_posts(request.user)
+    friends = await _alist(get_friends_queryset(user).select_related('profile'))
+    posts_qs = get_feed_posts(user)
     valid_topic_slugs = {value for value, _ in Post.TOPIC_CHOICES}
-    allowed_friend_ids = {str(f.id) for f in friends} | {str(request.user.id)}
+    allowed_friend_ids = {str(f.id) for f in friends} | {str(user.id)}
     if selected_friend and selected_friend != 'all':
         if selected_friend in allowed_friend_ids:
             posts_qs = posts_qs.filter(author_id=int(selected_friend))
@@ -50,20 +68,35 @@ def feed(request):
             selected_topic = 'all'
     if order == 'old':
         posts_qs = posts_qs.order_by('created_at', 'id')
-    else:
+    elif order != 'relevant':
         order = 'new'
         posts_qs = posts_qs.order_by('-created_at', '-id')
-    posts, _ = mark_likes_for_user(posts_qs, request.user)
-    comment_friend_flags, _ = build_friend_comment_flags(posts)
-    comment_form = CommentForm()
-    return render(
+    etag = await sync_to_async(page_etag)(
+        request,
+        lambda: (
+            get_posts_fingerprint(posts_qs),
+            get_affinity_fingerprint(user) if order == 'relevant' else None,
+        ),
+    )
+    cached = not_modified(request, etag)
+    if cached is not None:
+        return cached
+    # Every feed author is the viewer or a friend, so the friend map and the
+    # liked ids do not have to wait for the posts.
+    posts, liked_post_ids, friend_map = await asyncio.gather(
+        sync_to_async(rank_posts_by_affinity)(posts_qs, user) if order == 'relevant' else _alist(posts_qs),
+        aget_liked_post_ids(posts_qs, user),
+        sync_to_async(get_friend_map_for_users)([user, *friends]),
+    )
+    apply_like_flags(posts, liked_post_ids)
+    response = await sync_to_async(render)(
         request,
         'posts/feed.html',
         {
             'posts': posts,
             'form': form,
-            'comment_form': comment_form,
-            'comment_friend_flags': comment_friend_flags,
+            'comment_form': CommentForm(),
+            'comment_friend_flags': get_comment_friend_flags(posts, friend_map),
             'friends': friends,
             'selected_friend': selected_friend or 'all',
             'selected_topic': selected_topic or 'all',
@@ -71,29 +104,39 @@ def feed(request):
             'topics': Post.TOPIC_CHOICES,
         },
     )
+    return with_etag(response, etag)
 
 
+@cache_anonymous_page()
 def social_players(request):
     return render(request, 'posts/social_players.html', {'topic_choices': Post.TOPIC_CHOICES})
 
 
-def topic_posts(request, slug):
+@cache_anonymous_page(groups=lambda request, slug: [f'topic:{slug}', 'profiles', 'friendships'])
+async def topic_posts(request, slug):
     topics_map = dict(Post.TOPIC_CHOICES)
     if slug not in topics_map:
         raise Http404("Topic not found")
-    posts, _ = mark_likes_for_user(get_all_active_posts().filter(topic=slug), request.user)
-    comment_friend_flags, _ = build_friend_comment_flags(posts)
-    comment_form = CommentForm()
-    return render(
+    user = await request.auser()
+    posts_qs = get_all_active_posts().filter(topic=slug)
+    etag = await sync_to_async(page_etag)(request, lambda: get_posts_fingerprint(posts_qs))
+    cached = not_modified(request, etag)
+    if cached is not None:
+        return cached
+    posts, liked_post_ids = await asyncio.gather(_alist(posts_qs), aget_liked_post_ids(posts_qs, user))
+    apply_like_flags(posts, liked_post_ids)
+    friend_map = await sync_to_async(get_friend_map_for_users)([post.author for post in posts])
+    response = await sync_to_async(render)(
         request,
         'posts/topic_posts.html',
         {
             'posts': posts,
             'topic_label': topics_map[slug],
-            'comment_form': comment_form,
-            'comment_friend_flags': comment_friend_flags,
+            'comment_form': CommentForm(),
+            'comment_friend_flags': get_comment_friend_flags(posts, friend_map),
         },
     )
+    return with_etag(response, etag)
 
 
 @login_required
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from profiles.services import repair_profile_stats
+
+
+class Command(BaseCommand):
+    help = 'Recompute ProfileStats for every user with grouped aggregate queries.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help='Users recomputed per round of queries.')
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be positive.')
+        repaired = repair_profile_stats(options['batch_size'])
+        self.stdout.write(f'Repaired {repaired} profile stats rows.')
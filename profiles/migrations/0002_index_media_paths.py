@@ -0,0 +1,18 @@
+# Generated by Django 5.2.9 on 2026-10-19 06:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('profiles', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='profile',
+            name='avatar',
+            field=models.ImageField(blank=True, db_index=True, null=True, upload_to='avatars/'),
+        ),
+    ]
@@ -0,0 +1,64 @@
+# Generated by Django 5.2.9 on 2026-10-19 06:57
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def create_stats_rows(apps, schema_editor):
+    User = apps.get_model(*settings.AUTH_USER_MODEL.split('.'))
+    ProfileStats = apps.get_model('profiles', 'ProfileStats')
+    Friendship = apps.get_model('friendships', 'Friendship')
+    FriendRequest = apps.get_model('friendships', 'FriendRequest')
+    Post = apps.get_model('posts', 'Post')
+    Like = apps.get_model('posts', 'Like')
+
+    def grouped(queryset, field, count='id', distinct=False):
+        rows = queryset.order_by().values(field).annotate(n=Count(count, distinct=distinct))
+        return {row[field]: row['n'] for row in rows}
+
+    friends_first = grouped(Friendship.objects.all(), 'user1')
+    friends_second = grouped(Friendship.objects.all(), 'user2')
+    followers = grouped(
+        FriendRequest.objects.filter(status__in=['pending', 'accepted']), 'to_user', 'from_user', distinct=True
+    )
+    posts = grouped(Post.objects.filter(is_deleted=False), 'author')
+    likes = grouped(Like.objects.filter(post__is_deleted=False), 'post__author')
+    ProfileStats.objects.bulk_create(
+        [
+            ProfileStats(
+                user_id=user_id,
+                friends=friends_first.get(user_id, 0) + friends_second.get(user_id, 0),
+                followers=followers.get(user_id, 0),
+                posts=posts.get(user_id, 0),
+                likes_received=likes.get(user_id, 0),
+            )
+            for user_id in User.objects.values_list('pk', flat=True).iterator()
+        ],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('profiles', '0003_index_profile_updated_at'),
+        ('friendships', '0002_unique_pending_request_pair'),
+        ('posts', '0006_archive_soft_deleted'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProfileStats',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('friends', models.IntegerField(default=0)),
+                ('followers', models.IntegerField(default=0)),
+                ('posts', models.IntegerField(default=0)),
+                ('likes_received', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(create_stats_rows, migrations.RunPython.noop),
+    ]
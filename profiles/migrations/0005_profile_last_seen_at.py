@@ -0,0 +1,18 @@
+# Generated by Django 5.2.9 on 2026-10-19 07:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('profiles', '0004_profile_stats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='profile',
+            name='last_seen_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -9,12 +9,31 @@ class Profile(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='profile')
     display_name = models.CharField(max_length=150, blank=True)
     bio = models.TextField(blank=True)
-    avatar = models.ImageField(upload_to='avatars/', blank=True, null=True)
+    avatar = models.ImageField(upload_to='avatars/', blank=True, null=True, db_index=True)
     created_at = models.DateTimeField(default=timezone.now)
-    updated_at = models.DateTimeField(auto_now=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+    # Coarse (minute) activity stamp flushed by core.presence; live status comes from the cache.
+    last_seen_at = models.DateTimeField(null=True, blank=True)
 
     class Meta:
         ordering = ['-created_at']
 
     def __str__(self) -> str:
         return self.display_name or self.user.username
+
+
+class ProfileStats(models.Model):
+    """Denormalized per-user counters shown on the profile page.
+
+    Kept current by the friendship and post services; rebuild with
+    ``manage.py repair_profile_stats`` if they drift.
+    """
+
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='stats')
+    friends = models.IntegerField(default=0)
+    followers = models.IntegerField(default=0)
+    posts = models.IntegerField(default=0)
+    likes_received = models.IntegerField(default=0)
+
+    def __str__(self) -> str:
+        return f'Stats for {self.user_id}'
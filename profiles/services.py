@@ -0,0 +1,77 @@
+from django.contrib.auth import get_user_model
+from django.db.models import Count, F
+
+from friendships.models import FriendRequest, Friendship
+from posts.models import Like, Post
+from .models import ProfileStats
+
+User = get_user_model()
+
+FOLLOWER_STATUSES = (FriendRequest.STATUS_PENDING, FriendRequest.STATUS_ACCEPTED)
+STAT_FIELDS = ('friends', 'followers', 'posts', 'likes_received')
+
+
+def adjust_profile_stats(user_ids, **deltas):
+    """Atomically add ``deltas`` (e.g. ``friends=1``) to the stats rows of ``user_ids``."""
+    if deltas:
+        ProfileStats.objects.filter(user_id__in=user_ids).update(**{name: F(name) + delta for name, delta in deltas.items()})
+
+
+def get_profile_stats(user: User) -> ProfileStats:
+    try:
+        return user.stats
+    except ProfileStats.DoesNotExist:
+        return ProfileStats.objects.get_or_create(user=user)[0]
+
+
+def _grouped_counts(queryset, group_by, count='id', distinct=False):
+    rows = queryset.order_by().values(group_by).annotate(n=Count(count, distinct=distinct))
+    return {row[group_by]: row['n'] for row in rows}
+
+
+def compute_profile_stats(user_ids) -> dict:
+    """Recount every statistic for ``user_ids`` with one grouped query per counter."""
+    friends_as_first = _grouped_counts(Friendship.objects.filter(user1__in=user_ids), 'user1')
+    friends_as_second = _grouped_counts(Friendship.objects.filter(user2__in=user_ids), 'user2')
+    followers = _grouped_counts(
+        FriendRequest.objects.filter(to_user__in=user_ids, status__in=FOLLOWER_STATUSES),
+        'to_user',
+        count='from_user',
+        distinct=True,
+    )
+    posts = _grouped_counts(Post.objects.filter(author__in=user_ids, is_deleted=False), 'author')
+    likes = _grouped_counts(Like.objects.filter(post__author__in=user_ids, post__is_deleted=False), 'post__author')
+    return {
+        user_id: {
+            'friends': friends_as_first.get(user_id, 0) + friends_as_second.get(user_id, 0),
+            'followers': followers.get(user_id, 0),
+            'posts': posts.get(user_id, 0),
+            'likes_received': likes.get(user_id, 0),
+        }
+        for user_id in user_ids
+    }
+
+
+def repair_profile_stats(batch_size: int = 500) -> int:
+    """Recompute all stats rows in batches of users; return how many rows were wrong or missing."""
+    repaired = 0
+    last_id = 0
+    while user_ids := list(
+        User.objects.filter(pk__gt=last_id).order_by('pk').values_list('pk', flat=True)[:batch_size]
+    ):
+        last_id = user_ids[-1]
+        expected = compute_profile_stats(user_ids)
+        current = {
+            row['user_id']: {name: row[name] for name in STAT_FIELDS}
+            for row in ProfileStats.objects.filter(user_id__in=user_ids).values('user_id', *STAT_FIELDS)
+        }
+        stale = [
+            ProfileStats(user_id=user_id, **values)
+            for user_id, values in expected.items()
+            if current.get(user_id) != values
+        ]
+        ProfileStats.objects.bulk_create(
+            stale, update_conflicts=True, unique_fields=['user'], update_fields=list(STAT_FIELDS)
+        )
+        repaired += len(stale)
+    return repaired
@@ -1,8 +1,9 @@
 from django.contrib.auth import get_user_model
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 
-from .models import Profile
+from accounts.services import invalidate_cached_user
+from .models import Profile, ProfileStats
 
 User = get_user_model()
 
@@ -11,3 +12,10 @@ User = get_user_model()
 def create_user_profile(sender, instance, created, **kwargs):
     if created:
         Profile.objects.create(user=instance, display_name=instance.username)
+        ProfileStats.objects.create(user=instance)
+
+
+@receiver(post_save, sender=Profile)
+@receiver(post_delete, sender=Profile)
+def invalidate_cached_profile_user(sender, instance, **kwargs):
+    invalidate_cached_user(instance.user_id)
@@ -1,14 +1,22 @@
 from django.contrib import messages
 from django.contrib.auth import get_user_model
 from django.contrib.auth.decorators import login_required
-from django.db.models import Q
 from django.shortcuts import get_object_or_404, redirect, render
 
-from friendships.models import FriendRequest, Friendship
-from friendships.services import are_friends
+from friendships.models import FriendRequest
+from core.conditional import not_modified, page_etag, with_etag
+from core.pagecache import cache_anonymous_page
+from friendships.services import are_friends, get_friend_requests_fingerprint
 from posts.forms import CommentForm, PostForm
-from posts.services import build_friend_comment_flags, get_user_posts, mark_likes_for_user
+from posts.services import (
+    build_friend_comment_flags,
+    get_posts_fingerprint,
+    get_user_posts,
+    mark_likes_for_user,
+    publish_post,
+)
 from .forms import ProfileForm
+from .services import get_profile_stats
 
 User = get_user_model()
 
@@ -25,10 +33,18 @@ def _friend_status(current_user, profile_user):
     return 'none'
 
 
+@cache_anonymous_page(groups=lambda request, username: [f'profile:{username}', 'profiles', 'friendships'])
 def profile_detail(request, username):
-    profile_user = get_object_or_404(User, username=username)
+    profile_user = get_object_or_404(User.objects.select_related('stats'), username=username)
     profile = profile_user.profile
-    posts, _ = mark_likes_for_user(get_user_posts(profile_user), request.user)
+    posts_qs = get_user_posts(profile_user)
+    etag = page_etag(
+        request, lambda: (get_posts_fingerprint(posts_qs), get_friend_requests_fingerprint(profile_user))
+    )
+    cached = not_modified(request, etag)
+    if cached is not None:
+        return cached
+    posts, _ = mark_likes_for_user(posts_qs, request.user)
     comment_friend_flags, _ = build_friend_comment_flags(posts)
     comment_form = CommentForm()
     post_form = None
@@ -36,9 +52,7 @@ def profile_detail(request, username):
         if request.method == 'POST':
             post_form = PostForm(request.POST, request.FILES)
             if post_form.is_valid():
-                post = post_form.save(commit=False)
-                post.author = request.user
-                post.save()
+                publish_post(post_form.save(commit=False), request.user)
                 messages.success(request, 'Post created.')
                 return redirect('profiles:detail', username=profile_user.username)
         else:
@@ -55,16 +69,8 @@ def profile_detail(request, username):
             from_user=profile_user, to_user=request.user, status=FriendRequest.STATUS_PENDING
         ).first()
     status = _friend_status(request.user, profile_user)
-    friend_count = Friendship.objects.filter(Q(user1=profile_user) | Q(user2=profile_user)).count()
-    follower_count = (
-        FriendRequest.objects.filter(
-            to_user=profile_user, status__in=[FriendRequest.STATUS_PENDING, FriendRequest.STATUS_ACCEPTED]
-        )
-        .values('from_user')
-        .distinct()
-        .count()
-    )
-    return render(
+    stats = get_profile_stats(profile_user)
+    response = render(
         request,
         'profiles/detail.html',
         {
@@ -77,10 +83,10 @@ def profile_detail(request, username):
             'friend_status': status,
             'incoming_request': incoming_request,
             'outgoing_request': outgoing_request,
-            'friend_count': friend_count,
-            'follower_count': follower_count,
+            'stats': stats,
         },
     )
+    return with_etag(response, etag)
 
 
 @login_required
@@ -88,7 +94,7 @@ def edit_profile(request):
     profile = request.user.profile
     if request.method == 'POST' and 'remove_avatar' in request.POST:
         if profile.avatar:
-            profile.avatar.delete(save=False)
+            # Avatars are shared content-addressed blobs; the file is reclaimed by gc_media.
             profile.avatar = None
             profile.save(update_fields=['avatar', 'updated_at'])
             messages.info(request, 'Avatar removed.')
@@ -43,14 +43,20 @@ INSTALLED_APPS = [
     'posts',
     'messaging',
     'core',
+    'api',
 ]
 
 MIDDLEWARE = [
+    'core.middleware.RequestPerfMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'core.middleware.PresenceMiddleware',
+    'core.middleware.RequestProfilerMiddleware',
+    'core.middleware.NPlusOneMiddleware',
+    'core.middleware.RateLimitMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -59,7 +65,7 @@ ROOT_URLCONF = 'social_players.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'core.perf.TimedDjangoTemplates',
         'DIRS': [BASE_DIR / 'templates'],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -86,6 +92,29 @@ DATABASES = {
 }
 
 
+# Caching
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# LocMemCache is per process: invalidations only reach the worker that made
+# the change, so cached entries are kept short-lived. Point this at Redis or
+# Memcached when running several workers.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'social-players',
+    }
+}
+
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+
+# The session user and its profile are served from the cache by
+# accounts.backends.CachedModelBackend and invalidated on user/profile saves.
+# This needs a cache shared by all workers; with LocMemCache the backend
+# reads the user from the database on every request.
+AUTHENTICATION_BACKENDS = ['accounts.backends.CachedModelBackend']
+AUTH_USER_CACHE_TIMEOUT = 300
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -124,9 +153,36 @@ STATIC_URL = 'static/'
 STATICFILES_DIRS = [BASE_DIR / 'static']
 STATIC_ROOT = BASE_DIR / 'staticfiles'
 
+# collectstatic writes content-hashed copies, the STATIC_BUNDLES below and
+# .gz/.br siblings; nginx serves the hashed names with immutable caching.
+STORAGES = {
+    'default': {'BACKEND': 'core.storage.ContentAddressedStorage'},
+    'staticfiles': {'BACKEND': 'core.staticfiles.BundledManifestStaticFilesStorage'},
+}
+STATIC_BUNDLES = {
+    'bundles/app.css': [
+        'base.css',
+        'posts.css',
+        'profiles.css',
+        'friends.css',
+        'messages.css',
+        'search.css',
+    ],
+}
+
 MEDIA_URL = 'media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Uploads are streamed to disk and hashed on the way in; the default storage
+# keeps each distinct file once under media/blobs/ (see core.storage).
+FILE_UPLOAD_HANDLERS = ['core.uploads.HashingTemporaryFileUploadHandler']
+
+# Media is authorised by core.views.protected_media. Behind nginx (which sends
+# X-Sendfile-Type: X-Accel-Redirect) the bytes are served from the internal
+# location below; otherwise Django streams the file itself.
+MEDIA_X_ACCEL_PREFIX = '/protected-media/'
+MEDIA_CACHE_MAX_AGE = 3600
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
@@ -135,3 +191,110 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 LOGIN_URL = 'accounts:login'
 LOGIN_REDIRECT_URL = 'posts:feed'
 LOGOUT_REDIRECT_URL = 'accounts:login'
+
+# Request performance instrumentation (core.middleware.RequestPerfMiddleware).
+# Records are buffered per process and appended in batches to a rotating JSONL
+# log; summarise them with `python manage.py perf_report`.
+
+PERF_SERVER_TIMING = True
+PERF_LOG_PATH = BASE_DIR / 'logs' / 'perf.jsonl'
+PERF_LOG_BATCH_SIZE = 50
+PERF_LOG_FLUSH_INTERVAL = 5.0
+PERF_LOG_MAX_BYTES = 10 * 1024 * 1024
+PERF_LOG_BACKUP_COUNT = 5
+
+# On-demand request profiling for staff (core.middleware.RequestProfilerMiddleware).
+# Profiles are listed at /perf/profiles/.
+
+PROFILER_ENABLED = True
+PROFILER_DIR = BASE_DIR / 'logs' / 'profiles'
+PROFILER_SAMPLE_INTERVAL = 0.005
+PROFILER_MAX_PROFILES = 50
+
+# Prometheus metrics served at /metrics (core.metrics). Each process snapshots
+# its counters to METRICS_DIR and the endpoint aggregates all snapshots,
+# folding those of exited processes into metrics-archived.json.
+
+METRICS_DIR = BASE_DIR / 'logs' / 'metrics'
+METRICS_FLUSH_INTERVAL = 5.0
+METRICS_URL_NAMESPACES = ['posts', 'friendships', 'messaging', 'profiles', 'core']
+METRICS_ALLOWED_IPS = ['127.0.0.1', '::1']
+
+# N+1 query detection for development and tests (core.nplusone). A query shape
+# repeated NPLUSONE_THRESHOLD times from the same call site within one request
+# is logged, or raised as NPlusOneError when NPLUSONE_RAISE is set.
+
+NPLUSONE_ENABLED = DEBUG
+NPLUSONE_THRESHOLD = 5
+NPLUSONE_RAISE = False
+
+# Full-page cache for anonymous visitors (core.pagecache); nginx additionally
+# microcaches the same pages for one second.
+
+PAGE_CACHE_TIMEOUT = 60
+
+# Conditional GET for feed, topic and profile pages (core.conditional). Bump
+# when templates change so clients do not revalidate against old markup.
+
+PAGE_ETAG_VERSION = '1'
+
+# Soft-deleted posts and comments are moved to the archive tables by
+# `manage.py archive_deleted_content` once they are older than this.
+
+CONTENT_RETENTION_DAYS = 30
+CONTENT_ARCHIVE_BATCH_SIZE = 200
+
+# Direct messages older than this are packed into compressed per-conversation
+# segments by `manage.py archive_messages`; the conversation page pages into them.
+
+DM_ARCHIVE_AFTER_DAYS = 90
+DM_ARCHIVE_SEGMENT_SIZE = 200
+
+# Token-bucket limits for writes (core.ratelimit), keyed by URL name:
+# '<burst>/<s|m|h|d>' allows a burst of that many requests refilled over the period.
+
+RATE_LIMITS = {
+    'posts:toggle_like': '60/m',
+    'posts:add_comment': '20/m',
+    'messaging:detail': '30/m',
+    'friendships:send': '20/h',
+}
+
+# Search (core.search): result ids are cached per normalized query for a short
+# time and paginated; a new post in a matched topic invalidates the entry.
+
+SEARCH_PAGE_SIZE = 20
+SEARCH_MAX_RESULTS = 500
+SEARCH_CACHE_TIMEOUT = 30
+
+# JSON read API (api app, mounted at /api/v1/): cursor-paginated pages of
+# API_PAGE_SIZE rows by default; clients may ask for up to API_MAX_PAGE_SIZE.
+
+API_PAGE_SIZE = 20
+API_MAX_PAGE_SIZE = 100
+
+# Feed ranking (order=relevant): the newest FEED_RELEVANT_CANDIDATES posts are
+# ranked by recency plus log2(1 + affinity); each doubling of the viewer's
+# affinity for an author is worth FEED_AFFINITY_HALF_LIFE seconds of recency.
+
+FEED_RELEVANT_CANDIDATES = 200
+FEED_AFFINITY_HALF_LIFE = 12 * 3600
+FEED_AFFINITY_WEIGHTS = {'like': 1.0, 'comment': 2.0, 'message': 0.5}
+
+# Presence (core.presence): a user is online for PRESENCE_TTL seconds after
+# their last recorded request. Activity is written to the cache at most once
+# per PRESENCE_WRITE_INTERVAL, and Profile.last_seen_at is flushed every
+# PRESENCE_FLUSH_INTERVAL seconds by a background thread and at process exit;
+# a killed process loses at most one interval of last_seen_at updates.
+
+PRESENCE_TTL = 300
+PRESENCE_WRITE_INTERVAL = 60
+PRESENCE_FLUSH_INTERVAL = 300
+
+# User typeahead (core.typeahead): each worker keeps an in-memory index and
+# rebuilds it when the version stamp in the cache changes. The stamp is only
+# seen by other workers through a shared cache (Redis/Memcached); with the
+# per-process LocMemCache a worker picks up signups and renames once its
+# index is TYPEAHEAD_MAX_AGE seconds old.
+
+TYPEAHEAD_MAX_AGE = 60
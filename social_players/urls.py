@@ -25,10 +25,10 @@ urlpatterns = [
     path('users/', include('profiles.urls')),
     path('friends/', include('friendships.urls')),
     path('messages/', include('messaging.urls')),
-    path('search/', include('core.urls')),
+    path('', include('core.urls')),
+    path('api/v1/', include('api.urls')),
     path('admin/', admin.site.urls),
 ]
 
 if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
     urlpatterns += static(settings.STATIC_URL, document_root=settings.STATIC_ROOT)
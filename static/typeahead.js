@@ -0,0 +1,34 @@
+(function () {
+    var input = document.querySelector('[data-autocomplete-url]');
+    if (!input) {
+        return;
+    }
+    var list = document.getElementById(input.getAttribute('list'));
+    var timer = null;
+    var lastQuery = '';
+
+    function render(results) {
+        list.innerHTML = '';
+        results.forEach(function (item) {
+            var option = document.createElement('option');
+            option.value = item.username;
+            option.label = item.display_name;
+            list.appendChild(option);
+        });
+    }
+
+    input.addEventListener('input', function () {
+        var query = input.value.trim();
+        clearTimeout(timer);
+        if (!query || query === lastQuery) {
+            return;
+        }
+        timer = setTimeout(function () {
+            lastQuery = query;
+            fetch(input.dataset.autocompleteUrl + '?q=' + encodeURIComponent(query), {credentials: 'same-origin'})
+                .then(function (response) { return response.ok ? response.json() : {results: []}; })
+                .then(function (data) { render(data.results); })
+                .catch(function () {});
+        }, 80);
+    });
+})();
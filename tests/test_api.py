@@ -0,0 +1,83 @@
+from datetime import timedelta
+
+import pytest
+from django.urls import reverse
+from django.utils import timezone
+
+from friendships.models import Friendship
+from messaging.models import DirectMessage
+from messaging.services import archive_old_messages, get_or_create_conversation
+from posts.models import Like, Post
+
+
+@pytest.mark.django_db
+def test_feed_cursor_pages_with_sparse_fields(create_user, client):
+    reader = create_user("api_reader")
+    friend = create_user("api_friend")
+    Friendship.objects.create(user1=reader, user2=friend)
+    moment = timezone.now()
+    posts = [
+        Post.objects.create(author=friend, content=f"post {i}", created_at=moment - timedelta(minutes=i // 2))
+        for i in range(5)
+    ]
+    Like.objects.create(post=posts[0], user=reader)
+    client.force_login(reader)
+    url = reverse("api:feed")
+
+    first = client.get(url, {"limit": 2, "fields": "id,author,like_count,liked"}).json()
+    assert first["results"][0] == {"id": posts[1].id, "author": "api_friend", "like_count": 0, "liked": False}
+    assert first["results"][1]["liked"] is True
+
+    seen = [row["id"] for row in first["results"]]
+    cursor = first["next"]
+    while cursor:
+        page = client.get(url, {"limit": 2, "fields": "id", "cursor": cursor}).json()
+        seen.extend(row["id"] for row in page["results"])
+        cursor = page["next"]
+    assert seen == [posts[1].id, posts[0].id, posts[3].id, posts[2].id, posts[4].id]
+
+    assert client.get(url, {"fields": "id,password"}).status_code == 400
+    assert client.get(url, {"cursor": "garbage"}).status_code == 400
+    client.logout()
+    assert client.get(url).status_code == 401
+
+
+@pytest.mark.django_db
+def test_profile_reads_denormalized_stats(create_user, client):
+    author = create_user("api_author")
+    Post.objects.create(author=author, content="hello")
+    author.stats.posts = 1
+    author.stats.save()
+
+    data = client.get(reverse("api:profile", args=["api_author"]), {"fields": "username,posts,avatar"}).json()
+    assert data == {"username": "api_author", "posts": 1, "avatar": None}
+    posts = client.get(reverse("api:profile_posts", args=["api_author"]), {"fields": "content"}).json()
+    assert posts == {"results": [{"content": "hello"}], "next": None}
+    assert client.get(reverse("api:profile", args=["nobody"])).status_code == 404
+
+
+@pytest.mark.django_db
+def test_messages_continue_into_archive(create_user, client):
+    alice = create_user("api_alice")
+    bob = create_user("api_bob")
+    Friendship.objects.create(user1=alice, user2=bob)
+    conversation = get_or_create_conversation(alice, bob)
+    start = timezone.now() - timedelta(days=200)
+    for i in range(3):
+        DirectMessage.objects.create(
+            conversation=conversation, sender=alice, content=f"old {i}", created_at=start + timedelta(minutes=i)
+        )
+    DirectMessage.objects.create(conversation=conversation, sender=bob, content="fresh")
+    archive_old_messages(timedelta(days=90), segment_size=2)
+    client.force_login(bob)
+
+    listing = client.get(reverse("api:conversations")).json()
+    assert [(row["id"], row["with"]) for row in listing["results"]] == [(conversation.id, "api_alice")]
+
+    url = reverse("api:messages", args=[conversation.id])
+    live = client.get(url, {"fields": "content,sender"}).json()
+    assert live["results"] == [{"content": "fresh", "sender": "api_bob"}, {"content": "old 2", "sender": "api_alice"}]
+    archived = client.get(url, {"fields": "content", "segment": live["earlier_segment"]}).json()
+    assert archived["results"] == [{"content": "old 1"}, {"content": "old 0"}]
+    assert archived["earlier_segment"] is None
+    assert client.get(url, {"segment": "x"}).status_code == 400
@@ -0,0 +1,90 @@
+import json
+import logging
+import re
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.core.cache import cache
+from django.core.handlers.asgi import ASGIHandler
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core.presence import online_user_ids
+from friendships.models import Friendship
+from messaging.services import get_or_create_conversation, send_message
+from posts.models import Post
+from posts.services import toggle_like
+
+
+@pytest.mark.django_db
+def test_feed_renders_through_async_handler(create_user, async_client):
+    viewer = create_user("async_viewer")
+    friend = create_user("async_friend")
+    Friendship.objects.create(user1=viewer, user2=friend)
+    post = Post.objects.create(author=friend, content="async headshot")
+    toggle_like(post, viewer)
+
+    async_to_sync(async_client.aforce_login)(viewer)
+    response = async_to_sync(async_client.get)(reverse("posts:feed"))
+
+    assert response.status_code == 200
+    html = response.content.decode()
+    assert "async headshot" in html
+    assert "like-btn liked" in html
+
+
+@pytest.mark.django_db
+def test_inbox_renders_through_async_handler(create_user, async_client):
+    alice = create_user("async_alice")
+    bob = create_user("async_bob")
+    Friendship.objects.create(user1=alice, user2=bob)
+    conversation = get_or_create_conversation(alice, bob)
+    send_message(conversation, bob, "gg wp")
+    async_to_sync(async_client.aforce_login)(alice)
+
+    listing = async_to_sync(async_client.get)(reverse("messaging:list"))
+    detail = async_to_sync(async_client.get)(reverse("messaging:detail", args=[conversation.pk]))
+    missing = async_to_sync(async_client.get)(reverse("messaging:detail", args=[conversation.pk + 1]))
+
+    assert "async_bob" in listing.content.decode()
+    assert "gg wp" in detail.content.decode()
+    assert missing.status_code == 404
+
+
+@pytest.mark.django_db
+def test_async_topic_page_is_cached_for_anonymous_visitors(create_user, async_client):
+    author = create_user("async_author")
+    Post.objects.create(author=author, content="async eco round", topic=Post.TOPIC_APEX)
+    url = reverse("posts:topic_posts", args=[Post.TOPIC_APEX])
+
+    first = async_to_sync(async_client.get)(url)
+    assert "async eco round" in first.content.decode()
+    with CaptureQueriesContext(connection) as ctx:
+        cached = async_to_sync(async_client.get)(url)
+    assert cached.content == first.content
+    assert not any('"posts_post"' in query["sql"] for query in ctx.captured_queries)
+
+
+def test_asgi_middleware_stack_needs_no_sync_adapters(caplog):
+    with caplog.at_level(logging.DEBUG, logger="django.request"):
+        ASGIHandler()
+
+    assert not [record.getMessage() for record in caplog.records if "adapted" in record.getMessage()]
+
+
+@pytest.mark.django_db
+def test_async_request_is_timed_profiled_and_marks_presence(create_user, async_client, settings, tmp_path):
+    settings.PROFILER_DIR = tmp_path
+    cache.clear()
+    staff = create_user("async_staff", is_staff=True)
+    async_to_sync(async_client.aforce_login)(staff)
+
+    response = async_to_sync(async_client.get)(reverse("posts:feed"), {"_profile": "1"})
+
+    assert response.status_code == 200
+    assert int(re.search(r'desc="(\d+) queries"', response["Server-Timing"]).group(1)) > 0
+    meta = json.loads((tmp_path / f"{response['X-Profile-Id']}.json").read_text())
+    assert meta["view"] == "posts:feed"
+    assert meta["query_count"] > 0
+    assert online_user_ids([staff.id]) == {staff.id}
@@ -0,0 +1,58 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+
+@pytest.fixture
+def shared_cache(settings, tmp_path):
+    """A cache every process sees, as the cached backend requires; file-based stands in for Redis here."""
+    settings.CACHES = {
+        "default": {"BACKEND": "django.core.cache.backends.filebased.FileBasedCache", "LOCATION": str(tmp_path)}
+    }
+
+
+def _tables_read(queries):
+    return {table for query in queries for table in ("auth_user", "django_session", "profiles_profile") if f'FROM "{table}"' in query["sql"]}
+
+
+@pytest.mark.django_db
+def test_session_and_user_served_from_cache_after_first_request(create_user, client, shared_cache):
+    user = create_user("cached_user")
+    client.force_login(user)
+    client.get(reverse("profiles:edit"))
+
+    with CaptureQueriesContext(connection) as ctx:
+        response = client.get(reverse("profiles:edit"))
+    assert response.status_code == 200
+    assert _tables_read(ctx.captured_queries) == set()
+
+
+@pytest.mark.django_db
+def test_profile_edit_and_password_change_invalidate_cached_user(create_user, client, shared_cache):
+    user = create_user("stale_user")
+    client.force_login(user)
+    client.get(reverse("profiles:edit"))
+
+    client.post(reverse("profiles:edit"), {"display_name": "Fresh Name", "bio": ""})
+    response = client.get(reverse("profiles:edit"))
+    assert response.context["user"].profile.display_name == "Fresh Name"
+
+    user.set_password("another-pass-123")
+    user.save()
+    response = client.get(reverse("profiles:edit"))
+    assert response.status_code == 302
+    assert reverse("accounts:login") in response.url
+
+
+@pytest.mark.django_db
+def test_per_process_cache_reads_user_from_database(create_user, client):
+    user = create_user("local_cache_user")
+    client.force_login(user)
+    client.get(reverse("profiles:edit"))
+
+    # A deactivation saved by another worker never reaches this process's cache.
+    type(user).objects.filter(pk=user.pk).update(is_active=False)
+    response = client.get(reverse("profiles:edit"))
+    assert response.status_code == 302
+    assert reverse("accounts:login") in response.url
@@ -0,0 +1,46 @@
+import pytest
+from django.urls import reverse
+
+from friendships.models import Friendship
+from posts.models import Post
+
+
+@pytest.mark.django_db
+def test_feed_revalidates_until_content_changes(create_user, client):
+    viewer = create_user("etag_viewer")
+    friend = create_user("etag_friend")
+    Friendship.objects.create(user1=viewer, user2=friend)
+    post = Post.objects.create(author=friend, content="first")
+    client.force_login(viewer)
+    url = reverse("posts:feed")
+
+    client.get(url)  # sets the CSRF cookie that is part of the validator
+    first = client.get(url)
+    etag = first["ETag"]
+    assert etag.startswith('W/"')
+
+    cached = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert cached.status_code == 304
+    assert cached.content == b""
+
+    client.force_login(friend)
+    client.post(reverse("posts:toggle_like", args=[post.id]))
+    client.force_login(viewer)
+    assert client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 200
+
+
+@pytest.mark.django_db
+def test_topic_and_profile_pages_return_304_for_anonymous_clients(create_user, client):
+    author = create_user("etag_author")
+    Post.objects.create(author=author, content="clutch", topic=Post.TOPIC_CS2)
+
+    for url in (reverse("posts:topic_posts", args=[Post.TOPIC_CS2]), reverse("profiles:detail", args=[author.username])):
+        client.get(url)
+        etag = client.get(url)["ETag"]
+        assert client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 304
+
+    profile_url = reverse("profiles:detail", args=[author.username])
+    etag = client.get(profile_url)["ETag"]
+    author.profile.display_name = "Renamed"
+    author.profile.save()
+    assert client.get(profile_url, HTTP_IF_NONE_MATCH=etag).status_code == 200
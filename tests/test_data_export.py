@@ -0,0 +1,84 @@
+import io
+import json
+import zipfile
+from datetime import timedelta
+
+import pytest
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.test import override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from core.export import iter_user_export
+from friendships.models import Friendship
+from messaging.models import DirectMessage
+from messaging.services import archive_old_messages, clear_conversation, get_or_create_conversation
+from posts.models import Comment, Like, Post
+
+
+def _lines(archive, name):
+    return [json.loads(line) for line in archive.read(name).decode().splitlines()]
+
+
+@pytest.fixture
+def account(create_user, tmp_path):
+    with override_settings(MEDIA_ROOT=tmp_path):
+        owner = create_user("export_owner")
+        friend = create_user("export_friend")
+        Friendship.objects.create(user1=owner, user2=friend)
+        image = default_storage.save("posts/shot.png", ContentFile(b"png bytes"))
+        for i in range(3):
+            Post.objects.create(author=owner, content=f"post {i}", image=image)
+        Post.objects.create(author=owner, content="gone", is_deleted=True)
+        friend_post = Post.objects.create(author=friend, content="friend post")
+        Comment.objects.create(post=friend_post, author=owner, content="nice")
+        Like.objects.create(post=friend_post, user=owner)
+        conversation = get_or_create_conversation(owner, friend)
+        start = timezone.now() - timedelta(days=200)
+        for i in range(2):
+            DirectMessage.objects.create(
+                conversation=conversation, sender=friend, content=f"old {i}", created_at=start + timedelta(minutes=i)
+            )
+        DirectMessage.objects.create(conversation=conversation, sender=owner, content="recent")
+        archive_old_messages(timedelta(days=90), segment_size=2)
+        yield owner
+
+
+@pytest.mark.django_db
+def test_export_streams_every_table_and_media_once(account, client):
+    client.force_login(account)
+    response = client.get(reverse("core:data_export"))
+
+    assert response.streaming
+    assert response["Content-Disposition"] == 'attachment; filename="export_owner-export.zip"'
+    archive = zipfile.ZipFile(io.BytesIO(b"".join(response.streaming_content)))
+    assert _lines(archive, "profile.jsonl")[0]["user__username"] == "export_owner"
+    assert [row["content"] for row in _lines(archive, "posts.jsonl")] == ["post 0", "post 1", "post 2"]
+    assert [row["content"] for row in _lines(archive, "comments.jsonl")] == ["nice"]
+    assert len(_lines(archive, "likes.jsonl")) == 1
+    assert [row["username"] for row in _lines(archive, "friends.jsonl")] == ["export_friend"]
+    assert [row["content"] for row in _lines(archive, "messages.jsonl")] == ["old 0", "old 1", "recent"]
+    media = [name for name in archive.namelist() if name.startswith("media/")]
+    assert len(media) == 1
+    assert archive.read(media[0]) == b"png bytes"
+
+
+@pytest.mark.django_db
+def test_export_respects_cleared_history_in_small_batches(account):
+    conversation = account.dm_participations.get().conversation
+    clear_conversation(conversation, account)
+
+    archive = zipfile.ZipFile(io.BytesIO(b"".join(iter_user_export(account, batch_size=1))))
+    assert _lines(archive, "messages.jsonl") == []
+    assert len(_lines(archive, "posts.jsonl")) == 3
+
+
+@pytest.mark.django_db
+def test_export_command_writes_archive(account, tmp_path, capsys):
+    output = tmp_path / "out.zip"
+    call_command("export_user_data", "export_owner", "--output", str(output), "--batch-size", "2")
+
+    assert "Wrote" in capsys.readouterr().out
+    assert "posts.jsonl" in zipfile.ZipFile(output).namelist()
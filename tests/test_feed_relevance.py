@@ -0,0 +1,96 @@
+from datetime import timedelta
+
+import pytest
+from django.urls import reverse
+from django.utils import timezone
+
+from friendships.models import Affinity, Friendship
+from messaging.services import get_or_create_conversation, send_message
+from posts.models import Comment, Post
+from posts.services import add_comment, soft_delete_comment, toggle_like
+
+
+def _score(user, target):
+    return Affinity.objects.filter(user=user, target=target).values_list("score", flat=True).first()
+
+
+@pytest.mark.django_db
+def test_interactions_maintain_affinity(create_user):
+    viewer = create_user("aff_viewer")
+    author = create_user("aff_author")
+    Friendship.objects.create(user1=viewer, user2=author)
+    post = Post.objects.create(author=author, content="clip")
+    own_post = Post.objects.create(author=viewer, content="mine")
+
+    toggle_like(post, viewer)
+    comment = add_comment(post, viewer, "nice")
+    add_comment(post, viewer, "again")
+    assert _score(viewer, author) == 5.0
+    toggle_like(post, viewer)
+    # Two requests deleting the same comment, each with its own copy of the row.
+    stale_copy = Comment.objects.get(pk=comment.pk)
+    soft_delete_comment(comment)
+    soft_delete_comment(stale_copy)
+    assert _score(viewer, author) == 2.0
+
+    send_message(get_or_create_conversation(viewer, author), author, "gg")
+    assert _score(viewer, author) == 2.5
+    assert _score(author, viewer) == 0.5
+
+    toggle_like(own_post, viewer)
+    assert _score(viewer, viewer) is None
+
+
+@pytest.mark.django_db
+def test_relevant_order_boosts_close_friends(create_user, client):
+    viewer = create_user("rel_viewer")
+    close = create_user("rel_close")
+    distant = create_user("rel_distant")
+    Friendship.objects.create(user1=viewer, user2=close)
+    Friendship.objects.create(user1=viewer, user2=distant)
+    now = timezone.now()
+    Post.objects.create(author=close, content="close post", created_at=now - timedelta(hours=6))
+    Post.objects.create(author=distant, content="distant post", created_at=now)
+    Post.objects.create(author=close, content="ancient close post", created_at=now - timedelta(days=30))
+    Affinity.objects.create(user=viewer, target=close, score=3)
+    client.force_login(viewer)
+    url = reverse("posts:feed")
+
+    newest = [post.content for post in client.get(url).context["posts"]]
+    assert newest == ["distant post", "close post", "ancient close post"]
+    relevant = client.get(url, {"order": "relevant"})
+    assert relevant.context["selected_order"] == "relevant"
+    assert [post.content for post in relevant.context["posts"]] == ["close post", "distant post", "ancient close post"]
+
+
+@pytest.mark.django_db
+def test_relevant_feed_etag_changes_after_message(create_user, client):
+    viewer = create_user("etag_viewer")
+    friend = create_user("etag_friend")
+    Friendship.objects.create(user1=viewer, user2=friend)
+    Post.objects.create(author=friend, content="clip")
+    conversation = get_or_create_conversation(viewer, friend)
+    send_message(conversation, friend, "first")
+    client.force_login(viewer)
+    url = reverse("posts:feed")
+
+    client.get(url)  # sets the CSRF cookie that is part of the validator
+    etag = client.get(url, {"order": "relevant"})["ETag"]
+    assert client.get(url, {"order": "relevant"}, HTTP_IF_NONE_MATCH=etag).status_code == 304
+    send_message(conversation, friend, "second")
+    refreshed = client.get(url, {"order": "relevant"}, HTTP_IF_NONE_MATCH=etag)
+    assert refreshed.status_code == 200
+    assert refreshed["ETag"] != etag
+
+
+@pytest.mark.django_db
+def test_relevant_order_appends_posts_beyond_candidates(create_user, client, settings):
+    settings.FEED_RELEVANT_CANDIDATES = 2
+    viewer = create_user("cand_viewer")
+    now = timezone.now()
+    for i in range(4):
+        Post.objects.create(author=viewer, content=f"post {i}", created_at=now - timedelta(minutes=i))
+    client.force_login(viewer)
+
+    posts = client.get(reverse("posts:feed"), {"order": "relevant"}).context["posts"]
+    assert [post.content for post in posts] == ["post 0", "post 1", "post 2", "post 3"]
@@ -1,5 +1,4 @@
 import pytest
-from django.core.files.uploadedfile import SimpleUploadedFile
 from django.test import override_settings
 from django.urls import reverse
 
@@ -134,24 +133,15 @@ def _start_conversation(client, user1, user2):
     return conversation
 
 
-def _make_test_image(name="dm.png"):
-    png_bytes = (
-        b"\x89PNG\r\n\x1a\n\x00\x00\x00\rIHDR\x00\x00\x00\x01\x00\x00\x00\x01"
-        b"\x08\x02\x00\x00\x00\x90wS\xde\x00\x00\x00\x0bIDAT\x08\xd7c``\x00\x00"
-        b"\x00\x02\x00\x01\xe2!\xbc3\x00\x00\x00\x00IEND\xaeB`\x82"
-    )
-    return SimpleUploadedFile(name, png_bytes, content_type="image/png")
-
-
 @pytest.mark.django_db
-def test_direct_message_with_photo(create_user, client, tmp_path):
+def test_direct_message_with_photo(create_user, client, tmp_path, make_test_image):
     user1 = create_user("iris")
     user2 = create_user("jack")
     with override_settings(MEDIA_ROOT=tmp_path):
         conversation = _start_conversation(client, user1, user2)
         detail_url = reverse("messaging:detail", args=[conversation.id])
         message = DirectMessage.objects.create(
-            conversation=conversation, sender=user1, content="Look at this", image=_make_test_image()
+            conversation=conversation, sender=user1, content="Look at this", image=make_test_image()
         )
 
         response = client.get(detail_url)
@@ -162,13 +152,13 @@ def test_direct_message_with_photo(create_user, client, tmp_path):
 
 
 @pytest.mark.django_db
-def test_direct_message_photo_only_shows_photo_label(create_user, client, tmp_path):
+def test_direct_message_photo_only_shows_photo_label(create_user, client, tmp_path, make_test_image):
     user1 = create_user("kyle")
     user2 = create_user("lena")
     with override_settings(MEDIA_ROOT=tmp_path):
         conversation = _start_conversation(client, user1, user2)
         DirectMessage.objects.create(
-            conversation=conversation, sender=user1, content="", image=_make_test_image("photo-only.png")
+            conversation=conversation, sender=user1, content="", image=make_test_image("photo-only.png")
         )
 
         list_html = client.get(reverse("messaging:list")).content.decode()
@@ -0,0 +1,47 @@
+import pytest
+from django.db import IntegrityError, transaction
+
+from friendships.models import FriendRequest
+from friendships.services import are_friends, send_friend_request
+
+
+@pytest.mark.django_db
+def test_duplicate_pending_requests_are_rejected(create_user):
+    alice = create_user("fr_alice")
+    bob = create_user("fr_bob")
+    send_friend_request(alice, bob)
+
+    with pytest.raises(ValueError, match="pending friend request already exists"):
+        send_friend_request(alice, bob)
+    assert FriendRequest.objects.filter(status=FriendRequest.STATUS_PENDING).count() == 1
+
+
+@pytest.mark.django_db
+def test_constraint_covers_both_directions(create_user):
+    alice = create_user("fr_carol")
+    bob = create_user("fr_dave")
+    FriendRequest.objects.create(from_user=alice, to_user=bob)
+
+    with pytest.raises(IntegrityError), transaction.atomic():
+        FriendRequest.objects.create(from_user=bob, to_user=alice)
+    # Answered requests do not block a new one.
+    FriendRequest.objects.update(status=FriendRequest.STATUS_REJECTED)
+    FriendRequest.objects.create(from_user=bob, to_user=alice)
+
+
+@pytest.mark.django_db
+def test_reverse_request_is_accepted(create_user, client):
+    alice = create_user("fr_erin")
+    bob = create_user("fr_frank")
+    incoming = send_friend_request(alice, bob)
+
+    client.force_login(bob)
+    response = client.post(f"/friends/send/{alice.id}/", follow=True)
+
+    incoming.refresh_from_db()
+    assert incoming.status == FriendRequest.STATUS_ACCEPTED
+    assert are_friends(alice, bob)
+    assert FriendRequest.objects.count() == 1
+    assert "You are now friends with fr_erin." in response.content.decode()
+    with pytest.raises(ValueError, match="already friends"):
+        send_friend_request(bob, alice)
@@ -0,0 +1,93 @@
+import os
+import time
+from datetime import timedelta
+
+import pytest
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.test import override_settings
+from django.utils import timezone
+
+from core.models import MediaBlob
+from posts.models import ArchivedPost, Post
+from posts.services import archive_soft_deleted_content, soft_delete_post
+from profiles.models import Profile
+
+
+def _age(path, hours=48):
+    old = time.time() - hours * 3600
+    os.utime(path, (old, old))
+
+
+@pytest.fixture
+def media(create_user, tmp_path):
+    author = create_user("gc_author")
+    with override_settings(MEDIA_ROOT=tmp_path):
+        live = Post.objects.create(author=author, content="live", image=ContentFile(b"live", name="a.png"))
+        deleted = Post.objects.create(
+            author=author, content="gone", image=ContentFile(b"deleted", name="b.png"), is_deleted=True
+        )
+        profile = Profile.objects.get(user=author)
+        profile.avatar = ContentFile(b"old avatar", name="old.png")
+        profile.save()
+        replaced = profile.avatar.name
+        profile.avatar = ContentFile(b"new avatar", name="new.png")
+        profile.save()
+        fresh = default_storage.save("posts/fresh.png", ContentFile(b"upload in flight"))
+        for name in (live.image.name, deleted.image.name, replaced, profile.avatar.name):
+            _age(tmp_path / name)
+        yield tmp_path, {"live": live.image.name, "deleted": deleted.image.name, "replaced": replaced, "fresh": fresh}
+
+
+@pytest.mark.django_db
+def test_dry_run_reports_without_touching_files(media, capsys):
+    root, names = media
+    call_command("gc_media", "--dry-run", verbosity=2)
+    out = capsys.readouterr().out
+
+    assert names["replaced"] in out
+    assert names["live"] not in out
+    assert "Found 1 unreferenced files" in out
+    assert all((root / name).exists() for name in names.values())
+
+
+@pytest.mark.django_db
+def test_collects_orphans_and_keeps_recent_uploads(media, capsys):
+    root, names = media
+    call_command("gc_media", "--batch-size", "2")
+
+    assert not (root / names["replaced"]).exists()
+    assert not MediaBlob.objects.filter(name=names["replaced"]).exists()
+    assert (root / names["live"]).exists()
+    assert (root / names["deleted"]).exists()
+    assert (root / names["fresh"]).exists()
+
+
+@pytest.mark.django_db
+def test_quarantine_soft_deleted_references(media):
+    root, names = media
+    call_command("gc_media", "--quarantine", "--ignore-soft-deleted")
+
+    assert not (root / names["deleted"]).exists()
+    quarantined = {path.name for path in (root / ".quarantine").rglob("*") if path.is_file()}
+    assert quarantined == {names["deleted"].rsplit("/", 1)[1], names["replaced"].rsplit("/", 1)[1]}
+
+
+@pytest.mark.django_db
+def test_archived_post_images_are_kept(create_user, tmp_path):
+    author = create_user("gc_archivist")
+    with override_settings(MEDIA_ROOT=tmp_path):
+        post = Post.objects.create(author=author, content="old", image=ContentFile(b"archived", name="c.png"))
+        name = post.image.name
+        soft_delete_post(post)
+        Post.objects.filter(pk=post.pk).update(deleted_at=timezone.now() - timedelta(days=40))
+        archive_soft_deleted_content(timedelta(days=30))
+        _age(tmp_path / name)
+        assert ArchivedPost.objects.get(pk=post.pk).image == name
+
+        call_command("gc_media")
+        assert (tmp_path / name).exists()
+
+        call_command("gc_media", "--ignore-soft-deleted")
+        assert not (tmp_path / name).exists()
@@ -0,0 +1,70 @@
+import asyncio
+import json
+
+import pytest
+from django.contrib.auth import get_user_model
+
+from core.loadtest import Recorder, replay_records, run_load, seed_users
+from core.typeahead import user_index
+from friendships.models import FriendRequest
+from profiles.services import get_profile_stats, repair_profile_stats
+
+User = get_user_model()
+
+
+@pytest.mark.django_db(transaction=True)
+def test_scenarios_run_against_live_server(live_server):
+    users = seed_users(2, posts_per_user=2, pending_requests=1)
+    recorder = asyncio.run(run_load(live_server.url, users, concurrency=2, duration=1.5, seed=1))
+
+    report = recorder.summary()
+    assert report["*"]["error_rate"] == 0
+    assert report["accounts:login"]["count"] == 4
+    assert report["posts:feed"]["count"] > 0 or report["posts:toggle_like"]["count"] > 0
+    if "friendships:accept" in report:
+        assert FriendRequest.objects.filter(status=FriendRequest.STATUS_ACCEPTED).exists()
+
+
+@pytest.mark.django_db(transaction=True)
+def test_replay_uses_logged_get_requests(live_server):
+    users = seed_users(2, posts_per_user=1, pending_requests=0)
+    lines = [
+        json.dumps({"view": "posts:feed", "method": "GET", "path": "/"}),
+        json.dumps({"view": "posts:add_comment", "method": "POST", "path": "/posts/1/comment/"}),
+        json.dumps({"method": "GET", "path": "/users/loadtest_1/"}),
+        json.dumps({"view": "posts:feed", "method": "GET"}),
+        "not json",
+    ]
+    steps = list(replay_records(lines))
+    assert steps == [("posts:feed", "/"), ("profiles:detail", "/users/loadtest_1/")]
+
+    recorder = asyncio.run(run_load(live_server.url, users, replay=iter(steps), concurrency=1, duration=5))
+    report = recorder.summary()
+    assert report["posts:feed"]["count"] == 1
+    assert report["profiles:detail"]["count"] == 1
+    assert report["*"]["error_rate"] == 0
+
+
+@pytest.mark.django_db
+def test_seeded_users_have_consistent_stats_and_index():
+    users = seed_users(3, posts_per_user=2, pending_requests=2)
+    seed_users(3, posts_per_user=2, pending_requests=2)
+
+    stats = get_profile_stats(User.objects.get(username=users[0]["username"]))
+    assert (stats.posts, stats.friends) == (2, 2)
+    assert repair_profile_stats() == 0
+    assert {name for name, _ in user_index.search("loadtest_")} >= {user["username"] for user in users}
+
+
+def test_summary_percentiles_and_error_rate():
+    recorder = Recorder()
+    for ms in range(1, 101):
+        recorder.add("posts:feed", ms / 1000, 200)
+    recorder.add("posts:feed", 0.5, 500)
+    recorder.add("posts:toggle_like", 0.01, 429)
+
+    report = recorder.summary()
+    assert report["posts:feed"]["p50_ms"] == 51.0
+    assert report["posts:feed"]["error_rate"] == round(1 / 101, 4)
+    assert report["posts:toggle_like"]["throttled"] == 1
+    assert report["*"]["count"] == 102
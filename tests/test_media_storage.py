@@ -0,0 +1,72 @@
+import io
+
+import pytest
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.files.storage import default_storage
+from django.test import override_settings
+from PIL import Image
+
+from core.models import MediaBlob
+from posts.models import Post
+
+
+def _make_upload(name):
+    buffer = io.BytesIO()
+    Image.new("RGB", (2, 2), "red").save(buffer, format="PNG")
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type="image/png")
+
+
+@pytest.fixture
+def media_root(tmp_path):
+    with override_settings(MEDIA_ROOT=tmp_path):
+        yield tmp_path
+
+
+def test_identical_content_is_stored_once(media_root):
+    first = default_storage.save("posts/meme.PNG", ContentFile(b"same bytes"))
+    second = default_storage.save("avatars/other.png", ContentFile(b"same bytes"))
+    third = default_storage.save("posts/meme.png", ContentFile(b"different"))
+
+    assert first == second
+    assert first.startswith("blobs/") and first.endswith(".png")
+    assert third != first
+    blobs = [path for path in media_root.rglob("*") if path.is_file()]
+    assert len(blobs) == 2
+
+
+@pytest.mark.django_db
+def test_uploads_share_a_blob_and_are_reference_counted(create_user, client, media_root):
+    names = []
+    for username in ("cas_alice", "cas_bob"):
+        client.force_login(create_user(username))
+        response = client.post(
+            "/",
+            {"content": "gg", "topic": Post.TOPIC_CS2, "image": _make_upload("shot.png")},
+        )
+        assert response.status_code == 302
+        names.append(Post.objects.get(author__username=username).image.name)
+
+    assert names[0] == names[1]
+    assert not list(media_root.rglob(".incoming-*"))
+    assert MediaBlob.objects.get(name=names[0]).ref_count == 2
+
+    Post.objects.filter(author__username="cas_alice").get().delete()
+    assert MediaBlob.objects.get(name=names[0]).ref_count == 1
+
+
+@pytest.mark.django_db
+def test_removing_an_avatar_keeps_the_shared_blob(create_user, client, media_root, make_test_image):
+    user = create_user("cas_carol")
+    author = create_user("cas_dave")
+    post = Post.objects.create(author=author, content="pic", image=make_test_image())
+    profile = user.profile
+    profile.avatar = post.image.name
+    profile.save()
+    assert MediaBlob.objects.get(name=post.image.name).ref_count == 2
+
+    client.force_login(user)
+    client.post("/users/edit/", {"remove_avatar": "1"})
+
+    assert (media_root / post.image.name).exists()
+    assert MediaBlob.objects.get(name=post.image.name).ref_count == 1
@@ -0,0 +1,112 @@
+from datetime import timedelta
+
+import pytest
+from django.core.management import call_command
+from django.test import override_settings
+from django.utils import timezone
+
+from core.models import MediaBlob
+from friendships.models import Friendship
+from messaging.models import ArchivedMessageSegment, DirectMessage
+from messaging.services import _archive_segment, clear_conversation, get_or_create_conversation
+
+
+@pytest.fixture
+def chat(create_user):
+    alice = create_user("archive_alice")
+    bob = create_user("archive_bob")
+    Friendship.objects.create(user1=alice, user2=bob)
+    conversation = get_or_create_conversation(alice, bob)
+    start = timezone.now() - timedelta(days=200)
+    for i in range(5):
+        DirectMessage.objects.create(
+            conversation=conversation,
+            sender=alice if i % 2 == 0 else bob,
+            content=f"old message {i}",
+            created_at=start + timedelta(minutes=i),
+        )
+    DirectMessage.objects.create(conversation=conversation, sender=bob, content="fresh message")
+    return conversation, alice, bob
+
+
+@pytest.mark.django_db
+def test_old_messages_move_to_full_segments(chat, capsys):
+    conversation, alice, bob = chat
+    call_command("archive_messages", "--segment-size", "2")
+
+    assert "Archived 4 messages." in capsys.readouterr().out
+    assert ArchivedMessageSegment.objects.filter(conversation=conversation).count() == 2
+    assert list(conversation.messages.values_list("content", flat=True)) == ["old message 4", "fresh message"]
+
+
+@pytest.mark.django_db
+def test_segment_of_messages_deleted_meanwhile_is_skipped(chat):
+    conversation, alice, bob = chat
+    message_ids = list(conversation.messages.values_list("pk", flat=True)[:2])
+    DirectMessage.objects.filter(pk__in=message_ids).delete()
+
+    assert _archive_segment(conversation.pk, message_ids) == 0
+    assert not ArchivedMessageSegment.objects.exists()
+
+
+@pytest.mark.django_db
+def test_conversation_pages_back_into_archive(chat, client):
+    conversation, alice, bob = chat
+    call_command("archive_messages", "--segment-size", "2")
+    older, newer = ArchivedMessageSegment.objects.filter(conversation=conversation).order_by("pk")
+    client.force_login(alice)
+    url = f"/messages/{conversation.pk}/"
+
+    live = client.get(url).content.decode()
+    assert "fresh message" in live and "old message 3" not in live
+    assert f"?segment={newer.pk}" in live
+
+    archived = client.get(url, {"segment": newer.pk}).content.decode()
+    assert "old message 2" in archived and "old message 3" in archived
+    assert f"?segment={older.pk}" in archived
+    assert client.get(url, {"segment": "nope"}).status_code == 404
+
+    # Clearing hides archived history too; whole segments before the watermark are skipped.
+    conversation.participants.filter(user=alice).update(cleared_before=older.last_created_at)
+    assert client.get(url, {"segment": older.pk}).status_code == 404
+    assert f"?segment={older.pk}" not in client.get(url, {"segment": newer.pk}).content.decode()
+
+
+@pytest.mark.django_db
+def test_clearing_a_conversation_hides_history_for_one_participant(chat, client, create_user):
+    conversation, alice, bob = chat
+    url = f"/messages/{conversation.pk}/"
+    client.force_login(alice)
+    client.post(f"/messages/{conversation.pk}/clear/")
+
+    assert conversation.participants.get(user=alice).is_deleted
+    assert "fresh message" not in client.get(url).content.decode()
+    client.force_login(bob)
+    assert "fresh message" in client.get(url).content.decode()
+
+    client.post(url, {"content": "are you there?"})
+    client.force_login(alice)
+    page = client.get(url).content.decode()
+    assert "are you there?" in page and "fresh message" not in page
+    with pytest.raises(PermissionError):
+        clear_conversation(conversation, create_user("archive_outsider"))
+
+
+@pytest.mark.django_db
+def test_archived_photos_stay_referenced_and_viewable(chat, client, tmp_path, make_test_image):
+    conversation, alice, bob = chat
+    with override_settings(MEDIA_ROOT=tmp_path):
+        photo = DirectMessage.objects.create(
+            conversation=conversation,
+            sender=alice,
+            image=make_test_image("old.png"),
+            created_at=timezone.now() - timedelta(days=300),
+        )
+        call_command("archive_messages", "--segment-size", "3")
+        assert not DirectMessage.objects.filter(pk=photo.pk).exists()
+        assert MediaBlob.objects.get(name=photo.image.name).ref_count == 1
+
+        client.force_login(bob)
+        assert client.get(photo.image.url).status_code == 200
+        call_command("gc_media", "--grace-hours", "0")
+        assert (tmp_path / photo.image.name).exists()
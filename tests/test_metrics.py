@@ -0,0 +1,83 @@
+import json
+import os
+import re
+
+import pytest
+from django.urls import reverse
+
+from core.metrics import collect, render_exposition
+from friendships.models import Friendship
+from posts.models import Post
+
+
+def _sample(body, line_prefix):
+    for line in body.splitlines():
+        if line.startswith(line_prefix + " "):
+            return float(line.rsplit(" ", 1)[1])
+    return 0.0
+
+
+@pytest.mark.django_db
+def test_metrics_endpoint_aggregates_requests_and_domain_counters(create_user, client, settings, tmp_path):
+    settings.METRICS_DIR = tmp_path
+    author = create_user("metrics_author")
+    fan = create_user("metrics_fan")
+    Friendship.objects.create(user1=author, user2=fan)
+    post = Post.objects.create(author=author, content="gg")
+
+    before = client.get(reverse("core:metrics")).content.decode()
+    client.force_login(fan)
+    client.get(reverse("posts:feed"))
+    client.post(reverse("posts:toggle_like", args=[post.id]))
+    client.logout()
+    after = client.get(reverse("core:metrics")).content.decode()
+
+    assert "# TYPE http_request_duration_seconds histogram" in after
+    feed_count = 'http_request_duration_seconds_count{view="posts:feed"}'
+    assert _sample(after, feed_count) == _sample(before, feed_count) + 1
+    like_key = 'likes_toggled_total{action="like"}'
+    assert _sample(after, like_key) == _sample(before, like_key) + 1
+    assert _sample(after, "db_up") == 1
+    assert re.search(r'db_queries_total\{view="posts:feed"\} \d+', after)
+    assert list(tmp_path.glob("metrics-*.json"))
+
+
+@pytest.mark.django_db
+def test_metrics_endpoint_rejects_remote_clients(client, settings, tmp_path):
+    settings.METRICS_DIR = tmp_path
+    response = client.get(reverse("core:metrics"), REMOTE_ADDR="203.0.113.7")
+    assert response.status_code == 403
+
+
+def _snapshot(path, pid, started, likes, in_progress=0):
+    path.write_text(
+        json.dumps(
+            {
+                "pid": pid,
+                "started": started,
+                "counters": [["likes_toggled_total", {"action": "like"}, likes]],
+                "gauges": [["http_requests_in_progress", {}, in_progress]],
+                "histograms": [],
+            }
+        ),
+        encoding="utf-8",
+    )
+
+
+@pytest.mark.django_db
+def test_dead_and_superseded_snapshots_are_folded(settings, tmp_path):
+    settings.METRICS_DIR = tmp_path
+    dead_pid = next(pid for pid in range(4_000_000, 4_100_000) if not os.path.exists(f"/proc/{pid}"))
+    _snapshot(tmp_path / f"metrics-{dead_pid}-1.json", dead_pid, 1, 3, in_progress=5)
+    # An earlier process that had the current pid before it was reused.
+    _snapshot(tmp_path / f"metrics-{os.getpid()}-1.json", os.getpid(), 1, 4, in_progress=7)
+    _snapshot(tmp_path / f"metrics-{os.getpid()}-2.json", os.getpid(), 2, 1, in_progress=1)
+
+    for _ in range(2):
+        body = render_exposition(*collect())
+        assert _sample(body, 'likes_toggled_total{action="like"}') == 8
+        assert _sample(body, "http_requests_in_progress") == 1
+    assert sorted(path.name for path in tmp_path.glob("metrics-*.json")) == [
+        f"metrics-{os.getpid()}-2.json",
+        "metrics-archived.json",
+    ]
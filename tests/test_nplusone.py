@@ -0,0 +1,35 @@
+import pytest
+from django.urls import reverse
+
+from core.nplusone import NPlusOneError, detect_nplusone
+from friendships.models import Friendship
+from posts.models import Comment, Post
+
+
+@pytest.mark.django_db
+def test_detector_groups_repeated_lazy_loads_by_call_site(create_user):
+    author = create_user("lazy_author")
+    for i in range(6):
+        Post.objects.create(author=author, content=f"post {i}")
+
+    with pytest.raises(NPlusOneError) as excinfo:
+        with detect_nplusone("loop", threshold=5, raise_errors=True):
+            for post in Post.objects.all():
+                post.author.username
+    message = str(excinfo.value)
+    assert "6x at tests/test_nplusone.py" in message
+    assert '"auth_user"' in message
+
+
+@pytest.mark.django_db
+def test_feed_has_no_nplusone_queries(create_user, client, nplusone):
+    viewer = create_user("np_viewer")
+    friends = [create_user(f"np_friend{i}") for i in range(6)]
+    for friend in friends:
+        Friendship.objects.create(user1=viewer, user2=friend)
+        post = Post.objects.create(author=friend, content="hello")
+        Comment.objects.create(post=post, author=viewer, content="hi")
+    client.force_login(viewer)
+
+    response = client.get(reverse("posts:feed"))
+    assert response.status_code == 200
@@ -0,0 +1,38 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import Post
+
+
+@pytest.mark.django_db
+def test_anonymous_topic_page_cached_until_topic_changes(create_user, client):
+    author = create_user("cache_author")
+    Post.objects.create(author=author, content="ace round", topic=Post.TOPIC_VALORANT)
+    url = reverse("posts:topic_posts", args=[Post.TOPIC_VALORANT])
+
+    first = client.get(url)
+    assert "ace round" in first.content.decode()
+    assert "Cookie" in first["Vary"]
+    with CaptureQueriesContext(connection) as ctx:
+        cached = client.get(url)
+    assert cached.content == first.content
+    assert not any('"posts_post"' in query["sql"] for query in ctx.captured_queries)
+
+    Post.objects.create(author=author, content="clutch defuse", topic=Post.TOPIC_VALORANT)
+    assert "clutch defuse" in client.get(url).content.decode()
+
+
+@pytest.mark.django_db
+def test_logged_in_visitors_bypass_page_cache(create_user, client):
+    author = create_user("cache_owner")
+    url = reverse("profiles:detail", args=[author.username])
+    Post.objects.create(author=author, content="hello")
+    anonymous_html = client.get(url).content.decode()
+    assert "Log in to like or comment." in anonymous_html
+
+    client.force_login(author)
+    own_html = client.get(url).content.decode()
+    assert "Edit profile" in own_html
+    assert "Edit profile" not in anonymous_html
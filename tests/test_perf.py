@@ -0,0 +1,41 @@
+import json
+
+import pytest
+from django.core.management import call_command
+from django.urls import reverse
+
+from core.perf import flush_request_logs
+
+
+@pytest.mark.django_db
+def test_server_timing_header_and_request_log(create_user, client, settings, tmp_path):
+    log_path = tmp_path / "perf.jsonl"
+    settings.PERF_LOG_PATH = log_path
+    user = create_user("perf_user")
+    client.force_login(user)
+
+    response = client.get(reverse("posts:feed"))
+    assert response.status_code == 200
+    timing = response["Server-Timing"]
+    assert "total;dur=" in timing and "db;dur=" in timing and "tpl;dur=" in timing
+
+    flush_request_logs()
+    record = json.loads(log_path.read_text().strip().splitlines()[-1])
+    assert record["view"] == "posts:feed"
+    assert record["status"] == 200
+    assert record["db_count"] > 0
+    assert record["tpl_ms"] > 0
+    assert record["bytes"] == len(response.content)
+
+
+@pytest.mark.django_db
+def test_perf_report_aggregates_per_view(settings, tmp_path, capsys):
+    log_path = tmp_path / "perf.jsonl"
+    settings.PERF_LOG_PATH = log_path
+    lines = [{"view": "posts:feed", "total_ms": float(ms), "db_count": 3, "db_ms": 1.0} for ms in range(1, 101)]
+    log_path.write_text("\n".join(json.dumps(line) for line in lines) + "\n")
+
+    call_command("perf_report")
+    out = capsys.readouterr().out
+    row = next(line for line in out.splitlines() if line.startswith("posts:feed"))
+    assert row.split()[1:5] == ["100", "50.0", "95.0", "99.0"]
@@ -0,0 +1,63 @@
+import threading
+
+import pytest
+from django.core.cache import cache
+from django.urls import reverse
+
+from core.presence import PresenceTracker, online_user_ids
+from friendships.models import Friendship
+from profiles.models import Profile
+
+
+@pytest.fixture(autouse=True)
+def clear_presence():
+    cache.clear()
+    yield
+    cache.clear()
+
+
+@pytest.mark.django_db
+def test_touch_writes_once_per_interval_and_flushes_coarse_last_seen(create_user):
+    user = create_user("presence_user")
+    idle = create_user("presence_idle")
+    tracker = PresenceTracker()
+
+    assert tracker.touch(user.id, now=1_800_000_030.5) is True
+    assert tracker.touch(user.id, now=1_800_000_040.0) is False
+    assert online_user_ids([user.id, idle.id]) == {user.id}
+    assert Profile.objects.get(user=user).last_seen_at is None
+
+    assert tracker.flush() == 1
+    assert Profile.objects.get(user=user).last_seen_at.timestamp() == 1_800_000_000
+    assert tracker.pending == 0
+
+
+def test_buffered_writes_flush_without_further_traffic(settings, monkeypatch):
+    settings.PRESENCE_FLUSH_INTERVAL = 0.01
+    tracker = PresenceTracker()
+    flushed = threading.Event()
+    monkeypatch.setattr(tracker, "flush", flushed.set)
+
+    try:
+        assert tracker.touch(42) is True
+        assert flushed.wait(timeout=5)
+    finally:
+        tracker.stop()
+        tracker.discard()
+
+
+@pytest.mark.django_db
+def test_friends_list_shows_online_friends(create_user, client):
+    viewer = create_user("presence_viewer")
+    online = create_user("presence_online")
+    offline = create_user("presence_offline")
+    Friendship.objects.create(user1=viewer, user2=online)
+    Friendship.objects.create(user1=viewer, user2=offline)
+
+    client.force_login(online)
+    client.get(reverse("friendships:list"))
+    client.force_login(viewer)
+    response = client.get(reverse("friendships:list"))
+
+    assert response.context["online_ids"] == {online.id}
+    assert response.content.decode().count('class="presence-dot"') == 1
@@ -0,0 +1,58 @@
+import pytest
+from django.core.management import call_command
+
+from friendships.models import FriendRequest, Friendship
+from friendships.services import accept_friend_request, cancel_friend_request, remove_friendship, send_friend_request
+from posts.models import Post
+from posts.services import publish_post, soft_delete_post, toggle_like
+from profiles.models import ProfileStats
+
+
+def _stats(user):
+    row = ProfileStats.objects.get(user=user)
+    return row.friends, row.followers, row.posts, row.likes_received
+
+
+@pytest.mark.django_db
+def test_services_keep_stats_current(create_user):
+    alice = create_user("stats_alice")
+    bob = create_user("stats_bob")
+    carol = create_user("stats_carol")
+
+    request = send_friend_request(bob, alice)
+    cancelled = send_friend_request(carol, alice)
+    assert _stats(alice) == (0, 2, 0, 0)
+    cancel_friend_request(cancelled)
+    accept_friend_request(request)
+    assert _stats(alice) == (1, 1, 0, 0)
+    assert _stats(bob) == (1, 0, 0, 0)
+
+    post = publish_post(Post(content="gg"), alice)
+    toggle_like(post, bob)
+    toggle_like(post, carol)
+    toggle_like(post, carol)
+    assert _stats(alice) == (1, 1, 1, 1)
+
+    soft_delete_post(post)
+    remove_friendship(alice, bob)
+    assert _stats(alice) == (0, 1, 0, 0)
+    assert _stats(bob) == (0, 0, 0, 0)
+
+
+@pytest.mark.django_db
+def test_repair_recomputes_drifted_rows(create_user, client, capsys):
+    alice = create_user("stats_dave")
+    bob = create_user("stats_erin")
+    Friendship.objects.create(user1=alice, user2=bob)
+    FriendRequest.objects.create(from_user=bob, to_user=alice, status=FriendRequest.STATUS_ACCEPTED)
+    Post.objects.create(author=alice, content="written outside the services")
+
+    call_command("repair_profile_stats", "--batch-size", "1")
+    assert "Repaired 2 profile stats rows." in capsys.readouterr().out
+    assert _stats(alice) == (1, 1, 1, 0)
+    assert _stats(bob) == (1, 0, 0, 0)
+
+    page = client.get(f"/users/{alice.username}/").content.decode()
+    assert '<span class="label">Posts</span>' in page
+    call_command("repair_profile_stats")
+    assert "Repaired 0 profile stats rows." in capsys.readouterr().out
@@ -0,0 +1,37 @@
+import json
+
+import pytest
+from django.urls import reverse
+
+
+@pytest.mark.django_db
+def test_staff_can_profile_request_and_download_results(create_user, client, settings, tmp_path):
+    settings.PROFILER_DIR = tmp_path
+    staff = create_user("staffer", is_staff=True)
+    client.force_login(staff)
+
+    response = client.get(reverse("posts:feed"), {"_profile": "1"})
+    assert response.status_code == 200
+    profile_id = response["X-Profile-Id"]
+
+    sql_response = client.get(reverse("core:profile_download", args=[profile_id, "sql"]))
+    assert sql_response.status_code == 200
+    meta = json.loads(b"".join(sql_response.streaming_content))
+    assert meta["view"] == "posts:feed"
+    assert meta["query_count"] == len(meta["queries"]) > 0
+    assert any("posts/views.py" in frame for query in meta["queries"] for frame in query["stack"])
+
+    listing = client.get(reverse("core:profiles"))
+    assert profile_id in listing.content.decode()
+    assert client.get(reverse("core:profile_download", args=[profile_id, "prof"])).status_code == 200
+
+
+@pytest.mark.django_db
+def test_profiling_ignored_for_regular_users(create_user, client, settings, tmp_path):
+    settings.PROFILER_DIR = tmp_path
+    client.force_login(create_user("regular"))
+
+    response = client.get(reverse("posts:feed"), HTTP_X_PROFILE="1")
+    assert "X-Profile-Id" not in response
+    assert list(tmp_path.iterdir()) == []
+    assert client.get(reverse("core:profiles")).status_code == 302
@@ -0,0 +1,63 @@
+import pytest
+from django.test import override_settings
+
+from friendships.models import Friendship
+from messaging.models import DirectConversation, DirectConversationParticipant, DirectMessage
+from posts.models import Comment, Post
+
+
+@pytest.fixture
+def dm_photo(create_user, tmp_path, make_test_image):
+    sender = create_user("media_sender")
+    recipient = create_user("media_recipient")
+    Friendship.objects.create(user1=sender, user2=recipient)
+    conversation = DirectConversation.objects.create(created_by=sender)
+    for user in (sender, recipient):
+        DirectConversationParticipant.objects.create(conversation=conversation, user=user)
+    with override_settings(MEDIA_ROOT=tmp_path):
+        message = DirectMessage.objects.create(
+            conversation=conversation, sender=sender, image=make_test_image("secret.png")
+        )
+        yield message, recipient
+
+
+@pytest.mark.django_db
+def test_dm_photo_visible_only_to_participants(dm_photo, create_user, client):
+    message, recipient = dm_photo
+    url = message.image.url
+
+    assert client.get(url).status_code == 404
+    client.force_login(create_user("media_stranger"))
+    assert client.get(url).status_code == 404
+
+    client.force_login(recipient)
+    response = client.get(url)
+    assert response.status_code == 200
+    assert response["Content-Type"] == "image/png"
+    assert b"".join(response.streaming_content).startswith(b"\x89PNG")
+
+
+@pytest.mark.django_db
+def test_nginx_gets_x_accel_redirect_instead_of_bytes(dm_photo, client):
+    message, recipient = dm_photo
+    client.force_login(recipient)
+    response = client.get(message.image.url, HTTP_X_SENDFILE_TYPE="X-Accel-Redirect")
+    assert response.status_code == 200
+    assert response["X-Accel-Redirect"] == f"/protected-media/{message.image.name}"
+    assert response.content == b""
+    assert "private" in response["Cache-Control"]
+
+
+@pytest.mark.django_db
+def test_attachments_follow_post_visibility(create_user, client, tmp_path, make_test_image):
+    author = create_user("media_author")
+    with override_settings(MEDIA_ROOT=tmp_path):
+        post = Post.objects.create(author=author, content="clip")
+        comment = Comment.objects.create(post=post, author=author, content="log", attachment=make_test_image("log.txt"))
+        response = client.get(comment.attachment.url)
+        assert response.status_code == 200
+        assert response["Content-Disposition"].startswith("attachment;")
+
+        post.is_deleted = True
+        post.save()
+        assert client.get(comment.attachment.url).status_code == 404
@@ -0,0 +1,48 @@
+import pytest
+from django.core.cache import cache
+from django.urls import reverse
+
+from core.ratelimit import consume, parse_rate
+from posts.models import Like, Post
+
+
+@pytest.fixture(autouse=True)
+def clear_buckets():
+    cache.clear()
+    yield
+    cache.clear()
+
+
+def test_token_bucket_allows_burst_then_refills():
+    rate = parse_rate("3/m")
+    start = 1000.0
+    assert [consume("bucket", rate, now=start)[0] for _ in range(3)] == [True, True, True]
+    assert consume("bucket", rate, now=start) == (False, 20)
+    # The rejected attempt gave its token back: one token is due 20 seconds in.
+    assert consume("bucket", rate, now=start + 20)[0]
+    assert not consume("bucket", rate, now=start + 21)[0]
+
+
+def test_parse_rate_rejects_garbage():
+    with pytest.raises(ValueError):
+        parse_rate("often")
+
+
+@pytest.mark.django_db
+def test_writes_over_the_limit_get_429(create_user, client, settings):
+    settings.RATE_LIMITS = {"posts:toggle_like": "2/m"}
+    author = create_user("limit_author")
+    fan = create_user("limit_fan")
+    post = Post.objects.create(author=author, content="spam me")
+    client.force_login(fan)
+    url = reverse("posts:toggle_like", args=[post.id])
+
+    assert [client.post(url).status_code for _ in range(2)] == [302, 302]
+    response = client.post(url)
+    assert response.status_code == 429
+    assert int(response["Retry-After"]) >= 1
+    assert not Like.objects.filter(post=post).exists()  # liked then unliked; the third toggle never ran
+
+    assert client.get(reverse("posts:feed")).status_code == 200
+    client.force_login(author)
+    assert client.post(url).status_code == 302
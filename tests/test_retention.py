@@ -0,0 +1,88 @@
+from datetime import timedelta
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from core.models import MediaBlob
+from core.pagecache import group_versions
+
+from posts.models import ArchivedComment, ArchivedPost, Comment, Like, Post
+from posts.services import archive_soft_deleted_content, soft_delete_comment, soft_delete_post
+
+
+@pytest.mark.django_db
+def test_soft_deleted_content_is_archived_after_grace_period(create_user):
+    author = create_user("retention_author")
+    fan = create_user("retention_fan")
+    old = timezone.now() - timedelta(days=40)
+
+    expired = Post.objects.create(author=author, content="old news")
+    Like.objects.create(post=expired, user=fan)
+    Comment.objects.create(post=expired, author=fan, content="still visible before")
+    soft_delete_post(expired)
+    Post.objects.filter(pk=expired.pk).update(deleted_at=old)
+
+    live = Post.objects.create(author=author, content="keep")
+    stale_comment = Comment.objects.create(post=live, author=fan, content="oops")
+    soft_delete_comment(stale_comment)
+    Comment.objects.filter(pk=stale_comment.pk).update(deleted_at=old)
+    recent_comment = Comment.objects.create(post=live, author=fan, content="just now")
+    soft_delete_comment(recent_comment)
+
+    assert archive_soft_deleted_content(timedelta(days=30), batch_size=1) == (1, 2)
+
+    assert not Post.objects.filter(pk=expired.pk).exists()
+    assert not Like.objects.filter(post_id=expired.pk).exists()
+    archived = ArchivedPost.objects.get(pk=expired.pk)
+    assert archived.content == "old news"
+    assert [user_id for user_id, _ in archived.likes] == [fan.pk]
+    assert set(ArchivedComment.objects.values_list("post_id", flat=True)) == {expired.pk, live.pk}
+    assert list(Comment.objects.filter(post=live).values_list("pk", flat=True)) == [recent_comment.pk]
+
+
+@pytest.mark.django_db
+def test_archive_command_dry_run(create_user, capsys):
+    post = Post.objects.create(author=create_user("retention_dry"), content="x")
+    soft_delete_post(post)
+    Post.objects.filter(pk=post.pk).update(deleted_at=timezone.now() - timedelta(days=90))
+
+    call_command("archive_deleted_content", "--dry-run")
+    assert "Would archive 1 posts" in capsys.readouterr().out
+    assert Post.objects.filter(pk=post.pk).exists()
+
+    call_command("archive_deleted_content")
+    assert "Archived 1 posts" in capsys.readouterr().out
+    assert ArchivedPost.objects.filter(pk=post.pk).exists()
+
+
+def _expired_post(author, fans, **fields):
+    post = Post.objects.create(author=author, content="busy thread", **fields)
+    for fan in fans:
+        Like.objects.create(post=post, user=fan)
+        Comment.objects.create(post=post, author=fan, content="+1")
+    soft_delete_post(post)
+    Post.objects.filter(pk=post.pk).update(deleted_at=timezone.now() - timedelta(days=40))
+    return post
+
+
+@pytest.mark.django_db
+def test_archiving_cost_does_not_grow_with_activity_and_keeps_media(create_user, tmp_path, make_test_image):
+    author = create_user("busy_author")
+    fans = [create_user(f"busy_fan_{i}") for i in range(6)]
+    with override_settings(MEDIA_ROOT=tmp_path):
+        quiet = _expired_post(author, fans[:1], image=make_test_image("kept.png"))
+        versions = group_versions([f"topic:{quiet.topic}", "profile:busy_author"])
+        with CaptureQueriesContext(connection) as small:
+            archive_soft_deleted_content(timedelta(days=30))
+        assert group_versions([f"topic:{quiet.topic}", "profile:busy_author"]) != versions
+        assert MediaBlob.objects.get(name=quiet.image.name).ref_count == 1
+
+        _expired_post(author, fans)
+        with CaptureQueriesContext(connection) as large:
+            archive_soft_deleted_content(timedelta(days=30))
+
+    assert len(large.captured_queries) == len(small.captured_queries)
@@ -0,0 +1,40 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import Post
+
+
+@pytest.mark.django_db
+def test_search_results_are_paginated(create_user, client, settings):
+    settings.SEARCH_PAGE_SIZE = 2
+    author = create_user("pager")
+    for index in range(5):
+        Post.objects.create(author=author, content=f"headshot clip {index}")
+    client.force_login(author)
+    url = reverse("core:search")
+
+    first = client.get(url, {"q": "Headshot"})
+    assert [post.content for post in first.context["post_page"]] == ["headshot clip 4", "headshot clip 3"]
+    assert "posts_page=2" in first.content.decode()
+
+    last = client.get(url, {"q": "headshot", "posts_page": 3})
+    assert [post.content for post in last.context["post_page"]] == ["headshot clip 0"]
+
+
+@pytest.mark.django_db
+def test_search_ids_cached_until_matched_topic_changes(create_user, client):
+    author = create_user("searcher")
+    Post.objects.create(author=author, content="mirage smokes", topic=Post.TOPIC_CS2)
+    client.force_login(author)
+    url = reverse("core:search")
+
+    client.get(url, {"q": "cs2"})
+    with CaptureQueriesContext(connection) as ctx:
+        cached = client.get(url, {"q": "CS2 "})
+    assert "mirage smokes" in cached.content.decode()
+    assert not any("LIKE" in query["sql"] for query in ctx.captured_queries)
+
+    Post.objects.create(author=author, content="inferno retake", topic=Post.TOPIC_CS2)
+    assert "inferno retake" in client.get(url, {"q": "cs2"}).content.decode()
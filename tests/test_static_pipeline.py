@@ -0,0 +1,34 @@
+import gzip
+
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.management import call_command
+from django.template import Context, Template
+
+from core.staticfiles import minify_css
+
+
+def test_minify_css_strips_comments_and_whitespace():
+    css = "/* header */\n.nav a:hover {\n    color: red;\n    margin: 0 4px;\n}\n"
+    assert minify_css(css) == ".nav a:hover{color:red;margin:0 4px}"
+
+
+def test_collectstatic_builds_hashed_precompressed_bundle(settings, tmp_path):
+    settings.STATIC_ROOT = tmp_path
+    call_command("collectstatic", interactive=False, verbosity=0, ignore_patterns=["admin"])
+
+    hashed_bundle = staticfiles_storage.stored_name("bundles/app.css")
+    assert hashed_bundle != "bundles/app.css"
+    bundle = (tmp_path / hashed_bundle).read_bytes()
+    assert b".post-card{" in bundle and b"\n" not in bundle
+    assert gzip.decompress((tmp_path / f"{hashed_bundle}.gz").read_bytes()) == bundle
+
+    settings.DEBUG = False
+    html = Template("{% load ui_tags %}{% stylesheet_bundle 'bundles/app.css' %}").render(Context())
+    assert html == f'<link rel="stylesheet" href="/static/{hashed_bundle}">'
+
+
+def test_bundle_tag_links_sources_without_collected_manifest(settings, tmp_path):
+    settings.STATIC_ROOT = tmp_path
+    html = Template("{% load ui_tags %}{% stylesheet_bundle 'bundles/app.css' %}").render(Context())
+    assert html.count("<link") == len(settings.STATIC_BUNDLES["bundles/app.css"])
+    assert 'href="/static/base.css"' in html
@@ -0,0 +1,53 @@
+import pytest
+from django.core.cache import cache
+from django.urls import reverse
+
+from core.typeahead import VERSION_KEY, user_index
+
+
+@pytest.mark.django_db
+def test_autocomplete_matches_usernames_and_display_name_words(create_user, client, django_assert_num_queries):
+    viewer = create_user("ta_viewer")
+    create_user("ta_shadow")
+    sniper = create_user("ta_sniper")
+    sniper.profile.display_name = "Shadow Hunter"
+    sniper.profile.save()
+    client.force_login(viewer)
+    url = reverse("core:user_autocomplete")
+
+    names = [row["username"] for row in client.get(url, {"q": "TA_SH"}).json()["results"]]
+    assert names == ["ta_shadow"]
+    names = {row["username"] for row in client.get(url, {"q": "shad"}).json()["results"]}
+    assert names == {"ta_sniper"}
+    assert client.get(url, {"q": "hunt"}).json()["results"][0]["url"] == "/users/ta_sniper/"
+
+    with django_assert_num_queries(0):
+        user_index.search("ta_")
+
+
+@pytest.mark.django_db
+def test_index_picks_up_signups_and_profile_edits(create_user):
+    create_user("ta_first")
+    assert [name for name, _ in user_index.search("ta_")] == ["ta_first"]
+
+    second = create_user("ta_second")
+    assert [name for name, _ in user_index.search("ta_")] == ["ta_first", "ta_second"]
+
+    second.profile.display_name = "Renamed"
+    second.profile.save(update_fields=["display_name"])
+    assert user_index.search("renam") == [("ta_second", "Renamed")]
+
+
+@pytest.mark.django_db
+def test_index_expires_when_another_worker_bump_is_not_seen(create_user, settings):
+    settings.TYPEAHEAD_MAX_AGE = 60
+    create_user("ta_local")
+    assert [name for name, _ in user_index.search("ta_")] == ["ta_local"]
+    version = cache.get(VERSION_KEY)
+    # The signup happened in a worker whose per-process cache this one never sees.
+    create_user("ta_elsewhere")
+    cache.set(VERSION_KEY, version, timeout=None)
+
+    assert [name for name, _ in user_index.search("ta_")] == ["ta_local"]
+    settings.TYPEAHEAD_MAX_AGE = 0
+    assert [name for name, _ in user_index.search("ta_")] == ["ta_elsewhere", "ta_local"]